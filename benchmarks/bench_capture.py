@@ -0,0 +1,126 @@
+"""
+Micro-benchmark of the capture loop, per 100 ms chunk.
+
+Compares the original `np.int16(chunk * 32767).tobytes()` conversion with `PCM16Converter`
+and reports the bytes allocated and the time spent per chunk. The converter allocates
+almost nothing but is two to three times as slow, since it also clips; see its docstring.
+
+It then runs `TranscriptionSession.push_audio` end to end on a synthetic stereo call: the
+downmix and resampling, the voice gate, the conversion, the encoding and the hand-off to the
+send queue, with a connection that discards what it is sent. Its bytes per chunk include the
+encoded audio queued for Deepgram, which the loop has to allocate.
+
+Usage:
+    python -m benchmarks.bench_capture
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.standins import synthetic_call
+from src.constants import SAMPLE_RATE
+from src.dsp import PCM16Converter
+from src.threads import TranscriptionSession
+
+NUM_CHUNKS = 500
+CHANNELS = 2
+
+
+def legacy_convert(audio_chunk: np.ndarray) -> bytes:
+    return np.int16(audio_chunk * 32767).tobytes()
+
+
+def measure(convert, chunk: np.ndarray) -> tuple:
+    # Warm up so one-off buffer allocations do not count against the steady state
+    convert(chunk)
+
+    start = time.perf_counter()
+    for _ in range(NUM_CHUNKS):
+        convert(chunk)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(NUM_CHUNKS):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        out = convert(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - base
+        del out
+    tracemalloc.stop()
+    return allocated / NUM_CHUNKS, elapsed / NUM_CHUNKS
+
+
+class NullConnection:
+    """A started Deepgram connection that discards what it is sent."""
+
+    def on(self, event, handler) -> None:
+        pass
+
+    def send(self, data) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+class NullPool:
+    """Hands out NullConnections, so the session skips the websocket handshake."""
+
+    def checkout(self, options) -> NullConnection:
+        return NullConnection()
+
+
+def measure_push_audio() -> tuple:
+    """Bytes allocated and seconds per chunk of `push_audio`, over a speech-like call with pauses."""
+    audio = np.repeat(synthetic_call(SAMPLE_RATE)[:, None], CHANNELS, axis=1)
+    chunks = [audio[offset : offset + SAMPLE_RATE // 10] for offset in range(0, len(audio), SAMPLE_RATE // 10)]
+    session = TranscriptionSession(
+        sample_rate=SAMPLE_RATE, connection_pool=NullPool(), recording_file_name=None, speculative=False
+    )
+
+    def run(measured) -> float:
+        session.start_transcription()
+        for chunk in chunks[:10]:  # warm-up, so buffers sized on first use do not count
+            session.push_audio(chunk)
+        total = sum(measured(chunk) for chunk in chunks[10:])
+        session.stop_transcription(finalize_timeout=0)
+        return total / (len(chunks) - 10)
+
+    def timed(chunk: np.ndarray) -> float:
+        start = time.perf_counter()
+        session.push_audio(chunk)
+        return time.perf_counter() - start
+
+    def traced(chunk: np.ndarray) -> int:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        session.push_audio(chunk)
+        return tracemalloc.get_traced_memory()[1] - base
+
+    seconds = run(timed)
+    tracemalloc.start()
+    allocated = run(traced)
+    tracemalloc.stop()
+    return allocated, seconds
+
+
+def main():
+    rng = np.random.default_rng(0)
+    chunk = rng.uniform(-1.0, 1.0, size=(SAMPLE_RATE // 10, CHANNELS)).astype(np.float32)
+
+    converter = PCM16Converter()
+    results = {
+        "legacy": measure(legacy_convert, chunk),
+        "preallocated": measure(converter.convert, chunk),
+        "push_audio": measure_push_audio(),
+    }
+    print(f"{'path':<14}{'bytes/chunk':>14}{'us/chunk':>12}")
+    for name, (allocated, seconds) in results.items():
+        print(f"{name:<14}{allocated:>14.0f}{seconds * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
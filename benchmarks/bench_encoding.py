@@ -0,0 +1,77 @@
+"""
+Benchmark of the upstream encodings in src/encoders.py.
+
+Streams 16 kHz mono audio through StreamEncoder in 100 ms frames and reports, per encoding,
+bytes on the wire per second of audio, encoder CPU time per second of audio and the latency
+the encoder adds by holding audio back until a block or page is full.
+
+Usage:
+    python -m benchmarks.bench_encoding [fixture.wav ...]
+"""
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.standins import synthetic_call
+from src.constants import TARGET_SAMPLE_RATE
+from src.dsp import Resampler
+from src.encoders import UPSTREAM_ENCODINGS, StreamEncoder
+
+CHUNK_SEC = 0.1
+
+
+def load_audio(paths: list) -> np.ndarray:
+    if not paths:
+        return np.tile(synthetic_call(TARGET_SAMPLE_RATE, 10.0), 6)
+    pieces = []
+    for path in paths:
+        audio, sample_rate = sf.read(path, dtype="float32")
+        pieces.append(Resampler(sample_rate, TARGET_SAMPLE_RATE).process(audio))
+    return np.concatenate(pieces)
+
+
+def measure(encoding: str, pcm: np.ndarray) -> dict:
+    chunk = int(TARGET_SAMPLE_RATE * CHUNK_SEC)
+    encoder = StreamEncoder(encoding, TARGET_SAMPLE_RATE)
+    total_bytes = 0
+    held_frames = 0
+    held_sec = []
+
+    cpu_start = time.process_time()
+    for i in range(0, len(pcm), chunk):
+        data = encoder.encode(pcm[i : i + chunk])
+        total_bytes += len(data)
+        if data:
+            # The oldest frame waiting in the encoder went out this long after it was captured
+            held_sec.append(held_frames * CHUNK_SEC)
+            held_frames = 0
+        else:
+            held_frames += 1
+    total_bytes += len(encoder.close())
+    cpu = time.process_time() - cpu_start
+
+    seconds = len(pcm) / TARGET_SAMPLE_RATE
+    return {
+        "bytes_per_sec": total_bytes / seconds,
+        "cpu_ms_per_sec": cpu / seconds * 1000,
+        "mean_added_latency_ms": float(np.mean(held_sec)) * 1000 if held_sec else 0.0,
+        "max_added_latency_ms": max(held_sec, default=0.0) * 1000,
+    }
+
+
+def main(paths: list) -> None:
+    audio = load_audio(paths)
+    pcm = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+    print(f"{'encoding':<10}{'bytes/s':>10}{'cpu ms/s':>10}{'mean lat ms':>13}{'max lat ms':>12}")
+    for encoding in UPSTREAM_ENCODINGS:
+        r = measure(encoding, pcm)
+        print(
+            f"{encoding:<10}{r['bytes_per_sec']:>10.0f}{r['cpu_ms_per_sec']:>10.2f}"
+            f"{r['mean_added_latency_ms']:>13.0f}{r['max_added_latency_ms']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
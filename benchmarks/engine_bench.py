@@ -0,0 +1,124 @@
+"""
+Headless benchmark of the core engine (src/engine.py) and its event bus (src/events.py).
+
+First measures the cost of publishing on the bus with 0, 1 and 4 subscribers, against a bare
+`queue.Queue.put`, the handover every frontend does anyway. Then runs `--answers` questions
+through a `CallEngine` backed by the local OpenAI stand-in, with no GUI, and reports the time
+from `answer()` to the first short and full tokens and to both `AnswerDone` events, and the
+events published per answer.
+
+Usage:
+    python -m benchmarks.engine_bench [--answers 20] [--latency 0.2]
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+import openai
+
+from benchmarks.standins import OpenAIStandIn
+from src.engine import CallEngine
+from src.events import AnswerDone, AnswerToken, EngineError, EventBus, TranscriptSegment
+from src.threads import close_llm_client
+
+QUESTIONS = [
+    "Hi, my air conditioner stopped cooling last night and the house is really hot.",
+    "It's about twelve years old, a Carrier unit I think.",
+    "My name is Dana Whitfield and I live at 42 Orchard Lane.",
+    "Can you also look at the thermostat while you're here? It keeps resetting.",
+]
+
+
+def bus_overhead(events: int) -> dict:
+    report = {}
+    event = TranscriptSegment("hello")
+    sink = queue.Queue()
+    start = time.perf_counter()
+    for _ in range(events):
+        sink.put(event)
+    report["queue_put_ns"] = (time.perf_counter() - start) / events * 1e9
+
+    for subscribers in (0, 1, 4):
+        bus = EventBus()
+        for _ in range(subscribers):
+            bus.subscribe(TranscriptSegment, lambda event: None)
+        start = time.perf_counter()
+        for _ in range(events):
+            bus.publish(event)
+        report[f"publish_{subscribers}_subscribers_ns"] = (time.perf_counter() - start) / events * 1e9
+    return report
+
+
+def answer_latency(engine: CallEngine, answers: int) -> dict:
+    marks = {}
+    done = threading.Event()
+    counts = []
+
+    def on_event(event) -> None:
+        answer_marks = marks.setdefault(event.answer_id, {"events": 0})
+        answer_marks["events"] += 1
+        now = time.perf_counter()
+        if isinstance(event, AnswerToken):
+            answer_marks.setdefault(f"first_{event.kind}", now)
+        elif isinstance(event, AnswerDone):
+            answer_marks[f"done_{event.kind}"] = now
+        else:
+            answer_marks["error"] = event.message
+        if "done_short" in answer_marks and "done_full" in answer_marks or "error" in answer_marks:
+            done.set()
+
+    for event_type in (AnswerToken, AnswerDone, EngineError):
+        engine.bus.subscribe(event_type, on_event)
+
+    first_short, first_full, total, errors = [], [], [], 0
+    for turn in range(answers):
+        done.clear()
+        start = time.perf_counter()
+        answer_id = engine.answer(QUESTIONS[turn % len(QUESTIONS)] + f" (call {turn})", temperature=0.2)
+        done.wait(30)
+        answer_marks = marks.get(answer_id, {})
+        if "error" in answer_marks or "done_full" not in answer_marks:
+            errors += 1
+            continue
+        first_short.append(answer_marks["first_short"] - start)
+        first_full.append(answer_marks["first_full"] - start)
+        total.append(max(answer_marks["done_short"], answer_marks["done_full"]) - start)
+        counts.append(answer_marks["events"])
+
+    def quantiles(values: list) -> dict:
+        return {f"p{q}_ms": float(np.percentile(values, q)) * 1000 for q in (50, 95)} if values else {}
+
+    return {
+        "answers": answers,
+        "errors": errors,
+        "first_short_token": quantiles(first_short),
+        "first_full_token": quantiles(first_full),
+        "both_done": quantiles(total),
+        "events_per_answer": float(np.mean(counts)) if counts else 0.0,
+        "bus_published": engine.bus.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in time to first token [sec]")
+    parser.add_argument("--bus-events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    llm = OpenAIStandIn(latency_sec=args.latency).start()
+    openai.api_key = "standin"
+    openai.api_base = llm.url
+
+    engine = CallEngine()
+    report = {"bus": bus_overhead(args.bus_events), "engine": answer_latency(engine, args.answers)}
+    engine.close()
+    close_llm_client()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Offline evaluation of the FAQ fast-path (src/faq.py).
+
+Runs the labelled utterances in faq_eval_set.jsonl through FAQMatcher and reports accuracy,
+precision and recall of fast-path answers, the share of non-FAQ utterances it wrongly
+answered, the hit rate and the lookup time. Each line of the set is
+{"text": ..., "faq": <entry id or null>}. A wrong fast-path answer is worse than an LLM round
+trip, so the thresholds should keep the false-answer rate at zero.
+
+Usage:
+    python -m benchmarks.faq_eval [--script ./knowledge/avoca.md] [--min-score 0.6] [--min-coverage 1.0] [--show-errors]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from src.constants import FAQ_MIN_COVERAGE, FAQ_MIN_SCORE, FAQ_MIN_TERMS, FAQ_SINGLE_TERM_MIN_SCORE, SCRIPT_FILE
+from src.faq import FAQMatcher
+from src.knowledge import load_script
+
+EVAL_SET = Path(__file__).with_name("faq_eval_set.jsonl")
+
+
+def evaluate(matcher: FAQMatcher, examples: list, show_errors: bool = False) -> dict:
+    correct = answered = answered_right = faq_total = non_faq_total = false_answers = 0
+    for example in examples:
+        entry = matcher.match(example["text"])
+        predicted = entry.id if entry else None
+        correct += predicted == example["faq"]
+        if example["faq"] is None:
+            non_faq_total += 1
+            false_answers += predicted is not None
+        else:
+            faq_total += 1
+        if predicted is not None:
+            answered += 1
+            answered_right += predicted == example["faq"]
+        if show_errors and predicted != example["faq"]:
+            _, (score, coverage, terms) = matcher.confidence(example["text"])
+            print(
+                f"expected {example['faq']}, got {predicted} "
+                f"(score {score:.2f}, coverage {coverage:.2f}, {terms} terms): {example['text']}"
+            )
+
+    # Time the lookups without the bookkeeping above
+    start = time.perf_counter()
+    for example in examples:
+        matcher.confidence(example["text"])
+    lookup_us = (time.perf_counter() - start) / len(examples) * 1e6
+
+    return {
+        "examples": len(examples),
+        "accuracy": correct / len(examples),
+        "precision": answered_right / answered if answered else 1.0,
+        "recall": answered_right / faq_total if faq_total else 0.0,
+        "false_answer_rate": false_answers / non_faq_total if non_faq_total else 0.0,
+        "hit_rate": matcher.stats()["hit_rate"],
+        "mean_lookup_us": lookup_us,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", type=Path, default=EVAL_SET)
+    parser.add_argument("--script", default=SCRIPT_FILE, help="call script whose FAQ is matched")
+    parser.add_argument("--min-score", type=float, default=FAQ_MIN_SCORE)
+    parser.add_argument("--min-coverage", type=float, default=FAQ_MIN_COVERAGE)
+    parser.add_argument("--min-terms", type=int, default=FAQ_MIN_TERMS)
+    parser.add_argument("--single-term-min-score", type=float, default=FAQ_SINGLE_TERM_MIN_SCORE)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    examples = [json.loads(line) for line in args.eval_set.read_text().splitlines() if line.strip()]
+    entries = load_script(args.script).faq_entries
+    start = time.perf_counter()
+    matcher = FAQMatcher(
+        entries,
+        min_score=args.min_score,
+        min_coverage=args.min_coverage,
+        min_terms=args.min_terms,
+        single_term_min_score=args.single_term_min_score,
+    )
+    build_ms = (time.perf_counter() - start) * 1000
+    report = evaluate(matcher, examples, args.show_errors)
+    report["build_ms"] = build_ms
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Prompt size per turn over a long call.
+
+Runs `--turns` question/answer turns through a TranscriptionSession backed by the local OpenAI
+stand-in and prints the prompt tokens each turn cost. With the token-budgeted history the curve
+must flatten once the history budget is full; the run fails if any turn of the second half of
+the call costs more than `--max-growth` times the largest prompt of the first half. The share of
+prompt tokens the (emulated) provider cache served is reported alongside. With slot filling on
+(the default) the caller details travel as known facts and the history budget is smaller;
+`--no-slots` measures the history-only layout for comparison.
+
+Usage:
+    python -m benchmarks.history_growth --turns 100 [--no-slots]
+"""
+import argparse
+import json
+import sys
+
+import openai
+
+from benchmarks.standins import OpenAIStandIn
+from src.threads import TranscriptionSession, close_llm_client
+
+QUESTIONS = [
+    "Hi, my air conditioner stopped cooling last night and the house is really hot.",
+    "It's about twelve years old, a Carrier unit I think.",
+    "My name is Dana Whitfield and I live at 42 Orchard Lane.",
+    "You can reach me at 555 0134, or by email at dana at example dot com.",
+    "What time can you come out? Tomorrow morning would be best.",
+    "Is there a service fee to come out?",
+    "When can I speak to a live agent about a replacement quote?",
+    "What hours are you open on weekdays?",
+]
+
+
+def run(args: argparse.Namespace) -> dict:
+    llm = OpenAIStandIn(latency_sec=0.0, cache_min_tokens=args.cache_min_tokens).start()
+    openai.api_key = "standin"
+    openai.api_base = llm.url
+
+    session = TranscriptionSession(slot_filling=not args.no_slots)
+    for turn in range(args.turns):
+        session.generate_answer(QUESTIONS[turn % len(QUESTIONS)], short_answer=True, temperature=0.2)
+    close_llm_client()
+    llm.stop()
+
+    curve = session.history.prompt_tokens_per_turn()
+    answered = [tokens for tokens in curve if tokens]
+    half = len(curve) // 2
+    plateau = max(curve[:half])
+    tail = max(curve[half:])
+    return {
+        "turns": len(curve),
+        "prompt_tokens_per_turn": curve,
+        "first_half_max_tokens": plateau,
+        "second_half_max_tokens": tail,
+        "growth": tail / plateau,
+        "mean_llm_prompt_tokens": sum(answered) / max(len(answered), 1),
+        "known_facts": session.slots.as_dict() if session.slots is not None else None,
+        "cached_prompt_fraction": session.cached_tokens_total / max(session.prompt_tokens_total, 1),
+        "flat": tail <= plateau * args.max_growth,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--max-growth", type=float, default=1.05)
+    parser.add_argument("--no-slots", action="store_true", help="keep caller details in the history only")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="shortest prefix the provider caches")
+    args = parser.parse_args()
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if not report["flat"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
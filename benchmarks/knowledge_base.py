@@ -0,0 +1,153 @@
+"""
+Knowledge-base build time and prompt size with top-k retrieval.
+
+Generates call scripts with `--faq-sizes` FAQ entries (plus the shipped script), then reports
+for each: the time to parse and index the script, the time per retrieval, the prompt tokens
+of stuffing the whole script into every request versus the core plus the `--k` retrieved
+snippets, and how often the entry a caller asks about is among the retrieved ones. Callers are
+simulated with a phrasing of each question that is not in the script.
+
+Usage:
+    python -m benchmarks.knowledge_base [--faq-sizes 50 200 1000] [--k 4]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from src.constants import KNOWLEDGE_TOP_K, SCRIPT_FILE
+from src.history import estimate_tokens
+from src.knowledge import load_script, parse_script
+from src.prompts import build_messages, system_prompt
+
+BRANDS = ["Carrier", "Trane", "Lennox", "Rheem", "Goodman", "Daikin", "Bryant", "Amana", "York", "Ruud"]
+PRODUCTS = [
+    "furnace",
+    "heat pump",
+    "thermostat",
+    "mini split",
+    "boiler",
+    "air handler",
+    "humidifier",
+    "dehumidifier",
+    "air purifier",
+    "water heater",
+    "condenser",
+    "evaporator coil",
+    "duct system",
+    "zoning panel",
+    "UV lamp",
+    "smart vent",
+    "space heater",
+    "geothermal unit",
+    "swamp cooler",
+    "window unit",
+]
+# (question in the script, paraphrases in the script, phrasing a caller uses)
+TEMPLATES = [
+    (
+        "Do you install {brand} {product}s?",
+        ["Can you put in a {brand} {product}?"],
+        "would you guys be able to install a new {brand} {product} for me",
+    ),
+    (
+        "How much does a {brand} {product} repair cost?",
+        ["What do you charge to fix a {brand} {product}?"],
+        "what's the price to repair my {brand} {product}",
+    ),
+    (
+        "Is there a warranty on {brand} {product}s?",
+        ["Does the {brand} {product} come with a guarantee?"],
+        "is my {brand} {product} covered by a warranty",
+    ),
+    (
+        "Do you stock parts for {brand} {product}s?",
+        ["Do you carry {brand} {product} parts?"],
+        "do you have replacement parts in stock for a {brand} {product}",
+    ),
+    (
+        "How long does a {brand} {product} installation take?",
+        ["How many hours to install a {brand} {product}?"],
+        "how long will it take to put in the {brand} {product}",
+    ),
+]
+SECTIONS = 10
+
+
+def synthetic_script(faq_size: int, seed: int = 0) -> tuple:
+    """A script with `faq_size` FAQ entries and the caller phrasing of each, by entry id."""
+    rng = random.Random(seed)
+    lines = ["# Synthetic Heating & Cooling", "", "You are a sales agent for Synthetic Heating & Cooling.", ""]
+    for section in range(SECTIONS):
+        product = rng.choice(PRODUCTS)
+        lines += [f"## {product.title()} offers {section}", f"Mention the seasonal {product} tune-up special.", ""]
+    lines.append("## FAQ")
+    combinations = [(brand, product, template) for brand in BRANDS for product in PRODUCTS for template in TEMPLATES]
+    queries = {}
+    for number, (brand, product, (question, paraphrases, caller)) in enumerate(rng.sample(combinations, faq_size)):
+        fill = {"brand": brand, "product": product}
+        lines += [f"### entry_{number}", f"Q: {question.format(**fill)}"]
+        lines += [f"Q: {paraphrase.format(**fill)}" for paraphrase in paraphrases]
+        lines += [f"A: Yes, our {brand} {product} specialists handle that; ask me for details.", ""]
+        queries[f"entry_{number}"] = caller.format(**fill)
+    return "\n".join(lines), queries
+
+
+def prompt_tokens(messages: list) -> int:
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def measure(text: str, queries: dict, k: int, name: str) -> dict:
+    start = time.perf_counter()
+    knowledge = parse_script(text, name)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    search_us, retrieved_tokens, hits = [], [], 0
+    for id, query in queries.items():
+        start = time.perf_counter()
+        snippets = knowledge.search(query, k)
+        search_us.append((time.perf_counter() - start) * 1e6)
+        hits += id in [snippet.id for snippet in snippets]
+        retrieved_tokens.append(prompt_tokens(build_messages(query, "short", knowledge=knowledge, snippets=snippets)))
+
+    # The monolithic layout: the whole script in the system message of every request
+    query = next(iter(queries.values()))
+    stuffed = prompt_tokens(build_messages(query, "short", knowledge=knowledge, snippets=[]))
+    stuffed += estimate_tokens(knowledge.render())
+    retrieved = statistics.mean(retrieved_tokens)
+    return {
+        "script": name,
+        "snippets": len(knowledge),
+        "faq_entries": len(knowledge.faq_entries),
+        "build_ms": round(build_ms, 2),
+        "index_ms": round(knowledge.build_sec * 1000, 2),
+        "search_us_p50": round(statistics.median(search_us), 1),
+        "search_us_max": round(max(search_us), 1),
+        "core_tokens": estimate_tokens(system_prompt(knowledge)),
+        "stuffed_prompt_tokens": stuffed,
+        "top_k_prompt_tokens": round(retrieved),
+        "prompt_reduction": round(1 - retrieved / stuffed, 3),
+        "recall_at_k": round(hits / len(queries), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faq-sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--k", type=int, default=KNOWLEDGE_TOP_K)
+    parser.add_argument("--script", default=SCRIPT_FILE, help="shipped script to report alongside")
+    args = parser.parse_args()
+
+    shipped = load_script(args.script)
+    queries = {entry.id: entry.paraphrases[-1] for entry in shipped.faq_entries if entry.paraphrases}
+    with open(args.script, encoding="utf-8") as file:
+        reports = [measure(file.read(), queries, args.k, shipped.name)]
+    for faq_size in args.faq_sizes:
+        text, queries = synthetic_script(faq_size)
+        reports.append(measure(text, queries, args.k, f"synthetic-{faq_size}"))
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Resilience benchmark of the async LLM client (src/llm_client.py).
+
+Sends `--requests` streaming completions, `--concurrency` at a time, to the local OpenAI
+stand-in with injected errors and a latency tail. It does this three times: without retries,
+with jittered retries, and with retries plus hedging. For each run it reports the success
+rate, the p50/p95/p99 time to first chunk and the client's retry and hedge counters.
+
+Usage:
+    python -m benchmarks.llm_resilience --requests 200 --error-rate 0.1 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from benchmarks.standins import OpenAIStandIn
+from src.llm_client import AsyncLLMClient, LLMError
+
+MESSAGES = [{"role": "user", "content": "What hours are you open?"}]
+
+
+async def measure(client: AsyncLLMClient, requests: int, concurrency: int) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one() -> None:
+        nonlocal failures
+        async with limit:
+            start = time.monotonic()
+            try:
+                first = True
+                async for _ in client.stream_chat(MESSAGES, temperature=0.2):
+                    if first:
+                        latencies.append(time.monotonic() - start)
+                        first = False
+            except LLMError:
+                failures += 1
+
+    async with client:
+        await asyncio.gather(*(one() for _ in range(requests)))
+    return {
+        "success_rate": 1 - failures / requests,
+        "ttfc_p50_sec": float(np.percentile(latencies, 50)) if latencies else None,
+        "ttfc_p95_sec": float(np.percentile(latencies, 95)) if latencies else None,
+        "ttfc_p99_sec": float(np.percentile(latencies, 99)) if latencies else None,
+        **client.stats(),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    llm = OpenAIStandIn(
+        latency_sec=args.latency,
+        jitter_sec=args.jitter,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_sec=args.slow_sec,
+    ).start()
+    common = {"api_base": llm.url, "api_key": "standin", "max_concurrency": args.concurrency, "timeout_sec": 10}
+    report = {
+        "no_retries": await measure(AsyncLLMClient(max_retries=0, **common), args.requests, args.concurrency),
+        "retries": await measure(AsyncLLMClient(**common), args.requests, args.concurrency),
+        "retries_and_hedging": await measure(
+            AsyncLLMClient(hedge=True, hedge_after_sec=args.latency * 2, **common), args.requests, args.concurrency
+        ),
+    }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-sec", type=float, default=2.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Load test for the headless server (src/server.py).
+
+Drives N simulated callers, each streaming WAV fixtures as 100 ms PCM frames, against an
+in-process TranscriptionServer backed by the local Deepgram and OpenAI stand-ins. Reports
+calls per core, CPU use and p50/p95 stop-to-answer latency. Without fixtures, callers
+stream a synthetic speech-like burst pattern.
+
+Calls per core is measured, not offered: the completed calls divided by the cores the run
+kept busy (process CPU seconds per wall second), i.e. how many such calls one fully used core
+sustains at this `--speed`. The stand-ins run in the same process, so their CPU counts too and
+the figure is a lower bound for the server alone.
+
+Usage:
+    python -m benchmarks.load_test --callers 32 --turns 3 --speed 4 fixtures/*.wav
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+import openai
+import soundfile as sf
+from deepgram import DeepgramClient, DeepgramClientOptions
+
+from benchmarks.standins import DeepgramStandIn, OpenAIStandIn, synthetic_call
+from src.server import AUDIO_FRAME, JSON_FRAME, TranscriptionServer, encode_frame, encode_json, read_frame
+from src.threads import close_llm_client
+
+CHUNK_SEC = 0.1
+
+
+def load_fixtures(paths: list) -> list:
+    if not paths:
+        return [(synthetic_call(), 16000)]
+    return [sf.read(path, dtype="float32") for path in paths]
+
+
+def to_pcm_frames(audio: np.ndarray, sample_rate: int) -> list:
+    chunk = int(sample_rate * CHUNK_SEC)
+    pcm = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+    return [encode_frame(AUDIO_FRAME, pcm[i : i + chunk].tobytes()) for i in range(0, len(pcm), chunk)]
+
+
+def percentile(values: list, q: float) -> float:
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+async def caller(port: int, fixture: tuple, turns: int, speed: float, latencies: list, failures: list) -> None:
+    audio, sample_rate = fixture
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    frames = to_pcm_frames(audio, sample_rate)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def expect(*kinds: str) -> dict:
+        while True:
+            kind, payload = await read_frame(reader)
+            if kind != JSON_FRAME:
+                continue
+            message = json.loads(payload)
+            if message["type"] == "error":
+                raise RuntimeError(message["message"])
+            if message["type"] in kinds:
+                return message
+
+    try:
+        for _ in range(turns):
+            writer.write(encode_json({"type": "start", "sample_rate": sample_rate, "channels": channels}))
+            await expect("started")
+            for frame in frames:
+                writer.write(frame)
+                await writer.drain()
+                await asyncio.sleep(CHUNK_SEC / speed)
+            stopped_at = time.monotonic()
+            writer.write(encode_json({"type": "stop"}))
+            transcript = await expect("transcript")
+            if transcript["text"].strip():
+                await expect("answer")
+            latencies.append(time.monotonic() - stopped_at)
+        writer.write(encode_json({"type": "close"}))
+        await writer.drain()
+    except Exception as error:
+        failures.append(repr(error))
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    deepgram = DeepgramStandIn(result_delay_sec=args.stt_delay).start()
+    llm = OpenAIStandIn(latency_sec=args.llm_latency, jitter_sec=args.llm_jitter).start()
+    openai.api_key = "standin"
+    openai.api_base = llm.url
+
+    client = DeepgramClient("standin", DeepgramClientOptions(url=deepgram.url, options={"keepalive": "true"}))
+    server = TranscriptionServer(port=0, deepgram_client=client)
+    port = await server.start()
+
+    fixtures = load_fixtures(args.fixtures)
+    latencies, failures = [], []
+    wall_start, cpu_start = time.monotonic(), time.process_time()
+    await asyncio.gather(
+        *(
+            caller(port, fixtures[i % len(fixtures)], args.turns, args.speed, latencies, failures)
+            for i in range(args.callers)
+        )
+    )
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+    await server.close()
+    close_llm_client()
+
+    return {
+        "callers": args.callers,
+        "cores": server.cores,
+        "turns": len(latencies),
+        "failures": len(failures),
+        "wall_sec": wall,
+        "cpu_utilization": cpu / wall / server.cores,
+        "calls_per_core": (args.callers - len(failures)) / (cpu / wall) if cpu else 0.0,
+        "turns_per_sec_per_core": len(latencies) / wall / server.cores,
+        "latency_p50_sec": percentile(latencies, 50),
+        "latency_p95_sec": percentile(latencies, 95),
+        "errors": failures[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", help="WAV files to stream; synthetic audio if omitted")
+    parser.add_argument("--callers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 1.0 is real time")
+    parser.add_argument("--stt-delay", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Offline replay benchmark: WAV fixtures through the real capture, transcription and answer paths.
+
+Each turn plays a fixture through `audio.FileMicrophone` into `TranscriptionSession.process_audio`,
+at `--speed` times real time (0 for as fast as possible). When the file ends, it stops the
+transcription like the record button does, and generates the answer with
+`generate_answer_stream` (`generate_answers_stream` with `--both`). Deepgram and OpenAI are
+the local stand-ins from benchmarks/standins.py:
+    - the Deepgram stand-in speaks the live websocket protocol, with Results, Metadata and
+      from_finalize;
+    - the OpenAI stand-in is an OpenAI-compatible HTTP stub with configurable latency.
+Without fixtures, a synthetic speech-like call is written to a temporary WAV and replayed.
+
+The report is JSON:
+    - throughput: real-time factor, turns per minute, capture CPU per second of audio;
+    - latencies from the end of the audio to the transcript, the first token and the whole answer;
+    - the per-stage percentiles of the session's tracer.
+`--output` saves the report. `--compare` checks it against a saved report of another commit and
+exits with status 1 when a compared metric is worse by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.replay [fixtures/*.wav] [--turns 3] [--speed 4] [--output replay.json]
+    python -m benchmarks.replay --speed 4 --compare baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import openai
+import soundfile as sf
+from deepgram import DeepgramClient, DeepgramClientOptions
+
+from benchmarks.standins import DeepgramStandIn, OpenAIStandIn, synthetic_call
+from src.audio import FileMicrophone
+from src.constants import SAMPLE_RATE, TARGET_SAMPLE_RATE
+from src.threads import TranscriptionSession, close_llm_client
+
+# Compared by --compare: (section, metric, key, whether higher is better)
+COMPARED = [
+    ("throughput", "capture_cpu_ms_per_audio_sec", None, False),
+    ("latency", "stop_to_transcript", "p95_ms", False),
+    ("latency", "stop_to_first_token", "p95_ms", False),
+    ("latency", "stop_to_answer", "p95_ms", False),
+]
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    return {f"p{q}_ms": float(np.percentile(values, q)) * 1000 for q in (50, 95, 99)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def replay_turn(session: TranscriptionSession, microphone: FileMicrophone, both: bool) -> dict:
+    """Plays one fixture and answers it; returns the turn's timings."""
+    session.microphone = microphone
+    if not session.start_transcription():
+        raise RuntimeError("Failed to connect to the Deepgram stand-in")
+
+    capture_cpu = []
+
+    def capture() -> None:
+        start = time.thread_time()
+        session.process_audio()
+        capture_cpu.append(time.thread_time() - start)
+
+    capture_thread = threading.Thread(target=capture, name="replay-capture")
+    capture_thread.start()
+    microphone.finished.wait()
+
+    stopped = time.monotonic()
+    transcript = session.stop_transcription()
+    capture_thread.join()
+    transcribed = time.monotonic()
+
+    first_token = None
+    if both:
+        tokens, full_tokens = session.generate_answers_stream(transcript, temperature=0.2)
+    else:
+        tokens = session.generate_answer_stream(transcript, temperature=0.2)
+    answer = ""
+    for token in tokens:
+        if first_token is None:
+            first_token = time.monotonic()
+        answer += token
+    if both:
+        answer += "".join(full_tokens)
+    answered = time.monotonic()
+
+    return {
+        "audio_sec": microphone.duration_sec,
+        "capture_cpu_sec": capture_cpu[0] if capture_cpu else 0.0,
+        "stop_to_transcript": transcribed - stopped,
+        "stop_to_first_token": (first_token or answered) - stopped,
+        "stop_to_answer": answered - stopped,
+        "words": len(transcript.split()),
+        "answered": bool(answer.strip()),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> dict:
+    """Relative change of every COMPARED metric; regressions are changes for the worse beyond `tolerance`."""
+    changes, regressions = {}, []
+    for section, metric, key, higher_is_better in COMPARED:
+        try:
+            current = report[section][metric] if key is None else report[section][metric][key]
+            previous = baseline[section][metric] if key is None else baseline[section][metric][key]
+        except KeyError:
+            continue
+        name = f"{section}.{metric}" + (f".{key}" if key else "")
+        change = (current - previous) / previous if previous else 0.0
+        changes[name] = {"baseline": previous, "current": current, "change": change}
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(name)
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("commit"),
+        "settings_match": baseline.get("meta", {}).get("settings") == report["meta"]["settings"],
+        "tolerance": tolerance,
+        "changes": changes,
+        "regressions": regressions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", nargs="*", help="WAV files to replay; a synthetic call if omitted")
+    parser.add_argument("--turns", type=int, default=3, help="turns per fixture")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, 1.0 is real time, 0 unpaced")
+    parser.add_argument("--both", action="store_true", help="short and full answer from one completion")
+    parser.add_argument("--stt-delay", type=float, default=0.05, help="Deepgram stand-in result delay [sec]")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="OpenAI stand-in time to first token [sec]")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--output", help="write the report here")
+    parser.add_argument("--compare", help="report of another commit to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression with --compare")
+    parser.add_argument("--chrome-trace", help="write the replayed turns in Chrome's trace event format here")
+    args = parser.parse_args()
+
+    fixtures = args.fixtures
+    if not fixtures:
+        synthetic = Path(tempfile.mkdtemp()) / "synthetic_call.wav"
+        sf.write(str(synthetic), np.repeat(synthetic_call(SAMPLE_RATE)[:, None], 2, axis=1), SAMPLE_RATE)
+        fixtures = [str(synthetic)]
+
+    deepgram = DeepgramStandIn(sample_rate=TARGET_SAMPLE_RATE, result_delay_sec=args.stt_delay).start()
+    llm = OpenAIStandIn(latency_sec=args.llm_latency, jitter_sec=args.llm_jitter).start()
+    openai.api_key = "standin"
+    openai.api_base = llm.url
+    client = DeepgramClient("standin", DeepgramClientOptions(url=deepgram.url, options={"keepalive": "true"}))
+    session = TranscriptionSession(client, sample_rate=SAMPLE_RATE)
+
+    turns, failures = [], []
+    started = time.monotonic()
+    for path in fixtures:
+        for _ in range(args.turns):
+            try:
+                turns.append(replay_turn(session, FileMicrophone(path, args.speed), args.both))
+            except Exception as error:
+                failures.append(f"{Path(path).name}: {error}")
+    wall_sec = time.monotonic() - started
+    session.tracer.end_turn()
+    close_llm_client()
+
+    audio_sec = sum(turn["audio_sec"] for turn in turns)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "fixtures": [Path(path).name for path in args.fixtures] or ["synthetic"],
+            "settings": {
+                "turns": args.turns,
+                "speed": args.speed,
+                "both": args.both,
+                "stt_delay": args.stt_delay,
+                "llm_latency": args.llm_latency,
+                "llm_jitter": args.llm_jitter,
+            },
+        },
+        "throughput": {
+            "turns": len(turns),
+            "audio_sec": audio_sec,
+            "wall_sec": wall_sec,
+            "realtime_factor": audio_sec / wall_sec if wall_sec else 0.0,
+            "turns_per_min": len(turns) / wall_sec * 60 if wall_sec else 0.0,
+            "capture_cpu_ms_per_audio_sec": (
+                sum(turn["capture_cpu_sec"] for turn in turns) / audio_sec * 1000 if audio_sec else 0.0
+            ),
+            "transcribed_words_per_turn": statistics.mean(turn["words"] for turn in turns) if turns else 0.0,
+        },
+        "latency": {
+            metric: percentiles([turn[metric] for turn in turns])
+            for metric in ("stop_to_transcript", "stop_to_first_token", "stop_to_answer")
+        },
+        "stages": session.tracer.summary(),
+        "standins": {"deepgram_bytes": deepgram.bytes_received, "llm_requests": llm.requests},
+        "failures": failures + [f"turn {i} got no answer" for i, turn in enumerate(turns) if not turn["answered"]],
+    }
+    if args.compare:
+        report["comparison"] = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.chrome_trace:
+        session.tracer.save(args.chrome_trace, chrome=True)
+    regressed = bool(report.get("comparison", {}).get("regressions"))
+    sys.exit(1 if report["failures"] or regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
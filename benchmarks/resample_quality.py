@@ -0,0 +1,108 @@
+"""
+Transcript quality check for the 16 kHz mono downsampling stage.
+
+First checks, offline, that `Resampler` gives the same samples whatever the chunking: noise
+fed in chunks of varied sizes, including chunks shorter than the filter history as the server
+gets from its clients, must match resampling it in one pass. Then transcribes each recorded
+WAV fixture twice with Deepgram, once at its native rate and once after `Resampler`, and
+reports the word error rate between the two transcripts together with the upstream byte
+ratio. Needs DEEPGRAM_API_KEY in src/constants.py for the fixtures.
+
+Exits with status 1 if the chunking check fails or a fixture's WER exceeds 5%.
+
+Usage:
+    python -m benchmarks.resample_quality [path/to/call1.wav path/to/call2.wav]
+"""
+import io
+import sys
+
+import numpy as np
+import soundfile as sf
+
+from src.constants import DEEPGRAM_API_KEY, SAMPLE_RATE, TARGET_SAMPLE_RATE
+from src.dsp import PCM16Converter, Resampler
+
+CHUNK_SEC = 0.1
+MAX_WER = 0.05
+# Frames per chunk for the chunking check: capture-loop sized, shorter than the filter history, single frames
+CHUNK_SIZES = [4800, 30, 4800, 1, 47, 48, 49, 2, 1024, 3, 4800, 5]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return float(bool(hyp))
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, distances[j] = distances[j], min(
+                distances[j] + 1, distances[j - 1] + 1, prev + (ref_word != hyp_word)
+            )
+    return distances[-1] / len(ref)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def resample_like_capture_loop(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    resampler = Resampler(sample_rate, TARGET_SAMPLE_RATE)
+    converter = PCM16Converter()
+    chunk = int(sample_rate * CHUNK_SEC)
+    pieces = [
+        converter.convert_array(resampler.process(audio[i : i + chunk])).copy() for i in range(0, len(audio), chunk)
+    ]
+    return np.concatenate(pieces)
+
+
+def chunking_error(source_rate: int = SAMPLE_RATE, channels: int = 2) -> float:
+    """Largest difference between resampling noise in CHUNK_SIZES chunks and in one pass."""
+    audio = np.random.default_rng(0).uniform(-1, 1, (sum(CHUNK_SIZES), channels)).astype(np.float32)
+    reference = Resampler(source_rate, TARGET_SAMPLE_RATE).process(audio)
+    resampler = Resampler(source_rate, TARGET_SAMPLE_RATE)
+    offsets = np.cumsum([0] + CHUNK_SIZES)
+    chunked = np.concatenate([resampler.process(audio[start:end]) for start, end in zip(offsets[:-1], offsets[1:])])
+    if len(chunked) != len(reference):
+        return float("inf")
+    return float(np.abs(chunked - reference).max())
+
+
+def transcribe(client, wav_bytes: bytes) -> str:
+    from deepgram import PrerecordedOptions
+
+    options = PrerecordedOptions(model="nova-2", language="en-US", smart_format=True)
+    response = client.listen.rest.v("1").transcribe_file({"buffer": wav_bytes}, options)
+    return response.results.channels[0].alternatives[0].transcript
+
+
+def main(paths: list) -> int:
+    failures = 0
+    for source_rate, channels in ((SAMPLE_RATE, 2), (SAMPLE_RATE, 1), (32000, 1)):
+        error = chunking_error(source_rate, channels)
+        failures += error > 1e-6
+        print(f"{source_rate} Hz x{channels} in {len(CHUNK_SIZES)} chunks: max difference to one pass {error:.2e}")
+    if not paths:
+        return 1 if failures else 0
+
+    from deepgram import DeepgramClient
+
+    client = DeepgramClient(DEEPGRAM_API_KEY)
+    for path in paths:
+        audio, sample_rate = sf.read(path, dtype="float32")
+        original = audio.mean(axis=1) if audio.ndim == 2 else audio
+        original_bytes = len(original) * 2
+        resampled = resample_like_capture_loop(audio, sample_rate)
+
+        reference = transcribe(client, encode_wav(original, sample_rate))
+        hypothesis = transcribe(client, encode_wav(resampled, TARGET_SAMPLE_RATE))
+        wer = word_error_rate(reference, hypothesis)
+        failures += wer > MAX_WER
+        print(f"{path}: WER {wer:.3f}, upstream bytes x{original_bytes / resampled.nbytes:.2f} smaller")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
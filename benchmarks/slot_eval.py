@@ -0,0 +1,65 @@
+"""
+Offline evaluation of local slot filling (src/slots.py).
+
+Runs the labelled utterances in slot_eval_set.jsonl through the extractors and reports, per
+slot, how many expected values were found and how many wrong values were stored. Each line of
+the set is {"text": ..., "slots": {<slot>: <expected value or null>}}; only the listed slots
+are checked. A wrong fact is worse than a missing one, because the prompt tells the model not
+to ask for what is already known.
+
+Exits with status 1 if any listed slot comes out different from its label.
+
+Usage:
+    python -m benchmarks.slot_eval [--show-errors]
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+from src.slots import EXTRACTORS
+
+EVAL_SET = Path(__file__).with_name("slot_eval_set.jsonl")
+
+
+def evaluate(examples: list, show_errors: bool = False) -> dict:
+    checked, found, wrong, missed = Counter(), Counter(), Counter(), Counter()
+    for example in examples:
+        for slot, expected in example["slots"].items():
+            value = EXTRACTORS[slot](example["text"])
+            checked[slot] += 1
+            if value == expected:
+                found[slot] += expected is not None
+                continue
+            if value is None:
+                missed[slot] += 1
+            else:
+                wrong[slot] += 1
+            if show_errors:
+                print(f"{slot}: expected {expected!r}, got {value!r}: {example['text']}")
+
+    return {
+        "examples": len(examples),
+        "slots": {
+            slot: {"checked": checked[slot], "found": found[slot], "missed": missed[slot], "wrong": wrong[slot]}
+            for slot in sorted(checked)
+        },
+        "errors": sum(missed.values()) + sum(wrong.values()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", type=Path, default=EVAL_SET)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    examples = [json.loads(line) for line in args.eval_set.read_text().splitlines() if line.strip()]
+    report = evaluate(examples, args.show_errors)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
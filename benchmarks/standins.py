@@ -0,0 +1,286 @@
+"""
+Local stand-ins for the Deepgram live API and the OpenAI chat completions API.
+
+Both run on their own event loop in a background thread, so they can sit behind the real,
+synchronous client code without competing with the code under test for the same loop.
+The Deepgram stand-in needs websockets 13 or newer, a dev dependency in pyproject.toml.
+
+Example:
+    ```python
+    deepgram = DeepgramStandIn().start()
+    openai_stub = OpenAIStandIn(latency_sec=0.3).start()
+    client = DeepgramClient("standin", DeepgramClientOptions(url=deepgram.url))
+    openai.api_base = openai_stub.url
+    ```
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from os.path import commonprefix
+
+import numpy as np
+from aiohttp import web
+from websockets.asyncio.server import serve
+
+from src.scheduler import FULL_MARKER, SHORT_MARKER
+
+WORDS = "thanks for calling my air conditioner stopped cooling can someone come out tomorrow".split()
+
+
+def synthetic_call(sample_rate: int = 16000, seconds: float = 3.0) -> np.ndarray:
+    """Speech-like bursts of a modulated tone, for callers without WAV fixtures."""
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    envelope = (np.sin(2 * np.pi * 0.7 * t) > -0.3).astype(np.float32)
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    return (voice * envelope).astype(np.float32)
+
+
+class _BackgroundLoop:
+    """Runs an async server on a private event loop thread."""
+
+    def __init__(self) -> None:
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _serve(self) -> None:
+        raise NotImplementedError
+
+    async def _shutdown(self) -> None:
+        pass
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        # Lets open request handlers finish before the loop stops under them
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class DeepgramStandIn(_BackgroundLoop):
+    """
+    Emulates the Deepgram /v1/listen websocket.
+
+    Replies with a final `Results` message for every `words_every_sec` seconds of audio
+    received, a `from_finalize` result on Finalize and `Metadata` on CloseStream. KeepAlive
+    messages are accepted and ignored. `result_delay_sec` delays every result.
+    """
+
+    def __init__(self, sample_rate: int = 16000, words_every_sec: float = 0.5, result_delay_sec: float = 0.05) -> None:
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.words_every_sec = words_every_sec
+        self.result_delay_sec = result_delay_sec
+        self.connections = 0
+        self.bytes_received = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _serve(self) -> None:
+        server = await serve(self._handle, "127.0.0.1", 0)
+        self.port = server.sockets[0].getsockname()[1]
+
+    def _result(self, transcript: str, start: float, duration: float, from_finalize: bool = False) -> str:
+        return json.dumps(
+            {
+                "type": "Results",
+                "channel_index": [0, 1],
+                "duration": duration,
+                "start": start,
+                "is_final": True,
+                "speech_final": True,
+                "from_finalize": from_finalize,
+                "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.99, "words": []}]},
+                "metadata": {"request_id": "standin", "model_info": {"name": "standin"}, "model_uuid": "standin"},
+            }
+        )
+
+    async def _handle(self, websocket) -> None:
+        self.connections += 1
+        bytes_per_word = int(self.sample_rate * 2 * self.words_every_sec)
+        pending = 0
+        emitted = 0
+        position = 0.0
+
+        async def emit(count: int, from_finalize: bool = False) -> None:
+            nonlocal emitted, position
+            words = [WORDS[(emitted + i) % len(WORDS)] for i in range(count)]
+            emitted += count
+            duration = count * self.words_every_sec
+            await asyncio.sleep(self.result_delay_sec)
+            await websocket.send(self._result(" ".join(words), position, duration, from_finalize))
+            position += duration
+
+        async for message in websocket:
+            if isinstance(message, bytes):
+                self.bytes_received += len(message)
+                pending += len(message)
+                if pending >= bytes_per_word:
+                    await emit(pending // bytes_per_word)
+                    pending %= bytes_per_word
+                continue
+
+            kind = json.loads(message).get("type")
+            if kind == "Finalize":
+                await emit(1 if pending else 0, from_finalize=True)
+                pending = 0
+            elif kind == "CloseStream":
+                await websocket.send(
+                    json.dumps(
+                        {
+                            "type": "Metadata",
+                            "transaction_key": "",
+                            "request_id": "standin",
+                            "sha256": "",
+                            "created": "",
+                            "duration": position,
+                            "channels": 1,
+                            "models": [],
+                            "model_info": {},
+                        }
+                    )
+                )
+                await websocket.close()
+                return
+
+
+class OpenAIStandIn(_BackgroundLoop):
+    """
+    Emulates POST /v1/chat/completions of an OpenAI-compatible API.
+
+    Each request waits `latency_sec` plus up to `jitter_sec`, with probability `slow_rate` another
+    `slow_sec` (a latency tail), and fails with HTTP 500 with probability `error_rate`. The answer echoes the last user message, laid out in short and
+    full sections when the prompt asks for the combined format; requests with
+    `stream: true` get it back as server-sent `chat.completion.chunk` events, one per word,
+    and a final usage chunk if `stream_options.include_usage` is set.
+
+    Prompt caching is emulated like OpenAI's: a prompt sharing at least `cache_min_tokens`
+    (1024) tokens of prefix with an earlier one reports the shared prefix, in 128-token steps,
+    as cached tokens.
+    """
+
+    def __init__(
+        self,
+        latency_sec: float = 0.3,
+        jitter_sec: float = 0.0,
+        error_rate: float = 0.0,
+        cache_min_tokens: int = 1024,
+        slow_rate: float = 0.0,
+        slow_sec: float = 0.0,
+    ) -> None:
+        super().__init__()
+        self.slow_rate = slow_rate
+        self.slow_sec = slow_sec
+        self.cache_min_tokens = cache_min_tokens
+        self.latency_sec = latency_sec
+        self.jitter_sec = jitter_sec
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._prompts = deque(maxlen=64)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    async def _serve(self) -> None:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def _shutdown(self) -> None:
+        await self._runner.cleanup()
+
+    def _answer(self, body: dict) -> str:
+        question = [m["content"] for m in body["messages"] if m["role"] == "user"][-1]
+        answer = f"Thanks for your question about {question[:60].strip()}. Let me help you with that."
+        if any(FULL_MARKER in m["content"] for m in body["messages"]):
+            return f"{SHORT_MARKER}\n{answer}\n{FULL_MARKER}\n{answer} Could I get your name and address?"
+        return answer
+
+    def _usage(self, body: dict, answer: str) -> dict:
+        prompt = "".join(f"{m['role']}:{m['content']}\n" for m in body["messages"])
+        shared = max((len(commonprefix([prompt, earlier])) for earlier in self._prompts), default=0) // 4
+        self._prompts.append(prompt)
+        minimum = self.cache_min_tokens
+        cached = minimum + (shared - minimum) // 128 * 128 if shared >= minimum else 0
+        prompt_tokens = len(prompt) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(answer) // 4,
+            "total_tokens": prompt_tokens + len(answer) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+    async def _stream(self, request: web.Request, body: dict, answer: str) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "standin"),
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "standin"),
+                "choices": [],
+                "usage": self._usage(body, answer),
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        delay = self.latency_sec + random.uniform(0, self.jitter_sec)
+        if random.random() < self.slow_rate:
+            delay += self.slow_sec
+        await asyncio.sleep(delay)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": {"message": "injected error", "type": "server_error"}}, status=500)
+
+        answer = self._answer(body)
+        if body.get("stream"):
+            return await self._stream(request, body, answer)
+        return web.json_response(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "standin"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": self._usage(body, answer),
+            }
+        )
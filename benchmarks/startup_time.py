@@ -0,0 +1,105 @@
+"""
+Startup-time benchmark: what importing the core modules costs, with a budget for CI.
+
+Imports each module in a fresh interpreter under `python -X importtime`. It reports the
+median of `--runs` runs for two figures: the module's cumulative import time, and the share
+spent in this project's own modules. Then it imports every module, and constructs a
+`CallEngine`, with the packages that must stay deferred made unimportable. That stands in
+for a machine without an audio device or SDKs, and proves that nothing loads them before
+first use.
+
+Exits with status 1 if a module exceeds its budget or pulls in a deferred package.
+
+Usage:
+    python -m benchmarks.startup_time [--runs 5] [--budget-scale 1.0]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# [ms]. cumulative import time allowed under -X importtime, project modules plus numpy/loguru/soundfile
+BUDGETS_MS = {
+    "src.threads": 300,
+    "src.engine": 300,
+    "src.server": 350,
+    "src.llm": 250,
+}
+# Loaded on first use only: the SDKs, the HTTP stack and the audio device library
+DEFERRED = ("deepgram", "openai", "aiohttp", "soundcard", "PyQt5")
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time [ms] of `module` and of each top-level package it pulled in."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    packages = defaultdict(float)
+    project_ms = total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        top_level = name.strip().split(".")[0]
+        packages[top_level] += int(self_us) / 1000
+        if top_level == "src":
+            project_ms += int(self_us) / 1000
+        if name.strip() == module:
+            total_ms = int(cumulative_us) / 1000
+    return {"total_ms": total_ms, "project_ms": project_ms, "packages": packages}
+
+
+def blocked_run(code: str) -> subprocess.CompletedProcess:
+    """Runs `code` with every DEFERRED package unimportable."""
+    block = "".join(f"sys.modules[{name!r}] = None; " for name in DEFERRED)
+    return subprocess.run([sys.executable, "-c", f"import sys; {block}\n{code}"], capture_output=True, text=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplies every budget, for slow CI hosts")
+    args = parser.parse_args()
+
+    report, failures = {}, []
+    for module, budget_ms in BUDGETS_MS.items():
+        runs = [import_times(module) for _ in range(args.runs)]
+        total_ms = statistics.median(run["total_ms"] for run in runs)
+        packages = {
+            name: statistics.median(run["packages"].get(name, 0.0) for run in runs) for name in runs[0]["packages"]
+        }
+        report[module] = {
+            "total_ms": total_ms,
+            "project_ms": statistics.median(run["project_ms"] for run in runs),
+            "budget_ms": budget_ms * args.budget_scale,
+            "slowest_packages_ms": dict(sorted(packages.items(), key=lambda item: -item[1])[:5]),
+            "deferred_imported": sorted(name for name in DEFERRED if name in runs[0]["packages"]),
+        }
+        if total_ms > budget_ms * args.budget_scale:
+            failures.append(f"{module} imports in {total_ms:.0f} ms, budget {budget_ms * args.budget_scale:.0f} ms")
+        if report[module]["deferred_imported"]:
+            failures.append(f"{module} imports {', '.join(report[module]['deferred_imported'])} at import time")
+
+        blocked = blocked_run(f"import {module}")
+        if blocked.returncode != 0:
+            failures.append(f"{module} fails to import without {', '.join(DEFERRED)}: {blocked.stderr.strip()[-200:]}")
+
+    # Building the engine may read the script, but must not touch SDKs or devices
+    engine = blocked_run(
+        "import time; start = time.perf_counter(); from src.engine import CallEngine; engine = CallEngine(); "
+        "print((time.perf_counter() - start) * 1000); engine.close()"
+    )
+    if engine.returncode != 0:
+        failures.append(f"CallEngine() needs a deferred package: {engine.stderr.strip()[-200:]}")
+    else:
+        report["engine_construct_ms"] = float(engine.stdout.split()[-1])
+
+    report["failures"] = failures
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
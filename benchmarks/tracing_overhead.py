@@ -0,0 +1,111 @@
+"""
+Cost of per-turn tracing (src/tracing.py) against the capture loop it instruments.
+
+Runs `--turns` turns through a real TranscriptionSession against the local Deepgram and
+OpenAI stand-ins. Each turn pushes the audio as fast as possible, finalizes and answers.
+Tracing is switched on and off on alternate turns. The report has:
+    - the CPU time of the capture loop per turn, with and without tracing;
+    - the spans a traced turn records, times the measured cost of recording one;
+    - that cost as a fraction of the capture loop;
+    - the per-stage p50/p95/p99 of the traced turns.
+Optionally writes the turns as JSON and as a Chrome trace (chrome://tracing, Perfetto).
+
+Exits with status 1 if tracing costs more than `--budget` of the capture loop.
+
+Usage:
+    python -m benchmarks.tracing_overhead [--turns 20] [--budget 0.01] [--chrome-trace trace.json]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+import openai
+from deepgram import DeepgramClient, DeepgramClientOptions
+
+from benchmarks.standins import DeepgramStandIn, OpenAIStandIn, synthetic_call
+from src.constants import SAMPLE_RATE, TARGET_SAMPLE_RATE
+from src.threads import TranscriptionSession, close_llm_client
+from src.tracing import FINAL_TRANSCRIPT, Tracer
+
+CHUNK_FRAMES = SAMPLE_RATE // 10  # the capture loop's 0.1 s chunks
+
+
+def span_cost_sec(samples: int = 100_000) -> float:
+    """Seconds to record one span into a live turn, the same work as every stage of a session."""
+    tracer = Tracer("bench")
+    tracer.begin_turn()
+    start = time.monotonic()
+    begin = time.perf_counter()
+    for _ in range(samples):
+        tracer.span(FINAL_TRANSCRIPT, start, words=3)
+    return (time.perf_counter() - begin) / samples
+
+
+def run_turn(session: TranscriptionSession, audio: np.ndarray, traced: bool) -> float:
+    """Plays one turn; returns the CPU time of its capture loop."""
+    session.tracer.enabled = traced
+    if not session.start_transcription():
+        raise RuntimeError("Failed to connect to the Deepgram stand-in")
+    begin = time.thread_time()
+    for offset in range(0, len(audio), CHUNK_FRAMES):
+        session.push_audio(audio[offset : offset + CHUNK_FRAMES])
+    capture_sec = time.thread_time() - begin
+    transcript = session.stop_transcription()
+    session.generate_answers(transcript or "my air conditioner stopped cooling", temperature=0.2)
+    return capture_sec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=0.01, help="allowed tracing cost, share of the capture loop")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--json", help="write the traced turns and their percentiles here")
+    parser.add_argument("--chrome-trace", help="write the traced turns in Chrome's trace event format here")
+    args = parser.parse_args()
+
+    deepgram = DeepgramStandIn(sample_rate=TARGET_SAMPLE_RATE).start()
+    llm = OpenAIStandIn(latency_sec=args.llm_latency).start()
+    openai.api_key = "standin"
+    openai.api_base = llm.url
+    client = DeepgramClient("standin", DeepgramClientOptions(url=deepgram.url, options={"keepalive": "true"}))
+    session = TranscriptionSession(client, sample_rate=SAMPLE_RATE, speculative=False)
+    # Stereo at the device rate, as the loopback recorder delivers it
+    audio = np.repeat(synthetic_call(SAMPLE_RATE)[:, None], 2, axis=1)
+
+    capture = {True: [], False: []}
+    for turn in range(args.turns):
+        traced = turn % 2 == 0
+        capture[traced].append(run_turn(session, audio, traced))
+    session.tracer.enabled = True
+    session.tracer.end_turn()
+    close_llm_client()
+
+    turns = list(session.tracer.turns)
+    spans_per_turn = statistics.mean(len(turn.spans) for turn in turns)
+    cost_sec = span_cost_sec()
+    capture_sec = statistics.median(capture[True])
+    overhead = spans_per_turn * cost_sec / capture_sec
+    report = {
+        "turns": args.turns,
+        "capture_cpu_ms_traced": capture_sec * 1000,
+        "capture_cpu_ms_untraced": statistics.median(capture[False]) * 1000,
+        "spans_per_turn": spans_per_turn,
+        "span_cost_us": cost_sec * 1e6,
+        "tracing_cost_fraction": overhead,
+        "budget": args.budget,
+        "stages": session.tracer.summary(),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        session.tracer.save(args.json)
+    if args.chrome_trace:
+        session.tracer.save(args.chrome_trace, chrome=True)
+    sys.exit(0 if overhead < args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,66 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
-import asyncio
-
-from src.threads import (
-    start_transcription, 
-    process_audio, 
-    handle_transcription, 
-    stop_transcription,
-    generate_answer
-)
-
-from src.constants import APPLICATION_WIDTH, OFF_IMAGE, ON_IMAGE
+import queue
+import time
+from collections import defaultdict
+
+from src.engine import CallEngine
+from src.events import AnswerDone, AnswerToken, EngineError, RecordingStateChanged, SlotsUpdated, TranscriptReady
+from src.slots import format_slots
+
+from src.constants import APPLICATION_WIDTH, OFF_IMAGE, ON_IMAGE, UI_POLL_MS
 from loguru import logger
 
 logger.add("debug.log", level="DEBUG", rotation="3 MB", compression="zip")
 
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
 class MainWindow:
-    def __init__(self, root):
+    """
+    Tk frontend of the call engine; its event loop never blocks.
+
+    Capture, Deepgram and LLM calls run in `CallEngine`. Its events are published on engine
+    threads, so they are only queued there; the Tk loop drains the queue every `UI_POLL_MS`
+    via `root.after` and updates the widgets. Every user input records how long it took until
+    its effect was painted.
+    """
+
+    def __init__(self, root, engine=None):
         self.root = root
-        self.root.title('Keyboard Test')
+        self.root.title("Keyboard Test")
         self.root.geometry(f"{APPLICATION_WIDTH}x800")
 
-        self.recording = False
-        self.recording_thread = None
-        self.transcribe_thread = None
-        self.quick_answer_thread = None
-        self.full_answer_thread = None
-
         self.audio_transcript = None
 
+        self.engine = engine or CallEngine()
+        self.results = queue.Queue()
+        self.handlers = {
+            RecordingStateChanged: self.on_recording_state,
+            TranscriptReady: self.on_transcript,
+            SlotsUpdated: self.on_slots,
+            AnswerToken: self.on_answer_token,
+            AnswerDone: self.on_answer_done,
+            EngineError: self.on_error,
+        }
+        for event_type in self.handlers:
+            self.engine.bus.subscribe(event_type, self.results.put)
+        # [sec]. input -> paint latency per kind of input, see `measure_paint`
+        self.paint_latencies = defaultdict(list)
+        self.answer_id = None
+        self.answer_started = None
+        # Answer sections that painted their first tokens
+        self.painted = set()
+
         self.initUI()
 
+        # Open Deepgram connections now so the first recording does not wait for a handshake
+        self.engine.prewarm()
+        self.root.after(UI_POLL_MS, self.drain_results)
+
     def initUI(self):
         # Create and configure widgets
         self.record_status_button = ttk.Button(self.root, text="Start Recording", command=self.toggle_recording)
@@ -39,92 +68,161 @@ class MainWindow:
 
         self.info_label = ttk.Label(self.root, text="Use buttons to control the recording and analyze audio.")
         self.analyzed_text_label = ttk.Label(self.root, text="")
-        self.quick_chat_gpt_answer = tk.Text(self.root, height=5, width=50, state='disabled')
-        self.full_chat_gpt_answer = tk.Text(self.root, height=5, width=50, state='disabled')
+        self.caller_details_label = ttk.Label(self.root, text="", justify="left")
+        self.quick_chat_gpt_answer = tk.Text(self.root, height=5, width=50, state="disabled")
+        self.full_chat_gpt_answer = tk.Text(self.root, height=5, width=50, state="disabled")
+        self.answer_widgets = {"short": self.quick_chat_gpt_answer, "full": self.full_chat_gpt_answer}
 
         # Create layout
         self.info_label.pack(pady=10)
         self.record_status_button.pack(pady=10)
         self.analyze_button.pack(pady=10)
-        
+
         ttk.Label(self.root, text="Analysis Result:").pack(pady=5)
         self.analyzed_text_label.pack(pady=5)
-        
+
+        ttk.Label(self.root, text="Caller details:").pack(pady=5)
+        self.caller_details_label.pack(pady=5)
+
         ttk.Label(self.root, text="Short answer:").pack(pady=5)
         self.quick_chat_gpt_answer.pack(pady=5)
 
         ttk.Label(self.root, text="Full answer:").pack(pady=5)
         self.full_chat_gpt_answer.pack(pady=5)
 
+    # Engine events -> Tk loop
+    def drain_results(self):
+        while True:
+            try:
+                event = self.results.get_nowait()
+            except queue.Empty:
+                break
+            handler = self.handlers.get(type(event))
+            if handler is None:
+                continue
+            try:
+                handler(event)
+            except Exception as error:
+                logger.error(f"UI update failed: {error}")
+        self.root.after(UI_POLL_MS, self.drain_results)
+
+    def measure_paint(self, kind, started, on_painted=None):
+        """Records the time from the input at `started` until the pending widget changes are painted."""
+
+        def painted():
+            self.paint_latencies[kind].append(time.perf_counter() - started)
+            if on_painted is not None:
+                on_painted()
+
+        # Tk redraws in idle callbacks; this one is queued behind the redraws of the changes just made
+        self.root.after_idle(painted)
+
+    def paint_stats(self):
+        return {
+            kind: {
+                "count": len(values),
+                "p50_ms": percentile(values, 0.5) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+            for kind, values in self.paint_latencies.items()
+            if values
+        }
+
+    # Recording
     def toggle_recording(self):
-        self.recording = not self.recording
-        if self.recording:
+        started = time.perf_counter()
+        if not self.engine.is_recording:
             self.record_status_button.config(text="Recording... Click to Stop", style="danger.TButton")
             logger.debug("Starting recording...")
-            self.start_recording_thread()
+            self.audio_transcript = None
+            self.engine.start_recording()
         else:
             self.record_status_button.config(text="Start Recording", style="")
+            self.info_label.config(text="Finishing transcription...")
             logger.debug("Stopping recording...")
-            self.stop_recording_thread()
+            self.engine.stop_recording()
+        self.measure_paint("toggle_recording", started)
+
+    def on_recording_state(self, event):
+        if not event.recording and not self.engine.is_recording:
+            self.record_status_button.config(text="Start Recording", style="")
 
-    def start_recording_thread(self):
-        if not self.recording_thread:
-            self.recording_thread = True
-            start_transcription()
-            asyncio.run(process_audio())
+    def on_transcript(self, event):
+        self.audio_transcript = event.text
+        self.info_label.config(text="Use buttons to control the recording and analyze audio.")
 
-    def run_recording_process(self):
-        start_transcription()
-        asyncio.run(process_audio())
+    def on_slots(self, event):
+        self.caller_details_label.config(text=format_slots(event.slots))
 
-    def stop_recording_thread(self):
-        if self.recording_thread:
-            self.audio_transcript = stop_transcription()
-            self.recording_thread = False
+    def on_error(self, event):
+        if event.answer_id is not None:
+            if event.answer_id == self.answer_id:
+                for text_widget in self.answer_widgets.values():
+                    self.set_answer_text(text_widget, event.message)
+            return
+        self.info_label.config(text=f"{event.source.capitalize()} failed: {event.message}")
 
+    # Answers
     def handle_transcription_done(self):
+        started = time.perf_counter()
         if self.audio_transcript is None:
             messagebox.showerror("Error", "No transcription available!")
             return
         self.analyzed_text_label.config(text=self.audio_transcript)
+        self.measure_paint("analyze", started)
 
-        # Start threads for quick and full answers
-        self.generate_quick_answer()
-
-        self.generate_full_answer()
-
-    def generate_quick_answer(self):
-        self.quick_chat_gpt_answer.config(state='normal')
-        self.quick_chat_gpt_answer.delete(1.0, tk.END)
-        self.quick_chat_gpt_answer.insert(tk.END, "ChatGPT is working...")
-        self.quick_chat_gpt_answer.config(state='disabled')
+        # Quick and full answers come out of one completion, quick one first
+        self.generate_answers(started)
 
-        quick_answer = generate_answer(self.audio_transcript, short_answer=True, temperature=0.2)
+    def set_answer_text(self, text_widget, text):
+        text_widget.config(state="normal")
+        text_widget.delete(1.0, tk.END)
+        text_widget.insert(tk.END, text)
+        text_widget.config(state="disabled")
 
-        self.quick_chat_gpt_answer.config(state='normal')
-        self.quick_chat_gpt_answer.delete(1.0, tk.END)
-        self.quick_chat_gpt_answer.insert(tk.END, quick_answer)
-        self.quick_chat_gpt_answer.config(state='disabled')
-
-    def generate_full_answer(self):
-        self.full_chat_gpt_answer.config(state='normal')
-        self.full_chat_gpt_answer.delete(1.0, tk.END)
-        self.full_chat_gpt_answer.insert(tk.END, "ChatGPT is working...")
-        self.full_chat_gpt_answer.config(state='disabled')
-
-        quick_answer = generate_answer(self.audio_transcript, short_answer=True, temperature=0.2)
-
-        self.full_chat_gpt_answer.config(state='normal')
-        self.full_chat_gpt_answer.delete(1.0, tk.END)
-        self.full_chat_gpt_answer.insert(tk.END, full_answer)
-        self.full_chat_gpt_answer.config(state='disabled')
+    def on_answer_token(self, event):
+        if event.answer_id != self.answer_id:
+            # A newer analysis replaced this answer
+            return
+        text_widget = self.answer_widgets[event.kind]
+        if event.kind not in self.painted:
+            self.painted.add(event.kind)
+            self.set_answer_text(text_widget, event.text)
+            self.measure_paint(
+                f"analyze_to_{event.kind}_answer",
+                self.answer_started,
+                lambda: self.engine.answer_rendered(event.answer_id, event.kind),
+            )
+        else:
+            text_widget.config(state="normal")
+            text_widget.insert(tk.END, event.text)
+            text_widget.config(state="disabled")
+
+    def on_answer_done(self, event):
+        if event.answer_id == self.answer_id:
+            self.set_answer_text(self.answer_widgets[event.kind], event.text)
+
+    def generate_answers(self, started=None):
+        self.answer_started = started or time.perf_counter()
+        self.painted.clear()
+        self.set_answer_text(self.quick_chat_gpt_answer, "ChatGPT is working...")
+        self.set_answer_text(self.full_chat_gpt_answer, "ChatGPT is working...")
+        # Both answers stream at once; their tokens arrive as engine events
+        self.answer_id = self.engine.answer(self.audio_transcript, temperature=0.2)
 
     def close(self):
-        if self.recording_thread:
-            stop_transcription()
+        for kind, stats in self.paint_stats().items():
+            logger.info(
+                f"Input to paint [{kind}]: {stats['count']} inputs, p50 {stats['p50_ms']:.1f} ms, "
+                f"p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms"
+            )
+        self.engine.close()
+        self.root.destroy()
+
 
 # Main app window creation
-if __name__ == '__main__':
+if __name__ == "__main__":
     root = tk.Tk()
     app = MainWindow(root)
     root.protocol("WM_DELETE_WINDOW", app.close)
@@ -1,21 +1,13 @@
-import numpy as np
 import PySimpleGUI as sg
 from loguru import logger
-import asyncio
 
 from src.constants import APPLICATION_WIDTH, OFF_IMAGE, ON_IMAGE
 
-from src.threads import (
-    start_transcription, 
-    process_audio, 
-    handle_transcription, 
-    stop_transcription,
-    generate_answer
-)
+from src.engine import CallEngine
+from src.events import AnswerDone, AnswerToken, EngineError, RecordingStateChanged, SlotsUpdated, TranscriptReady
+from src.slots import format_slots
 
 
-logger.add("debug.log", level="DEBUG", rotation="3 MB", compression="zip")
-
 def get_text_area(text: str, size: tuple) -> sg.Text:
     """
     Create a text area widget with the given text and size.
@@ -39,105 +31,121 @@ class BtnInfo:
     def __init__(self, state=False):
         self.state = state
 
-with open(ON_IMAGE, 'rb') as f: on_data = f.read()
-with open(OFF_IMAGE, 'rb') as f: off_data = f.read()
-
-# All the stuff inside your window:
-sg.theme("DarkAmber")  # Add a touch of color
-record_status_button = sg.Button(
-    image_data=off_data,
-    k="-TOGGLE1-",
-    border_width=0,
-    button_color=(sg.theme_background_color(), sg.theme_background_color()),
-    disabled_button_color=(sg.theme_background_color(), sg.theme_background_color()),
-    metadata=BtnInfo(),
-)
-
-analyzed_text_label = get_text_area("", size=(APPLICATION_WIDTH, 2))
-quick_chat_gpt_answer = get_text_area("", size=(APPLICATION_WIDTH, 5))
-full_chat_gpt_answer = get_text_area("", size=(APPLICATION_WIDTH, 12))
-
-
-layout = [
-    [sg.Text("Press R to start recording", size=(int(APPLICATION_WIDTH * 0.8), 2)), record_status_button],
-    [sg.Text("Press A to analyze the recording")],
-    [analyzed_text_label],
-    [sg.Text("Short answer:")],
-    [quick_chat_gpt_answer],
-    [sg.Text("Full answer:")],
-    [full_chat_gpt_answer],
-    [sg.Button("Cancel")],
-]
-WINDOW = sg.Window("Avoca AI", layout, return_keyboard_events=True, use_default_focus=False)
-
-audio_transcript = None
-
-while True:
-    event, values = WINDOW.read()
-    print("in while true", event, values)
-    if event in ["Cancel", sg.WIN_CLOSED]:
-        logger.debug("Closing...")
-        break
-
-    if event == "r:27":  # start recording
-        print("event r")
-        record_status_button.metadata.state = not record_status_button.metadata.state
-        if record_status_button.metadata.state:
-            logger.debug("Starting recording...")
-            is_transcribed = False
-            audio_transcript = None
-            assert(start_transcription())
-            # asyncio.run(process_audio())
-            WINDOW.perform_long_operation(process_audio, "-RECORDING-")
-        else:
-            logger.debug("Stopping recording...")
-            audio_transcript = stop_transcription()
-            is_transcribed = True
-        record_status_button.update(image_data=on_data if record_status_button.metadata.state else off_data)
-
-    elif event == "a:38":  # send audio to OpenAI Whisper model
-        logger.debug("Analyzing audio...")
-        analyzed_text_label.update("Start analyzing...")
-        
-        if not is_transcribed or audio_transcript is None:
-            analyzed_text_label.update("Stop recording before analyzing")
-            continue
-
-        analyzed_text_label.update(audio_transcript)
-
-        # Generate quick answer:
-        quick_chat_gpt_answer.update("Chatgpt is working...")
-        WINDOW.perform_long_operation(
-            lambda: generate_answer(audio_transcript, short_answer=True, temperature=0.3),
-            "-CHAT_GPT SHORT ANSWER-",
-        )
-
-        # Generate full answer:
-        full_chat_gpt_answer.update("Chatgpt is working...")
-        WINDOW.perform_long_operation(
-            lambda: generate_answer(audio_transcript, short_answer=False, temperature=0.7),
-            "-CHAT_GPT LONG ANSWER-",
-        )
-
-    elif event == "-WHISPER COMPLETED-":
-        is_transcribed = True
-        audio_transcript = values["-WHISPER COMPLETED-"]
-        analyzed_text_label.update(audio_transcript)
-
-        # Generate quick answer:
-        quick_chat_gpt_answer.update("Chatgpt is working...")
-        WINDOW.perform_long_operation(
-            lambda: generate_answer(audio_transcript, short_answer=True, temperature=0.3),
-            "-CHAT_GPT SHORT ANSWER-",
-        )
-
-        # Generate full answer:
-        full_chat_gpt_answer.update("Chatgpt is working...")
-        WINDOW.perform_long_operation(
-            lambda: generate_answer(audio_transcript, short_answer=False, temperature=0.7),
-            "-CHAT_GPT LONG ANSWER-",
-        )
-    elif event == "-CHAT_GPT SHORT ANSWER-":
-        quick_chat_gpt_answer.update(values["-CHAT_GPT SHORT ANSWER-"])
-    elif event == "-CHAT_GPT LONG ANSWER-":
-        full_chat_gpt_answer.update(values["-CHAT_GPT LONG ANSWER-"])
\ No newline at end of file
+
+def main() -> None:
+    """Builds the window and runs its event loop; nothing is loaded or opened before this is called."""
+    logger.add("debug.log", level="DEBUG", rotation="3 MB", compression="zip")
+
+    engine = CallEngine()
+    # Open Deepgram connections now so the first recording does not wait for a handshake
+    engine.prewarm()
+
+    with open(ON_IMAGE, "rb") as f:
+        on_data = f.read()
+    with open(OFF_IMAGE, "rb") as f:
+        off_data = f.read()
+
+    # All the stuff inside your window:
+    sg.theme("DarkAmber")  # Add a touch of color
+    record_status_button = sg.Button(
+        image_data=off_data,
+        k="-TOGGLE1-",
+        border_width=0,
+        button_color=(sg.theme_background_color(), sg.theme_background_color()),
+        disabled_button_color=(sg.theme_background_color(), sg.theme_background_color()),
+        metadata=BtnInfo(),
+    )
+
+    analyzed_text_label = get_text_area("", size=(APPLICATION_WIDTH, 2))
+    caller_details_label = get_text_area("", size=(APPLICATION_WIDTH, 6))
+    quick_chat_gpt_answer = get_text_area("", size=(APPLICATION_WIDTH, 5))
+    full_chat_gpt_answer = get_text_area("", size=(APPLICATION_WIDTH, 12))
+
+    layout = [
+        [sg.Text("Press R to start recording", size=(int(APPLICATION_WIDTH * 0.8), 2)), record_status_button],
+        [sg.Text("Press A to analyze the recording")],
+        [analyzed_text_label],
+        [sg.Text("Caller details:")],
+        [caller_details_label],
+        [sg.Text("Short answer:")],
+        [quick_chat_gpt_answer],
+        [sg.Text("Full answer:")],
+        [full_chat_gpt_answer],
+        [sg.Button("Cancel")],
+    ]
+    window = sg.Window("Avoca AI", layout, return_keyboard_events=True, use_default_focus=False)
+
+    audio_transcript = None
+    answer_id = None
+    answer_texts = {}
+
+    # Engine events come from worker threads; write_event_value hands them to this loop
+    for event_type in (TranscriptReady, RecordingStateChanged, SlotsUpdated, AnswerToken, AnswerDone, EngineError):
+        engine.bus.subscribe(event_type, lambda event: window.write_event_value("-ENGINE-", event))
+
+    def show_answer(key: str, text: str) -> None:
+        (quick_chat_gpt_answer if key == "short" else full_chat_gpt_answer).update(text)
+
+    while True:
+        event, values = window.read()
+        if event in ["Cancel", sg.WIN_CLOSED]:
+            logger.debug("Closing...")
+            engine.close()
+            break
+
+        if event == "r:27":  # start recording
+            record_status_button.metadata.state = not record_status_button.metadata.state
+            if record_status_button.metadata.state:
+                logger.debug("Starting recording...")
+                audio_transcript = None
+                engine.start_recording()
+            else:
+                logger.debug("Stopping recording...")
+                analyzed_text_label.update("Finishing transcription...")
+                engine.stop_recording()
+            record_status_button.update(image_data=on_data if record_status_button.metadata.state else off_data)
+
+        elif event == "a:38":  # send the transcript to the LLM
+            logger.debug("Analyzing audio...")
+            if engine.is_recording or audio_transcript is None:
+                analyzed_text_label.update("Stop recording before analyzing")
+                continue
+
+            analyzed_text_label.update(audio_transcript)
+
+            # Quick and full answers come out of one completion, quick one first
+            quick_chat_gpt_answer.update("Chatgpt is working...")
+            full_chat_gpt_answer.update("Chatgpt is working...")
+            answer_texts = {"short": "", "full": ""}
+            answer_id = engine.answer(audio_transcript, temperature=0.3)
+
+        elif event == "-ENGINE-":
+            engine_event = values["-ENGINE-"]
+            if isinstance(engine_event, TranscriptReady):
+                audio_transcript = engine_event.text
+                analyzed_text_label.update(audio_transcript)
+            elif isinstance(engine_event, RecordingStateChanged) and not engine_event.recording:
+                if not engine.is_recording:
+                    record_status_button.metadata.state = False
+                    record_status_button.update(image_data=off_data)
+            elif isinstance(engine_event, SlotsUpdated):
+                caller_details_label.update(format_slots(engine_event.slots))
+            elif isinstance(engine_event, (AnswerToken, AnswerDone)) and engine_event.answer_id == answer_id:
+                first_tokens = not answer_texts[engine_event.kind]
+                if isinstance(engine_event, AnswerToken):
+                    answer_texts[engine_event.kind] += engine_event.text
+                else:
+                    answer_texts[engine_event.kind] = engine_event.text
+                show_answer(engine_event.kind, answer_texts[engine_event.kind])
+                if first_tokens:
+                    engine.answer_rendered(answer_id, engine_event.kind)
+            elif isinstance(engine_event, EngineError):
+                if engine_event.answer_id is None:
+                    analyzed_text_label.update(f"{engine_event.source.capitalize()} failed: {engine_event.message}")
+                elif engine_event.answer_id == answer_id:
+                    show_answer("short", engine_event.message)
+                    show_answer("full", engine_event.message)
+
+
+if __name__ == "__main__":
+    main()
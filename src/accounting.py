@@ -0,0 +1,226 @@
+"""
+Token, latency and cost accounting of LLM calls, per session and per answer mode.
+
+Pre-request token counts use tiktoken when it is installed (the optional `tokens` extra);
+otherwise they are the four-characters-per-token heuristic of `history.estimate_tokens`.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from .constants import USAGE_LOG_EVERY_SEC
+from .history import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to the 4-characters-per-token estimate
+    tiktoken = None
+
+# Whether count_tokens is exact or the heuristic, for reports
+TOKENIZER = "tiktoken" if tiktoken is not None else "chars/4"
+
+# USD per million tokens: (prompt, cached prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+}
+# Chat formatting overhead of the OpenAI chat format, per message and per request
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REQUEST = 3
+
+_encodings = {}
+
+
+def _encoding(model: str):
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Tokens of `text` for `model`: exact with tiktoken installed, estimated otherwise."""
+    if tiktoken is None:
+        return estimate_tokens(text)
+    return len(_encoding(model).encode(text))
+
+
+def count_message_tokens(messages: list, model: str = "gpt-4o-mini") -> int:
+    """Prompt tokens a chat request with `messages` will be billed for, before sending it."""
+    return TOKENS_PER_REQUEST + sum(
+        TOKENS_PER_MESSAGE + count_tokens(message["content"], model) for message in messages
+    )
+
+
+def model_price(model: str) -> Optional[tuple]:
+    """Prices of `model`, also for dated snapshots like "gpt-4o-mini-2024-07-18"; None if unknown."""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES[name]
+    return None
+
+
+def call_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one call, 0.0 for models without a price."""
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    prompt, cached, completion = price
+    return ((prompt_tokens - cached_tokens) * prompt + cached_tokens * cached + completion_tokens * completion) / 1e6
+
+
+class CallRecord:
+    """What one LLM call cost: tokens estimated before it, usage reported after it, and its timing."""
+
+    def __init__(
+        self,
+        mode: str,
+        model: str,
+        estimated_prompt_tokens: int,
+        prompt_tokens: Optional[int] = None,
+        cached_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_sec: float = 0.0,
+        first_token_sec: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self.mode = mode
+        self.model = model
+        self.estimated_prompt_tokens = estimated_prompt_tokens
+        # None when the call failed or the provider sent no usage; the estimate stands in for it
+        self.prompt_tokens = prompt_tokens
+        self.cached_tokens = cached_tokens
+        self.completion_tokens = completion_tokens
+        self.latency_sec = latency_sec
+        self.first_token_sec = first_token_sec
+        self.error = error
+        self.cost_usd = call_cost(model, self.billed_prompt_tokens, cached_tokens, completion_tokens)
+        self.time = time.time()
+
+    @property
+    def billed_prompt_tokens(self) -> int:
+        return self.prompt_tokens if self.prompt_tokens is not None else self.estimated_prompt_tokens
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _quantile(values: List[float], quantile: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(quantile * len(values)), len(values) - 1)]
+
+
+class UsageLedger:
+    """
+    Thread-safe running totals of LLM calls, by answer mode.
+
+    A ledger can forward every record to a `parent`, so each session keeps its own figures
+    while the process-wide `usage_ledger` sees all of them. A ledger with `log_every_sec`
+    logs its summary at most that often, piggybacking on the calls it records.
+
+    Example:
+        ```python
+        ledger = UsageLedger(parent=usage_ledger)
+        estimate = count_message_tokens(messages, model)
+        ...  # the call
+        ledger.record(CallRecord("short", model, estimate, usage["prompt_tokens"], ...))
+        ledger.summary()["short"]["cost_usd"]
+        ```
+    """
+
+    def __init__(
+        self,
+        name: str = "process",
+        parent: Optional["UsageLedger"] = None,
+        log_every_sec: Optional[float] = None,
+        keep_records: int = 1000,
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.log_every_sec = log_every_sec
+        # Most recent calls, for latency quantiles and ad-hoc inspection
+        self.records = deque(maxlen=keep_records)
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+        self._last_log = time.monotonic()
+
+    def record(self, call: CallRecord) -> None:
+        with self._lock:
+            self.records.append(call)
+            totals = self._totals[call.mode]
+            totals["calls"] += 1
+            totals["errors"] += call.error is not None
+            totals["estimated_prompt_tokens"] += call.estimated_prompt_tokens
+            totals["prompt_tokens"] += call.billed_prompt_tokens
+            totals["cached_tokens"] += call.cached_tokens
+            totals["completion_tokens"] += call.completion_tokens
+            totals["cost_usd"] += call.cost_usd
+            totals["total_latency_sec"] += call.latency_sec
+            due = self.log_every_sec is not None and time.monotonic() - self._last_log >= self.log_every_sec
+            if due:
+                self._last_log = time.monotonic()
+        if due:
+            self.log_summary()
+        if self.parent is not None:
+            self.parent.record(call)
+
+    def summary(self) -> Dict[str, dict]:
+        """Totals and latency quantiles per mode, plus an "all" entry across modes."""
+        with self._lock:
+            records = list(self.records)
+            totals = {mode: dict(values) for mode, values in self._totals.items()}
+        if totals:
+            totals["all"] = {
+                key: sum(values.get(key, 0.0) for values in totals.values())
+                for key in {key for values in totals.values() for key in values}
+            }
+        for mode, values in totals.items():
+            calls = [record for record in records if mode in ("all", record.mode)]
+            latencies = [record.latency_sec for record in calls]
+            first_tokens = [record.first_token_sec for record in calls if record.first_token_sec is not None]
+            estimated = sum(record.estimated_prompt_tokens for record in calls if record.prompt_tokens)
+            reported = sum(record.prompt_tokens for record in calls if record.prompt_tokens)
+            values.update(
+                {
+                    "calls": int(values["calls"]),
+                    "errors": int(values["errors"]),
+                    "mean_prompt_tokens": values["prompt_tokens"] / values["calls"],
+                    "mean_completion_tokens": values["completion_tokens"] / values["calls"],
+                    "cached_fraction": values["cached_tokens"] / max(values["prompt_tokens"], 1),
+                    # How far the pre-request estimate is off the reported usage, e.g. 0.05 for 5% high
+                    "estimate_error": estimated / reported - 1 if reported else None,
+                    "estimate_tokenizer": TOKENIZER,
+                    "latency_p50_sec": _quantile(latencies, 0.5),
+                    "latency_p95_sec": _quantile(latencies, 0.95),
+                    "first_token_p50_sec": _quantile(first_tokens, 0.5),
+                    "models": sorted({record.model for record in calls}),
+                }
+            )
+        return totals
+
+    def log_summary(self) -> None:
+        for mode, values in sorted(self.summary().items()):
+            logger.info(
+                f"LLM usage [{self.name}/{mode}]: {values['calls']} calls, {values['errors']} errors, "
+                f"{values['prompt_tokens']:.0f} prompt ({values['cached_fraction']:.0%} cached) + "
+                f"{values['completion_tokens']:.0f} completion tokens, ${values['cost_usd']:.4f}, "
+                f"p50 {values['latency_p50_sec'] or 0.0:.2f} s, p95 {values['latency_p95_sec'] or 0.0:.2f} s"
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self._totals.clear()
+
+
+# Every call of the process; session ledgers forward to it
+usage_ledger = UsageLedger(log_every_sec=USAGE_LOG_EVERY_SEC)
@@ -1,12 +1,121 @@
 """Audio utilities."""
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
 import numpy as np
-import soundcard as sc
 import soundfile as sf
 from loguru import logger
 
 from src.constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE
+from src.constants import RECORDING_FLUSH_SEC, RECORDING_MAX_BYTES, RECORDING_MAX_SEC
+
+# libsndfile command that rewrites the header to match the frames written so far
+SFC_UPDATE_HEADER_NOW = 0x1060
+SAMPLE_BYTES = {"PCM_16": 2, "PCM_24": 3, "PCM_32": 4, "FLOAT": 4, "DOUBLE": 8}
+
+_speaker_id = None
+_device_lock = threading.Lock()
+
+
+def default_speaker_id() -> str:
+    """Name of the default speaker, looked up once, when audio is first captured."""
+    global _speaker_id
+
+    with _device_lock:
+        if _speaker_id is None:
+            # soundcard connects to the sound server on import; machines without audio devices never get here
+            import soundcard as sc
+
+            _speaker_id = str(sc.default_speaker().name)
+    return _speaker_id
+
+
+def loopback_microphone(speaker_id: Optional[str] = None):
+    """
+    The loopback microphone recording what `speaker_id` plays.
+
+    Args:
+        speaker_id (Optional[str]): Speaker name. Defaults to the default speaker.
+
+    Returns:
+        soundcard microphone: Use its `recorder(samplerate=...)` context manager to capture.
+    """
+    import soundcard as sc
+
+    return sc.get_microphone(id=speaker_id or default_speaker_id(), include_loopback=True)
 
-SPEAKER_ID = str(sc.default_speaker().name)
+
+class FileMicrophone:
+    """
+    Plays an audio file through the same interface as a soundcard microphone, e.g. to replay a call.
+
+    Its recorder returns the file's frames as float32 (frames, channels), resampled to the
+    requested rate if the file has another one. At `speed` 1.0 a `record` call blocks until
+    its frames would have arrived from a device; 2.0 plays twice as fast and 0 does not wait.
+    Past the end of the file it returns silence and sets `finished`.
+
+    Example:
+        ```python
+        microphone = FileMicrophone("calls/call_000.wav", speed=4.0)
+        session = TranscriptionSession(microphone=microphone)
+        session.start_transcription()
+        threading.Thread(target=session.process_audio).start()
+        microphone.finished.wait()
+        transcript = session.stop_transcription()
+        ```
+    """
+
+    def __init__(self, path: str, speed: float = 1.0) -> None:
+        self.path = Path(path)
+        self.name = self.path.name
+        self.speed = speed
+        self.finished = threading.Event()
+        self.duration_sec = sf.info(str(self.path)).duration
+
+    def recorder(self, samplerate: int, **kwargs) -> "_FileRecorder":
+        return _FileRecorder(self, samplerate)
+
+
+class _FileRecorder:
+    def __init__(self, microphone: FileMicrophone, samplerate: int) -> None:
+        self.microphone = microphone
+        self.samplerate = samplerate
+        self.audio = None
+        self.position = 0
+        self.started_at = None
+
+    def __enter__(self) -> "_FileRecorder":
+        audio, file_rate = sf.read(str(self.microphone.path), dtype="float32", always_2d=True)
+        if file_rate != self.samplerate:
+            # Linear interpolation; fine for replaying speech into the capture pipeline
+            source = np.arange(len(audio)) / file_rate
+            target = np.arange(int(len(audio) * self.samplerate / file_rate)) / self.samplerate
+            audio = np.stack([np.interp(target, source, channel) for channel in audio.T], axis=1).astype(np.float32)
+        self.audio = audio
+        self.position = 0
+        self.microphone.finished.clear()
+        self.started_at = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.audio = None
+
+    def record(self, numframes: int) -> np.ndarray:
+        chunk = self.audio[self.position : self.position + numframes]
+        if len(chunk) < numframes:
+            chunk = np.concatenate([chunk, np.zeros((numframes - len(chunk), self.audio.shape[1]), np.float32)])
+        self.position += numframes
+        if self.microphone.speed > 0:
+            # A device hands out a chunk once its last frame has been played
+            due = self.started_at + self.position / self.samplerate / self.microphone.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        if self.position >= len(self.audio):
+            self.microphone.finished.set()
+        return chunk
 
 
 def record_batch(record_sec: int = RECORD_SEC) -> np.ndarray:
@@ -26,10 +135,7 @@ def record_batch(record_sec: int = RECORD_SEC) -> np.ndarray:
         ```
     """
     logger.debug("Recording for {record_sec} second(s)...")
-    with sc.get_microphone(
-        id=SPEAKER_ID,
-        include_loopback=True,
-    ).recorder(samplerate=SAMPLE_RATE) as mic:
+    with loopback_microphone().recorder(samplerate=SAMPLE_RATE) as mic:
         audio_sample = mic.record(numframes=SAMPLE_RATE * record_sec)
     return audio_sample
 
@@ -53,3 +159,125 @@ def save_audio_file(audio_data: np.ndarray, output_file_name: str = OUTPUT_FILE_
     """
     logger.debug(f"Saving audio file to {output_file_name}...")
     sf.write(file=output_file_name, data=audio_data, samplerate=SAMPLE_RATE)
+
+
+class CallRecorder:
+    """
+    Streams a call to disk chunk by chunk with constant memory.
+
+    Chunks are appended to a `soundfile.SoundFile` as they arrive. Every `flush_sec` seconds
+    of audio the file is flushed and its header rewritten, so a crash loses at most that much.
+    A new file is started whenever the current one reaches `max_sec` seconds or `max_bytes`
+    bytes; files are named `<stem>_000<suffix>`, `<stem>_001<suffix>`, ...
+
+    Example:
+        ```python
+        with CallRecorder("calls/call.wav", samplerate=16000) as recorder:
+            recorder.write(chunk)
+        print(recorder.paths)
+        ```
+    """
+
+    def __init__(
+        self,
+        output_file_name: str = OUTPUT_FILE_NAME,
+        samplerate: int = SAMPLE_RATE,
+        channels: int = 1,
+        flush_sec: float = RECORDING_FLUSH_SEC,
+        max_sec: Optional[float] = RECORDING_MAX_SEC,
+        max_bytes: Optional[int] = RECORDING_MAX_BYTES,
+    ) -> None:
+        self.output_file_name = Path(output_file_name)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.flush_frames = int(flush_sec * samplerate)
+        self.max_frames = int(max_sec * samplerate) if max_sec else None
+        self.max_bytes = max_bytes
+        self.paths = []
+
+        self._file = None
+        self._bytes_per_frame = 0
+        self._frames_in_file = 0
+        self._frames_since_flush = 0
+
+    def _open_next(self) -> None:
+        self.close()
+        path = self.output_file_name.with_name(
+            f"{self.output_file_name.stem}_{len(self.paths):03d}{self.output_file_name.suffix}"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger.debug(f"Recording call to {path}...")
+        self._file = sf.SoundFile(path, "w", samplerate=self.samplerate, channels=self.channels)
+        self.paths.append(path)
+        self._bytes_per_frame = self.channels * SAMPLE_BYTES.get(self._file.subtype, 2)
+        self._frames_in_file = 0
+        self._frames_since_flush = 0
+
+    def _needs_rotation(self) -> bool:
+        if self.max_frames is not None and self._frames_in_file >= self.max_frames:
+            return True
+        return self.max_bytes is not None and self._frames_in_file * self._bytes_per_frame >= self.max_bytes
+
+    def write(self, audio_chunk: np.ndarray) -> None:
+        """
+        Appends one chunk, flushing and rotating files as needed.
+
+        Args:
+            audio_chunk (np.ndarray): Samples shaped (frames,) or (frames, channels).
+        """
+        if self._file is None or self._needs_rotation():
+            self._open_next()
+        self._file.write(audio_chunk)
+        self._frames_in_file += len(audio_chunk)
+        self._frames_since_flush += len(audio_chunk)
+        if self._frames_since_flush >= self.flush_frames:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pushes buffered audio to disk and makes the file header match it."""
+        if self._file is None:
+            return
+        self._file.flush()
+        sf._snd.sf_command(self._file._file, SFC_UPDATE_HEADER_NOW, sf._ffi.NULL, 0)
+        self._frames_since_flush = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "CallRecorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def record_to_file(record_sec: int = RECORD_SEC, output_file_name: str = OUTPUT_FILE_NAME) -> list:
+    """
+    Records for a specified duration straight to disk in 0.1 second chunks.
+
+    Unlike `record_batch` followed by `save_audio_file`, memory use does not grow with
+    `record_sec` and audio recorded before a crash stays on disk.
+
+    Args:
+        record_sec (int): The duration of the recording in seconds. Defaults to the value of RECORD_SEC.
+        output_file_name (str): The base name of the output file(s). Defaults to the value of OUTPUT_FILE_NAME.
+
+    Returns:
+        list: Paths of the files written.
+
+    Example:
+        ```python
+        paths = record_to_file(60, "call.wav")
+        ```
+    """
+    logger.debug(f"Recording for {record_sec} second(s)...")
+    chunk_frames = SAMPLE_RATE // 10
+    with loopback_microphone().recorder(samplerate=SAMPLE_RATE) as mic:
+        first_chunk = mic.record(numframes=chunk_frames)
+        with CallRecorder(output_file_name, channels=first_chunk.shape[1]) as recorder:
+            recorder.write(first_chunk)
+            for _ in range(record_sec * 10 - 1):
+                recorder.write(mic.record(numframes=chunk_frames))
+    return recorder.paths
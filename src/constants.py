@@ -3,8 +3,61 @@ OPENAI_API_KEY = ""
 OUTPUT_FILE_NAME = "out.wav"  # audio file name.
 
 SAMPLE_RATE = 48000  # [Hz]. sampling rate.
+TARGET_SAMPLE_RATE = 16000  # [Hz]. mono rate streamed to Deepgram, must divide SAMPLE_RATE.
 RECORD_SEC = 4  # [sec]. duration recording audio.
+KEEPALIVE_EVERY_SILENT_CHUNKS = 30  # send a KeepAlive after this many 0.1 s chunks of gated silence.
+SEND_QUEUE_CHUNKS = 50  # capacity of the capture -> Deepgram send queue, in 0.1 s chunks.
+SEND_QUEUE_POLICY = "coalesce"  # overflow policy of the send queue: "block", "drop-oldest" or "coalesce".
+UPSTREAM_ENCODING = "linear16"  # audio sent to Deepgram: "linear16", "flac" or "opus" (Ogg).
+FINALIZE_TIMEOUT_SEC = 3.0  # [sec]. max wait for Deepgram's from_finalize result when stopping.
+DEEPGRAM_POOL_SIZE = 2  # pre-opened Deepgram connections kept ready for the next recording.
+DEEPGRAM_POOL_MAX_IDLE_SEC = 60.0  # [sec]. replace pooled connections idle for longer than this.
+
+SPECULATIVE_ANSWERS = False  # draft the quick answer from interim transcripts while the caller speaks.
+SPECULATION_MIN_WORDS = 4  # stable words needed before the first draft starts.
+SPECULATION_MAX_DIVERGENCE = 0.2  # word-level distance at which a draft is restarted or discarded.
+SPECULATION_TEMPERATURE = 0.2  # temperature of drafted quick answers.
+
+LLM_MODEL = "gpt-4o-mini"  # chat model answering the caller; its price is in src/accounting.py.
+LLM_MAX_CONCURRENCY = 8  # chat completion requests in flight at once, hedges included.
+LLM_TIMEOUT_SEC = 20.0  # [sec]. deadline of one answer request across all its attempts.
+LLM_MAX_RETRIES = 2  # retries after connection errors, timeouts, 429 and 5xx responses.
+LLM_RETRY_BACKOFF_SEC = 0.25  # [sec]. base of the jittered exponential retry backoff.
+LLM_HEDGE = False  # send a duplicate request when the first is slower than LLM_HEDGE_QUANTILE of recent ones.
+LLM_HEDGE_QUANTILE = 0.95  # latency quantile after which a request is hedged.
+
+USAGE_LOG_EVERY_SEC = 300.0  # [sec]. interval of the process-wide LLM token/cost summary in the log.
+TRACING = True  # record per-turn stage spans (connect, finalize, first token, ...), see src/tracing.py.
+TRACE_BUFFER_TURNS = 200  # turns kept by each tracer for its p50/p95/p99 summary and trace export.
+
+FAQ_FAST_PATH = True  # answer confidently matched FAQ questions locally, without an LLM call.
+FAQ_MIN_SCORE = 0.6  # BM25 score of the best phrasing relative to its self-match, 0..1.
+FAQ_MIN_COVERAGE = 1.0  # share of the transcript's content words the FAQ entry must cover; 1.0 refuses extra intent.
+FAQ_MIN_TERMS = 2  # content words the transcript must share with the best phrasing to need only FAQ_MIN_SCORE.
+FAQ_SINGLE_TERM_MIN_SCORE = 0.9  # score required below FAQ_MIN_TERMS, e.g. "what time is it?" against the hours.
+
+SCRIPT_FILE = "./knowledge/avoca.md"  # call script: persona, sections and FAQ, see src/knowledge.py.
+KNOWLEDGE_TOP_K = 4  # script sections and FAQ entries retrieved into each prompt.
+
+HISTORY_MAX_TOKENS = 600  # token budget of the conversation history in the prompt.
+HISTORY_KEEP_RECENT = 2  # turns always kept verbatim; older ones are folded into a summary.
+HISTORY_SUMMARY_TOKENS = 200  # part of the history budget reserved for the running summary.
+
+SLOT_FILLING = True  # extract caller details locally and send them as known facts instead of older turns.
+SLOTS_HISTORY_MAX_TOKENS = 300  # history budget while known facts carry the caller details.
+SLOTS_HISTORY_SUMMARY_TOKENS = 80  # part of that budget reserved for the running summary.
+
+RECORD_CALLS = False  # stream every call to disk next to OUTPUT_FILE_NAME.
+RECORDING_FLUSH_SEC = 5.0  # [sec]. flush interval of streamed recordings, bounds what a crash loses.
+RECORDING_MAX_SEC = 3600  # [sec]. start a new recording file after this much audio.
+RECORDING_MAX_BYTES = 512 * 1024 * 1024  # start a new recording file after this many bytes.
+
+SERVER_HOST = "127.0.0.1"  # headless server bind address.
+SERVER_PORT = 8765  # headless server port.
+ENGINE_WORKERS = 4  # desktop engine worker threads: capture, stop/finalize and the two answer streams.
+IO_WORKERS_PER_CORE = 8  # blocking Deepgram/LLM worker threads per core in the headless server.
 
 APPLICATION_WIDTH = 100
+UI_POLL_MS = 16  # [ms]. how often the Tk window applies results posted by worker threads.
 OFF_IMAGE = "./static/off.png"
-ON_IMAGE = "./static/on.png"
\ No newline at end of file
+ON_IMAGE = "./static/on.png"
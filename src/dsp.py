@@ -0,0 +1,254 @@
+"""Signal-processing stages used by the capture loop."""
+from collections import deque
+
+import numpy as np
+
+INT16_SCALE = 32767
+
+
+class PCM16Converter:
+    """
+    Converts float recorder chunks to int16 PCM using preallocated buffers.
+
+    The float scratch buffer and the int16 output buffer are reused for every chunk, so the
+    steady-state capture loop does not allocate. The returned memoryview aliases the output
+    buffer and is only valid until the next call to `convert`.
+
+    This trades CPU time for allocations. `np.int16(chunk * 32767)` neither clips nor keeps its
+    buffers: it allocates about 56 KB per 100 ms stereo chunk at 48 kHz and takes 5-7 us.
+    The converter allocates nothing but takes 14-15 us, about 9 of them in the clip. Without the
+    clip, a resampled sample overshooting 1.0 would wrap around to a full-scale click.
+    benchmarks/bench_capture.py measures both.
+
+    Example:
+        ```python
+        converter = PCM16Converter()
+        audio_bytes = converter.convert(recorder.record(numframes=SAMPLE_RATE // 10))
+        dg_connection.send(audio_bytes)
+        ```
+    """
+
+    def __init__(self) -> None:
+        self._float_buf = np.empty(0, dtype=np.float32)
+        self._int16_buf = np.empty(0, dtype=np.int16)
+
+    def _ensure_buffers(self, shape: tuple) -> None:
+        if self._float_buf.shape != shape:
+            self._float_buf = np.empty(shape, dtype=np.float32)
+            self._int16_buf = np.empty(shape, dtype=np.int16)
+
+    def convert_array(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """
+        Scales, clips and casts a float chunk into the reusable int16 buffer.
+
+        Args:
+            audio_chunk (np.ndarray): Float samples in [-1.0, 1.0] as returned by the recorder.
+
+        Returns:
+            np.ndarray: The int16 buffer holding the converted samples.
+        """
+        self._ensure_buffers(audio_chunk.shape)
+        np.multiply(audio_chunk, INT16_SCALE, out=self._float_buf, casting="unsafe")
+        np.clip(self._float_buf, -INT16_SCALE - 1, INT16_SCALE, out=self._float_buf)
+        np.copyto(self._int16_buf, self._float_buf, casting="unsafe")
+        return self._int16_buf
+
+    def convert(self, audio_chunk: np.ndarray) -> memoryview:
+        """
+        Converts a float chunk to int16 PCM and returns a zero-copy view of the bytes.
+
+        Args:
+            audio_chunk (np.ndarray): Float samples in [-1.0, 1.0] as returned by the recorder.
+
+        Returns:
+            memoryview: A byte view of the int16 buffer, valid until the next call.
+        """
+        return memoryview(self.convert_array(audio_chunk)).cast("B")
+
+
+class Resampler:
+    """
+    Downmixes recorder chunks to mono and decimates them to a lower sample rate.
+
+    Uses a windowed-sinc low-pass FIR evaluated only at the retained output samples. Filter
+    history and decimation phase carry over between chunks, so consecutive calls produce the
+    same signal as resampling the whole stream at once.
+
+    Example:
+        ```python
+        resampler = Resampler(SAMPLE_RATE, TARGET_SAMPLE_RATE)
+        mono_16k = resampler.process(recorder.record(numframes=SAMPLE_RATE // 10))
+        ```
+    """
+
+    def __init__(self, source_rate: int, target_rate: int, taps_per_phase: int = 16) -> None:
+        if target_rate <= 0 or source_rate % target_rate:
+            raise ValueError(f"Can't resample {source_rate} Hz to {target_rate} Hz: not an integer factor")
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.factor = source_rate // target_rate
+
+        num_taps = taps_per_phase * self.factor + 1
+        cutoff = 0.5 / self.factor
+        n = np.arange(num_taps) - (num_taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+        # Reversed so the filter can be applied as a dot product over forward windows
+        self._kernel = (kernel / kernel.sum())[::-1].astype(np.float32)
+
+        self._history_len = num_taps - 1
+        self._buf = np.zeros(self._history_len, dtype=np.float32)
+        self._phase = 0
+
+    def _downmix(self, audio_chunk: np.ndarray) -> np.ndarray:
+        if audio_chunk.ndim == 1:
+            return audio_chunk
+        if audio_chunk.shape[1] == 1:
+            return audio_chunk[:, 0]
+        return audio_chunk.mean(axis=1, dtype=np.float32)
+
+    @staticmethod
+    def _downmix_into(audio_chunk: np.ndarray, out: np.ndarray) -> None:
+        # Channel by channel into the filter buffer: `mean(axis=1)` allocates about 100 KB of
+        # temporaries per 100 ms stereo chunk at 48 kHz, this allocates nothing and is faster
+        if audio_chunk.ndim == 1:
+            out[:] = audio_chunk
+            return
+        out[:] = audio_chunk[:, 0]
+        for channel in range(1, audio_chunk.shape[1]):
+            out += audio_chunk[:, channel]
+        if audio_chunk.shape[1] > 1:
+            out *= np.float32(1 / audio_chunk.shape[1])
+
+    def process(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """
+        Resamples one chunk.
+
+        Args:
+            audio_chunk (np.ndarray): Float samples shaped (frames,) or (frames, channels).
+
+        Returns:
+            np.ndarray: Mono float32 samples at the target rate.
+        """
+        if self.factor == 1:
+            return self._downmix(audio_chunk)
+
+        frames = len(audio_chunk)
+        needed = self._history_len + frames
+        if len(self._buf) != needed:
+            # The previous call left its history at the front of the buffer
+            history = self._buf[: self._history_len].copy()
+            self._buf = np.empty(needed, dtype=np.float32)
+            self._buf[: self._history_len] = history
+        self._downmix_into(audio_chunk, self._buf[self._history_len :])
+
+        windows = np.lib.stride_tricks.sliding_window_view(self._buf, len(self._kernel))[self._phase :: self.factor]
+        resampled = windows @ self._kernel
+
+        next_start = self._phase + len(windows) * self.factor
+        self._phase = next_start - frames
+        self._buf[: self._history_len] = self._buf[frames:]
+        return resampled
+
+
+class VoiceActivityGate:
+    """
+    Energy and zero-crossing voice activity detector that holds back silent frames.
+
+    A frame counts as speech when its RMS level is `margin_db` above a running noise floor and
+    above `min_level_db`. The floor drops to any quieter frame at once and creeps up by
+    `noise_adapt` of the difference otherwise. Frames that only just clear the threshold but cross zero very often
+    are treated as broadband noise. After speech, `hangover_frames` more frames are passed so
+    word endings are kept; while silent, the last `preroll_frames` frames are buffered and
+    released ahead of the next speech frame so onsets are not clipped.
+
+    Example:
+        ```python
+        gate = VoiceActivityGate()
+        for frame in gate.process(mono_chunk):
+            dg_connection.send(converter.convert(frame))
+        print(gate.frames_sent, gate.frames_suppressed)
+        ```
+    """
+
+    def __init__(
+        self,
+        margin_db: float = 9.0,
+        min_level_db: float = -55.0,
+        noise_zcr: float = 0.35,
+        preroll_frames: int = 3,
+        hangover_frames: int = 5,
+        noise_adapt: float = 0.01,
+    ) -> None:
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.noise_zcr = noise_zcr
+        self.hangover_frames = hangover_frames
+        self.noise_adapt = noise_adapt
+
+        self.noise_floor_db = None
+        self.level_db = None  # RMS level of the last frame, for level meters
+        self.frames_sent = 0
+        self.frames_suppressed = 0
+        self.is_speech = False
+
+        self._preroll = deque(maxlen=preroll_frames)
+        self._hangover = 0
+
+    def is_voiced(self, frame: np.ndarray) -> bool:
+        """
+        Classifies a single mono frame as speech or silence and updates the noise floor.
+
+        Args:
+            frame (np.ndarray): Mono float samples.
+
+        Returns:
+            bool: True if the frame looks like speech.
+        """
+        if len(frame) == 0:
+            return False
+        level_db = 10 * np.log10(np.dot(frame, frame) / len(frame) + 1e-12)
+        self.level_db = level_db
+        zcr = np.count_nonzero(np.signbit(frame[1:]) != np.signbit(frame[:-1])) / len(frame)
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level_db
+        threshold_db = max(self.noise_floor_db + self.margin_db, self.min_level_db)
+        voiced = level_db > threshold_db
+        if voiced and zcr > self.noise_zcr and level_db < threshold_db + self.margin_db:
+            voiced = False
+
+        # Follow the floor down immediately and up slowly, so it tracks the quietest recent frames
+        if level_db < self.noise_floor_db:
+            self.noise_floor_db = level_db
+        else:
+            self.noise_floor_db += self.noise_adapt * (level_db - self.noise_floor_db)
+        return voiced
+
+    def process(self, frame: np.ndarray) -> list:
+        """
+        Gates one frame.
+
+        Args:
+            frame (np.ndarray): Mono float samples.
+
+        Returns:
+            list: Frames to send now, oldest first. Empty while the gate is closed.
+        """
+        if self.is_voiced(frame):
+            self._hangover = self.hangover_frames
+        elif self._hangover > 0:
+            self._hangover -= 1
+        else:
+            self.is_speech = False
+            self._preroll.append(frame.copy())
+            self.frames_suppressed += 1
+            return []
+
+        self.is_speech = True
+        frames = list(self._preroll)
+        frames.append(frame)
+        # Pre-roll frames were counted as suppressed when they were held back
+        self.frames_suppressed -= len(self._preroll)
+        self.frames_sent += len(frames)
+        self._preroll.clear()
+        return frames
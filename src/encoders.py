@@ -0,0 +1,121 @@
+"""Upstream audio encoders for the Deepgram live stream."""
+import numpy as np
+import soundfile as sf
+
+UPSTREAM_ENCODINGS = ("linear16", "flac", "opus")
+
+# libsndfile command that caps how much audio an Ogg page may hold before it is written out.
+# The default (1 s) would add up to a second of latency to the live stream.
+SFC_SET_OGG_PAGE_LATENCY_MS = 0x1302
+
+
+class _StreamSink:
+    """
+    Write-only file object that collects whatever libsndfile emits.
+
+    Streamed bytes can't be taken back, so writes behind the high-water mark (libsndfile
+    patching headers on close) are discarded. Decoders read such streams fine; only the total
+    length in the header stays unset.
+    """
+
+    def __init__(self) -> None:
+        self._pending = bytearray()
+        self._pos = 0
+        self._end = 0
+
+    def write(self, data) -> int:
+        if self._pos >= self._end:
+            self._pending += data
+        self._pos += len(data)
+        self._end = max(self._end, self._pos)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 0:
+            self._pos = offset
+        elif whence == 1:
+            self._pos += offset
+        else:
+            self._pos = self._end + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def drain(self) -> bytes:
+        data = bytes(self._pending)
+        self._pending.clear()
+        return data
+
+
+class StreamEncoder:
+    """
+    Packs int16 PCM frames into one continuous linear16, FLAC or Ogg/Opus stream.
+
+    Compressed output comes out in codec-sized blocks, so `encode` may return b"" for some
+    frames and more than one frame's worth later. Concatenating everything `encode` and
+    `close` return gives a valid stream, which is why a compressed stream must never be
+    sent through a queue that drops chunks.
+
+    Example:
+        ```python
+        encoder = StreamEncoder("opus", TARGET_SAMPLE_RATE)
+        options = LiveOptions(model="nova-2", **encoder.live_options())
+        dg_connection.send(encoder.encode(pcm_frame))
+        dg_connection.send(encoder.close())
+        ```
+    """
+
+    def __init__(self, encoding: str, sample_rate: int, page_latency_ms: float = 100.0) -> None:
+        if encoding not in UPSTREAM_ENCODINGS:
+            raise ValueError(f"Unknown upstream encoding {encoding!r}, expected one of {UPSTREAM_ENCODINGS}")
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self._sink = None
+        self._file = None
+
+        if encoding == "flac":
+            self._sink = _StreamSink()
+            self._file = sf.SoundFile(self._sink, "w", sample_rate, 1, "PCM_16", format="FLAC")
+        elif encoding == "opus":
+            self._sink = _StreamSink()
+            self._file = sf.SoundFile(self._sink, "w", sample_rate, 1, "OPUS", format="OGG")
+            latency = sf._ffi.new("double*", page_latency_ms)
+            sf._snd.sf_command(self._file._file, SFC_SET_OGG_PAGE_LATENCY_MS, latency, sf._ffi.sizeof("double"))
+
+    @property
+    def is_compressed(self) -> bool:
+        return self._file is not None
+
+    def live_options(self) -> dict:
+        """Returns the LiveOptions fields that describe this stream."""
+        if self.encoding == "opus":
+            # Containerized audio: Deepgram reads the format from the Ogg headers
+            return {}
+        return {"encoding": self.encoding, "sample_rate": self.sample_rate, "channels": 1}
+
+    def encode(self, pcm: np.ndarray) -> bytes:
+        """
+        Encodes one mono int16 frame.
+
+        Args:
+            pcm (np.ndarray): Mono int16 samples at `sample_rate`.
+
+        Returns:
+            bytes: Stream bytes ready to send, possibly empty.
+        """
+        if self._file is None:
+            return pcm.tobytes()
+        self._file.write(pcm)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Flushes the encoder and returns the tail of the stream."""
+        if self._file is None:
+            return b""
+        self._file.close()
+        self._file = None
+        return self._sink.drain()
@@ -0,0 +1,172 @@
+"""Headless core of the desktop frontends: recording and answers, reported as events."""
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from .constants import ENGINE_WORKERS
+from .events import (
+    AnswerDone,
+    AnswerToken,
+    AudioLevel,
+    EngineError,
+    EventBus,
+    RecordingStateChanged,
+    SlotsUpdated,
+    TranscriptReady,
+    TranscriptSegment,
+)
+from .llm import batch_tokens
+from .tracing import ANSWER_RENDERED
+from .threads import TranscriptionSession, get_default_session, prewarm_connections
+
+
+class CallEngine:
+    """
+    Runs a call's recording, transcription and answers on worker threads and publishes what
+    happens on an `EventBus`.
+
+    Every method returns at once; results arrive as events, published from worker, capture or
+    Deepgram threads. Frontends only call these methods and subscribe to the bus, so the
+    pipeline is the same for every GUI and runs without one, e.g. in benchmarks.
+
+    Example:
+        ```python
+        engine = CallEngine()
+        engine.bus.subscribe(AnswerToken, lambda event: print(event.text, end=""))
+        engine.start_recording()
+        ...
+        transcript = engine.stop_recording().result()
+        engine.answer(transcript)
+        ```
+    """
+
+    def __init__(
+        self,
+        session: Optional[TranscriptionSession] = None,
+        bus: Optional[EventBus] = None,
+        workers: int = ENGINE_WORKERS,
+    ) -> None:
+        self.bus = bus or EventBus()
+        # The default session is the one `prewarm` opens connections for
+        self.session = session or get_default_session()
+        self.session.on_segment = lambda text: self.bus.publish(TranscriptSegment(text))
+        self.session.on_slots = lambda slots: self.bus.publish(SlotsUpdated(slots))
+        self.session.on_audio_level = lambda level_db, is_speech: self.bus.publish(AudioLevel(level_db, is_speech))
+
+        # Capture holds one worker for the whole recording; answers take one per section
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="engine")
+        self.transcript = None
+        self._recording = None
+        self._answer_ids = itertools.count(1)
+        # (answer id, time of its `answer` call); the start of the answer_rendered spans
+        self._last_answer = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def is_recording(self) -> bool:
+        return self._recording is not None
+
+    def prewarm(self) -> Future:
+        """Opens Deepgram connections in the background so the first recording starts at once."""
+        return self._submit("prewarm", prewarm_connections)
+
+    def start_recording(self) -> Optional[Future]:
+        """Connects and captures until `stop_recording`; None if a recording is already running."""
+        with self._lock:
+            if self._recording is not None:
+                return None
+            self.transcript = None
+            self._recording = self._submit("recording", self._record)
+            return self._recording
+
+    def _record(self) -> None:
+        if not self.session.start_transcription():
+            raise RuntimeError("Failed to connect to Deepgram")
+        self.bus.publish(RecordingStateChanged(True))
+        # Returns once stop_transcription clears the session's is_running flag
+        self.session.process_audio()
+
+    def stop_recording(self) -> Optional[Future]:
+        """Stops capture and finalizes; the future and a `TranscriptReady` event carry the transcript."""
+        with self._lock:
+            if self._recording is None:
+                return None
+            self._recording = None
+        return self._submit("transcription", self._stop)
+
+    def _stop(self) -> str:
+        self.transcript = self.session.stop_transcription()
+        self.bus.publish(RecordingStateChanged(False))
+        self.bus.publish(TranscriptReady(self.transcript))
+        return self.transcript
+
+    def answer(self, transcript: Optional[str] = None, temperature: float = 0.3) -> int:
+        """
+        Streams the short and full answer to `transcript`, by default the last recording's.
+
+        Both sections come from one completion and are published concurrently as `AnswerToken`
+        batches, then `AnswerDone`, each tagged with the returned answer id.
+
+        Returns:
+            int: The id of this answer.
+        """
+        transcript = transcript if transcript is not None else self.transcript
+        answer_id = next(self._answer_ids)
+        self._last_answer = (answer_id, time.monotonic())
+        try:
+            short_tokens, full_tokens = self.session.generate_answers_stream(transcript, temperature)
+        except Exception as error:
+            self.bus.publish(EngineError("answer", str(error), answer_id))
+            return answer_id
+        self.executor.submit(self._stream_answer, answer_id, "short", short_tokens)
+        self.executor.submit(self._stream_answer, answer_id, "full", full_tokens)
+        return answer_id
+
+    def answer_rendered(self, answer_id: int, kind: str) -> None:
+        """Frontends call this once the first tokens of section `kind` are on screen, to trace the latest answer."""
+        last_id, started = self._last_answer
+        if answer_id == last_id:
+            self.session.tracer.span(f"{ANSWER_RENDERED}_{kind}", started, answer_id=answer_id)
+
+    def _stream_answer(self, answer_id: int, kind: str, tokens: Iterator[str]) -> None:
+        text = ""
+        try:
+            # One event per token batch keeps repaints and cross-thread handovers down
+            for batch in batch_tokens(tokens):
+                text += batch
+                self.bus.publish(AnswerToken(answer_id, kind, batch))
+        except Exception as error:
+            logger.error(f"Can't generate answer: {error}")
+            self.bus.publish(EngineError("answer", f"Can't generate answer: {error}", answer_id))
+            return
+        self.bus.publish(AnswerDone(answer_id, kind, text))
+
+    def _submit(self, source: str, function) -> Future:
+        def run():
+            try:
+                return function()
+            except Exception as error:
+                logger.error(f"{source} failed: {error}")
+                self.bus.publish(EngineError(source, str(error)))
+                if source == "recording":
+                    with self._lock:
+                        self._recording = None
+                    self.bus.publish(RecordingStateChanged(False))
+                raise
+
+        return self.executor.submit(run)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stops a running recording, waiting up to `timeout` for it to finalize, and the workers."""
+        stopping = self.stop_recording()
+        if stopping is not None:
+            try:
+                stopping.result(timeout)
+            except Exception as error:
+                logger.error(f"Can't stop recording: {error}")
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.tracer.log_summary()
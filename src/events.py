@@ -0,0 +1,165 @@
+"""Typed events of a call and the pub/sub bus the core engine publishes them on."""
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from loguru import logger
+
+
+class Event:
+    """Base of all engine events; subscribing to it receives every event."""
+
+    __slots__ = ("time",)
+
+    def __init__(self) -> None:
+        self.time = time.monotonic()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class RecordingStateChanged(Event):
+    """Capture started or stopped."""
+
+    __slots__ = ("recording",)
+
+    def __init__(self, recording: bool) -> None:
+        super().__init__()
+        self.recording = recording
+
+
+class AudioLevel(Event):
+    """Level of the last 0.1 s of captured audio, ten times a second while recording."""
+
+    __slots__ = ("level_db", "is_speech")
+
+    def __init__(self, level_db: float, is_speech: bool) -> None:
+        super().__init__()
+        self.level_db = level_db
+        self.is_speech = is_speech
+
+
+class TranscriptSegment(Event):
+    """A final transcript segment, while the caller speaks."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        super().__init__()
+        self.text = text
+
+
+class TranscriptReady(Event):
+    """The whole transcript of a recording, once it is finalized."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        super().__init__()
+        self.text = text
+
+
+class SlotsUpdated(Event):
+    """Caller details changed; `slots` has every slot, None where unknown."""
+
+    __slots__ = ("slots",)
+
+    def __init__(self, slots: dict) -> None:
+        super().__init__()
+        self.slots = slots
+
+
+class AnswerToken(Event):
+    """New text of an answer; `kind` is "short" or "full" and `answer_id` tells answers apart."""
+
+    __slots__ = ("answer_id", "kind", "text")
+
+    def __init__(self, answer_id: int, kind: str, text: str) -> None:
+        super().__init__()
+        self.answer_id = answer_id
+        self.kind = kind
+        self.text = text
+
+
+class AnswerDone(Event):
+    """An answer is complete; `text` is all of it."""
+
+    __slots__ = ("answer_id", "kind", "text")
+
+    def __init__(self, answer_id: int, kind: str, text: str) -> None:
+        super().__init__()
+        self.answer_id = answer_id
+        self.kind = kind
+        self.text = text
+
+
+class EngineError(Event):
+    """A step of the pipeline failed; `source` is "recording", "transcription", "answer" or "prewarm"."""
+
+    __slots__ = ("source", "message", "answer_id")
+
+    def __init__(self, source: str, message: str, answer_id: Optional[int] = None) -> None:
+        super().__init__()
+        self.source = source
+        self.message = message
+        self.answer_id = answer_id
+
+
+Handler = Callable[[Event], None]
+
+
+class EventBus:
+    """
+    Synchronous pub/sub keyed by event class.
+
+    Handlers run on the publishing thread, in subscription order, so they must be quick and
+    must not touch GUI widgets directly: frontends hand events over to their UI thread (a
+    queue drained by the Tk loop, `window.write_event_value`, a queued Qt signal). Publishing
+    is a dictionary lookup plus the handler calls; the handler table is copied on subscribe,
+    so `publish` takes no lock. A failing handler is logged and does not stop the others.
+
+    Example:
+        ```python
+        bus = EventBus()
+        unsubscribe = bus.subscribe(AnswerToken, lambda event: print(event.text, end=""))
+        bus.subscribe(Event, log_everything)
+        bus.publish(AnswerToken(1, "short", "Hello"))
+        unsubscribe()
+        ```
+    """
+
+    def __init__(self) -> None:
+        self._handlers: Dict[Type[Event], Tuple[Handler, ...]] = {}
+        self._lock = threading.Lock()
+        self.published = Counter()
+
+    def subscribe(self, event_type: Type[Event], handler: Handler) -> Callable[[], None]:
+        """
+        Calls `handler` with every published `event_type`; `Event` subscribes to all events.
+
+        Returns:
+            Callable[[], None]: Removes the subscription.
+        """
+        with self._lock:
+            self._handlers = {**self._handlers, event_type: self._handlers.get(event_type, ()) + (handler,)}
+
+        def unsubscribe() -> None:
+            with self._lock:
+                handlers = tuple(h for h in self._handlers.get(event_type, ()) if h is not handler)
+                self._handlers = {**self._handlers, event_type: handlers}
+
+        return unsubscribe
+
+    def publish(self, event: Event) -> None:
+        handlers = self._handlers
+        self.published[type(event).__name__] += 1
+        for handler in handlers.get(type(event), ()) + handlers.get(Event, ()):
+            try:
+                handler(event)
+            except Exception as error:
+                logger.error(f"Handler {handler!r} failed on {event!r}: {error}")
+
+    def stats(self) -> dict:
+        return dict(self.published)
@@ -0,0 +1,126 @@
+"""FAQ fast-path: answers scripted questions locally instead of asking the LLM."""
+import time
+from typing import List, Optional
+
+from loguru import logger
+
+from .retrieval import BM25Index, tokenize
+
+# Content words that qualify a question without changing which answer is right ("are you open
+# tomorrow morning?"), counted as covered by every entry. Tokens as `tokenize` returns them.
+NEUTRAL_WORDS = frozenset(
+    """today tonight tomorrow morning afternoon evening week weekday weekend day monday tuesday wednesday
+    thursday friday saturday sunday until now soon actual actually really rather i'd i'll let available
+    office operation house home what' that' there' anyone somebody""".split()
+)
+
+
+class FAQEntry:
+    """A scripted question, ways callers phrase it and the answer to give; loaded from the FAQ of a script file."""
+
+    def __init__(self, id: str, question: str, answer: str, paraphrases: List[str]) -> None:
+        self.id = id
+        self.question = question
+        self.answer = answer
+        self.paraphrases = paraphrases
+
+
+class FAQMatcher:
+    """
+    BM25 intent matcher over FAQ questions and their paraphrases, built once at startup.
+
+    A transcript gets the scripted answer only when the match is confident on both sides:
+    the best phrasing scores at least `min_score` of what that phrasing scores against itself,
+    and at least `min_coverage` of the transcript's content words occur in the matched entry
+    or are NEUTRAL_WORDS. The second condition keeps questions that carry more than the FAQ
+    intent away from the canned answer: "are you open on holidays?" or "can I talk to a real
+    person about my bill?" go to the LLM, "are you open tomorrow morning?" does not. A
+    transcript sharing fewer than `min_terms` content words with the best phrasing covers
+    itself trivially, so it also needs `single_term_min_score`: "are you open?" still matches,
+    "what time is it?" and "do you charge for a quote?" do not.
+    Everything else falls through to the LLM.
+
+    Example:
+        ```python
+        faq = FAQMatcher(load_script(SCRIPT_FILE).faq_entries)
+        entry = faq.match("what hours are you guys open")
+        answer = entry.answer if entry else ask_the_llm(transcript)
+        faq.stats()  # {"lookups": 1, "hits": 1, "hit_rate": 1.0, ...}
+        ```
+    """
+
+    def __init__(
+        self,
+        entries: List[FAQEntry],
+        min_score: float = 0.6,
+        min_coverage: float = 1.0,
+        min_terms: int = 2,
+        single_term_min_score: float = 0.9,
+    ) -> None:
+        self.entries = entries
+        self.min_score = min_score
+        self.min_coverage = min_coverage
+        self.min_terms = min_terms
+        self.single_term_min_score = single_term_min_score
+
+        phrasings, self._owners = [], []
+        for entry in entries:
+            for phrasing in [entry.question, *entry.paraphrases]:
+                phrasings.append(phrasing)
+                self._owners.append(entry)
+        self.index = BM25Index(phrasings)
+        self._phrasing_terms = [set(tokenize(phrasing)) for phrasing in phrasings]
+        self._vocabulary = {
+            entry.id: set(tokenize(" ".join([entry.question, entry.answer, *entry.paraphrases]))) for entry in entries
+        }
+
+        self.lookups = 0
+        self.hits = 0
+        self._lookup_sec = 0.0
+
+    def confidence(self, transcript: str) -> tuple:
+        """
+        The best entry for `transcript` and how well it matches.
+
+        Returns:
+            tuple: (entry, (score, coverage, terms)), terms being the transcript's content words
+                found in the best phrasing; (None, (0.0, 0.0, 0)) without any match.
+        """
+        tokens = tokenize(transcript)
+        scores = self.index.score_tokens(tokens)
+        if not scores:
+            return None, (0.0, 0.0, 0)
+        best = max(scores, key=lambda index: scores[index] / self.index.self_scores[index])
+        entry = self._owners[best]
+        vocabulary = self._vocabulary[entry.id]
+        coverage = sum(token in vocabulary or token in NEUTRAL_WORDS for token in tokens) / len(tokens)
+        terms = len(self._phrasing_terms[best].intersection(tokens))
+        return entry, (scores[best] / self.index.self_scores[best], coverage, terms)
+
+    def match(self, transcript: str) -> Optional[FAQEntry]:
+        """The FAQ entry `transcript` asks about, or None if the match is not confident."""
+        start = time.perf_counter()
+        entry, (score, coverage, terms) = self.confidence(transcript)
+        hit = (
+            entry is not None
+            and score >= (self.min_score if terms >= self.min_terms else self.single_term_min_score)
+            and coverage >= self.min_coverage
+        )
+        self._lookup_sec += time.perf_counter() - start
+        self.lookups += 1
+        if not hit:
+            return None
+        self.hits += 1
+        logger.debug(
+            f"FAQ fast-path hit {entry.id!r} (score {score:.2f}, coverage {coverage:.2f}, {terms} terms): "
+            f"{self.stats()}"
+        )
+        return entry
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "mean_lookup_us": self._lookup_sec / self.lookups * 1e6 if self.lookups else 0.0,
+        }
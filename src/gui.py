@@ -1,45 +1,52 @@
-from PyQt5.QtWidgets import (
-    QWidget, QPushButton, QLabel, QTextEdit,
-    QVBoxLayout, QHBoxLayout
-)
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QPushButton, QLabel, QTextEdit, QVBoxLayout, QHBoxLayout
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from loguru import logger
-import asyncio
 
-from .threads import (
-    start_transcription, 
-    process_audio, 
-    handle_transcription, 
-    stop_transcription
-)
-from .threads import ChatGPTThread
-
-
-from .llm import LLMInference
+from .engine import CallEngine
+from .events import AnswerDone, AnswerToken, EngineError, RecordingStateChanged, SlotsUpdated, TranscriptReady
+from .slots import format_slots
 from .constants import APPLICATION_WIDTH, OFF_IMAGE, ON_IMAGE
 
 logger.add("debug.log", level="DEBUG", rotation="3 MB", compression="zip")
 
-class MainWindow(QWidget):
-    def __init__(self):
-        super().__init__()
 
-        self.recording = False
-        self.recording_thread = None
-        self.transcribe_thread = None
-        self.quick_answer_thread = None
-        self.full_answer_thread = None
+class EngineBridge(QObject):
+    """Re-emits engine events as a Qt signal; connected slots run queued on the GUI thread."""
+
+    event_received = pyqtSignal(object)
 
-        self.llm = LLMInference()
+
+class MainWindow(QWidget):
+    def __init__(self, engine=None):
+        super().__init__()
 
         self.audio_transcript = None
+        self.answer_id = None
+        self.answer_texts = {}
+
+        self.engine = engine or CallEngine()
+        self.bridge = EngineBridge()
+        self.bridge.event_received.connect(self.on_engine_event)
+        self.handlers = {
+            RecordingStateChanged: self.on_recording_state,
+            TranscriptReady: self.on_transcript,
+            SlotsUpdated: self.on_slots,
+            AnswerToken: self.on_answer_token,
+            AnswerDone: self.on_answer_done,
+            EngineError: self.on_error,
+        }
+        for event_type in self.handlers:
+            self.engine.bus.subscribe(event_type, self.bridge.event_received.emit)
 
         self.initUI()
 
+        # Open Deepgram connections now so the first recording does not wait for a handshake
+        self.engine.prewarm()
+
     def initUI(self):
         # Set window title and size
-        self.setWindowTitle('Keyboard Test')
+        self.setWindowTitle("Keyboard Test")
         self.setGeometry(100, 100, APPLICATION_WIDTH, 800)
 
         # Create the record_status_button
@@ -55,7 +62,9 @@ class MainWindow(QWidget):
 
         # Set initial icon for the button
         self.record_status_button.setIcon(QIcon(self.off_pixmap) if not self.off_pixmap.isNull() else QIcon())
-        self.record_status_button.setIconSize(self.off_pixmap.size() if not self.off_pixmap.isNull() else self.record_status_button.size())
+        self.record_status_button.setIconSize(
+            self.off_pixmap.size() if not self.off_pixmap.isNull() else self.record_status_button.size()
+        )
         self.record_status_button.setFlat(True)
         self.record_status_button.clicked.connect(self.toggle_recording)
 
@@ -68,6 +77,7 @@ class MainWindow(QWidget):
         self.info_label.setFixedHeight(50)
         self.analyzed_text_label = QLabel("")
         self.analyzed_text_label.setFixedHeight(50)
+        self.caller_details_label = QLabel("")
         self.quick_chat_gpt_answer = QTextEdit()
         self.quick_chat_gpt_answer.setReadOnly(True)
         self.full_chat_gpt_answer = QTextEdit()
@@ -83,6 +93,8 @@ class MainWindow(QWidget):
 
         main_layout.addWidget(QLabel("Analysis Result:"))
         main_layout.addWidget(self.analyzed_text_label)
+        main_layout.addWidget(QLabel("Caller details:"))
+        main_layout.addWidget(self.caller_details_label)
         main_layout.addWidget(QLabel("Short answer:"))
         main_layout.addWidget(self.quick_chat_gpt_answer)
         main_layout.addWidget(QLabel("Full answer:"))
@@ -91,66 +103,74 @@ class MainWindow(QWidget):
         self.setLayout(main_layout)
 
     def toggle_recording(self):
-        self.recording = not self.recording
-        if self.recording:
+        if not self.engine.is_recording:
             self.record_status_button.setIcon(QIcon(self.on_pixmap) if not self.on_pixmap.isNull() else QIcon())
             self.record_status_button.setText("Recording... Click to Stop")
             self.record_status_button.setStyleSheet("background-color: red; color: white;")  # Make button stand out
             logger.debug("Starting recording...")
-            self.start_recording_thread()
+            self.audio_transcript = None
+            self.engine.start_recording()
         else:
-            self.record_status_button.setIcon(QIcon(self.off_pixmap) if not self.off_pixmap.isNull() else QIcon())
-            self.record_status_button.setText("Start Recording")
-            self.record_status_button.setStyleSheet("")  # Reset to default style
+            self.show_stopped()
+            self.info_label.setText("Finishing transcription...")
             logger.debug("Stopping recording...")
-            self.stop_recording_thread()
+            self.engine.stop_recording()
 
-    def start_recording_thread(self):
-        if not self.recording_thread:
-            self.recording_thread = True
-            start_transcription()
-            asyncio.run(process_audio())
+    def show_stopped(self):
+        self.record_status_button.setIcon(QIcon(self.off_pixmap) if not self.off_pixmap.isNull() else QIcon())
+        self.record_status_button.setText("Start Recording")
+        self.record_status_button.setStyleSheet("")  # Reset to default style
+
+    def on_engine_event(self, event):
+        self.handlers[type(event)](event)
+
+    def on_recording_state(self, event):
+        if not event.recording and not self.engine.is_recording:
+            self.show_stopped()
+
+    def on_transcript(self, event):
+        self.audio_transcript = event.text
+        self.info_label.setText("Use buttons to control the recording and analyze audio.")
+
+    def on_slots(self, event):
+        self.caller_details_label.setText(format_slots(event.slots))
 
-    def stop_recording_thread(self):
-        if self.recording_thread:
-            self.audio_transcript = stop_transcription()
-            self.recording_thread = False
+    def on_error(self, event):
+        if event.answer_id is None:
+            self.info_label.setText(f"{event.source.capitalize()} failed: {event.message}")
+        elif event.answer_id == self.answer_id:
+            self.quick_chat_gpt_answer.setText(event.message)
+            self.full_chat_gpt_answer.setText(event.message)
 
     def handle_transcription_done(self):
         if self.audio_transcript == None:
             return
         self.analyzed_text_label.setText(self.audio_transcript)
 
-        # Generate quick answer:
+        # Quick and full answers come out of one completion and stream at once
         self.quick_chat_gpt_answer.setText("ChatGPT is working...")
-        self.quick_answer_thread = ChatGPTThread(
-            self.llm, audio_transcript, short_answer=True, temperature=0.2
-        )
-        self.quick_answer_thread.answer_ready.connect(self.handle_quick_answer_ready)
-        self.quick_answer_thread.start()
-
-        # Generate full answer:
         self.full_chat_gpt_answer.setText("ChatGPT is working...")
-        self.full_answer_thread = ChatGPTThread(
-            self.llm, self.audio_transcript, short_answer=False, temperature=0.7
-        )
-        self.full_answer_thread.answer_ready.connect(self.handle_full_answer_ready)
-        self.full_answer_thread.start()
+        self.answer_texts = {"short": "", "full": ""}
+        self.answer_id = self.engine.answer(self.audio_transcript, temperature=0.2)
+
+    def on_answer_token(self, event):
+        if event.answer_id != self.answer_id:
+            # A newer analysis replaced this answer
+            return
+        first_tokens = not self.answer_texts[event.kind]
+        self.answer_texts[event.kind] += event.text
+        self.answer_widget(event.kind).setText(self.answer_texts[event.kind])
+        if first_tokens:
+            self.engine.answer_rendered(event.answer_id, event.kind)
 
-    def handle_quick_answer_ready(self, answer):
-        self.quick_chat_gpt_answer.setText(answer)
+    def on_answer_done(self, event):
+        if event.answer_id == self.answer_id:
+            self.answer_widget(event.kind).setText(event.text)
 
-    def handle_full_answer_ready(self, answer):
-        self.full_chat_gpt_answer.setText(answer)
+    def answer_widget(self, kind):
+        return self.quick_chat_gpt_answer if kind == "short" else self.full_chat_gpt_answer
 
     def closeEvent(self, event):
-        # Clean up threads when closing
-        if self.recording_thread:
-            stop_transcription()
-        if self.transcribe_thread and self.transcribe_thread.isRunning():
-            self.transcribe_thread.quit()
-        if self.quick_answer_thread and self.quick_answer_thread.isRunning():
-            self.quick_answer_thread.quit()
-        if self.full_answer_thread and self.full_answer_thread.isRunning():
-            self.full_answer_thread.quit()
+        # Stops a running recording and the engine's workers
+        self.engine.close()
         event.accept()
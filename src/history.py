@@ -0,0 +1,125 @@
+"""Token-budgeted conversation history."""
+import re
+from typing import Callable, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of English text, about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def first_sentence(text: str, max_words: int = 25) -> str:
+    """The first sentence of `text`, cut to `max_words` words."""
+    sentence = re.split(r"(?<=[.!?])\s+", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        sentence = " ".join(words[:max_words]) + "..."
+    return sentence
+
+
+def summarize_turn(turn: "Turn") -> str:
+    """Default one-line summary of a turn: the gist of the query and of the answer."""
+    return f"User: {first_sentence(turn.query)} / Agent: {first_sentence(turn.answer)}"
+
+
+class Turn:
+    """One query/answer exchange and the prompt tokens spent answering it."""
+
+    def __init__(self, query: str, answer: str, prompt_tokens: Optional[int] = None) -> None:
+        self.query = query
+        self.answer = answer
+        self.prompt_tokens = prompt_tokens
+
+    def render(self) -> str:
+        return "User query:\n" + self.query + "\n" + "GPT Response:\n" + self.answer + "\n"
+
+
+class ConversationHistory:
+    """
+    Conversation turns kept within a token budget.
+
+    The most recent turns are kept verbatim for as long as they fit into `max_tokens`, but at
+    least `keep_recent` of them. Older turns are folded into a running summary, one line per
+    turn, and the oldest summary lines are dropped once the summary exceeds `summary_tokens`.
+    The rendered history therefore stops growing after a few turns, however long the call.
+    Turns that left the verbatim part are only kept as their prompt token count, for reporting.
+
+    Folding rewrites the start of the history and so breaks the provider's prompt cache for
+    everything after the static prompt. When the budget overflows, turns are folded until the
+    verbatim part is down to half its budget, so the history then only grows by appending for
+    several turns and the cached prefix keeps matching.
+
+    Example:
+        ```python
+        history = ConversationHistory(max_tokens=600)
+        history.add("What hours are you open?", "8-5 Monday through Friday.", prompt_tokens=812)
+        messages = build_messages(transcript, "short", history.messages())
+        history.prompt_tokens_per_turn()  # [812]
+        ```
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 600,
+        keep_recent: int = 2,
+        summary_tokens: int = 200,
+        summarize: Callable[[Turn], str] = summarize_turn,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.count_tokens = count_tokens
+
+        self.turn_prompt_tokens = []  # per turn of the call, for reporting; the text is not kept
+        self.recent = []  # turns rendered verbatim
+        self.summary_lines = []
+        # Bumped on every change; answers generated for an older version are stale
+        self.version = 0
+
+    def add(self, query: str, answer: str, prompt_tokens: Optional[int] = None) -> Turn:
+        """Appends a turn and folds the oldest verbatim turns into the summary until the budget fits."""
+        turn = Turn(query, answer, prompt_tokens)
+        self.turn_prompt_tokens.append(prompt_tokens)
+        self.recent.append(turn)
+
+        if self._recent_tokens() > self._verbatim_budget():
+            while len(self.recent) > self.keep_recent and self._recent_tokens() > self._verbatim_budget() // 2:
+                self.summary_lines.append(self.summarize(self.recent.pop(0)))
+        while len(self.summary_lines) > 1 and self.count_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+            self.summary_lines.pop(0)
+
+        self.version += 1
+        return turn
+
+    def _recent_tokens(self) -> int:
+        return sum(self.count_tokens(turn.render()) for turn in self.recent)
+
+    def _verbatim_budget(self) -> int:
+        return self.max_tokens - self.summary_tokens
+
+    def messages(self) -> list:
+        """The history as chat messages: the summary as a system message, then user/assistant pairs."""
+        messages = []
+        if self.summary_lines:
+            messages.append(
+                {"role": "system", "content": "Summary of earlier conversation:\n" + "\n".join(self.summary_lines)}
+            )
+        for turn in self.recent:
+            messages.append({"role": "user", "content": turn.query})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    def render(self) -> str:
+        """The history in the `User query: ... GPT Response: ...` layout the system prompt describes."""
+        text = ""
+        if self.summary_lines:
+            text += "Summary of earlier conversation:\n" + "\n".join(self.summary_lines) + "\n"
+        return text + "".join(turn.render() for turn in self.recent)
+
+    def prompt_tokens_per_turn(self) -> List[Optional[int]]:
+        return list(self.turn_prompt_tokens)
+
+    def __len__(self) -> int:
+        return len(self.turn_prompt_tokens)
@@ -0,0 +1,166 @@
+"""
+Call-script knowledge base: scripts loaded from files and searched per turn.
+
+A script is a markdown file:
+
+    # Company name
+    Persona and greeting, sent with every request.
+
+    ## Section title
+    Free text, one snippet. Sections titled "... (always)" are sent with every request too.
+
+    ## FAQ
+    ### entry_id
+    Q: The scripted question?
+    Q: Another way callers ask it?
+    A: The answer to give.
+
+Every other section and every FAQ entry is a snippet; only the `k` snippets most relevant to
+the caller's transcript go into the prompt. FAQ entries also feed the FAQ fast-path.
+"""
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from .faq import FAQEntry
+from .retrieval import BM25Index
+
+
+class Snippet:
+    """A retrievable part of a script: a section or a FAQ entry."""
+
+    def __init__(self, id: str, title: str, text: str, search_text: Optional[str] = None) -> None:
+        self.id = id
+        self.title = title
+        self.text = text
+        # What the index sees; FAQ entries add their paraphrases, which the prompt doesn't need
+        self.search_text = search_text or f"{title}\n{text}"
+
+    def render(self) -> str:
+        return self.text
+
+
+class KnowledgeBase:
+    """
+    One call script, split into an always-sent core and a BM25-indexed list of snippets.
+
+    Example:
+        ```python
+        knowledge = load_script("./knowledge/avoca.md")
+        snippets = knowledge.search("is there a fee to come out", k=3)
+        prompt = knowledge.render(snippets)
+        ```
+    """
+
+    def __init__(self, name: str, core: str, snippets: List[Snippet], faq_entries: List[FAQEntry]) -> None:
+        self.name = name
+        self.core = core
+        self.snippets = snippets
+        self.faq_entries = faq_entries
+
+        start = time.perf_counter()
+        self.index = BM25Index([snippet.search_text for snippet in snippets])
+        self.build_sec = time.perf_counter() - start
+
+    def search(self, query: str, k: int = 4) -> List[Snippet]:
+        """The `k` snippets most relevant to `query`, best first; snippets sharing no term with it are left out."""
+        return [self.snippets[index] for index, _ in self.index.search(query, k)]
+
+    def render(self, snippets: Optional[List[Snippet]] = None) -> str:
+        """The given snippets as prompt text, all of them by default."""
+        return "\n\n".join(snippet.render() for snippet in (self.snippets if snippets is None else snippets))
+
+    def __len__(self) -> int:
+        return len(self.snippets)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def _parse_faq(body: str) -> List[FAQEntry]:
+    entries = []
+    for block in re.split(r"\n\s*\n|^(?=### )", body.strip(), flags=re.MULTILINE):
+        id, questions, answer = None, [], []
+        for line in block.strip().splitlines():
+            if line.startswith("### "):
+                id = line[4:].strip()
+            elif line.startswith("Q:"):
+                questions.append(line[2:].strip())
+            elif line.startswith("A:"):
+                answer.append(line[2:].strip())
+            elif answer:
+                answer.append(line.strip())
+        if not questions or not answer:
+            continue
+        entries.append(FAQEntry(id or _slug(questions[0]), questions[0], " ".join(answer), questions[1:]))
+    return entries
+
+
+def parse_script(text: str, name: str = "script") -> KnowledgeBase:
+    """
+    Splits a script in the module's markdown layout into a knowledge base.
+
+    Args:
+        text (str): The script.
+        name (str): Name used in logs, usually the file name.
+
+    Returns:
+        KnowledgeBase: The script's core, snippets and FAQ entries, indexed.
+    """
+    core, *sections = re.split(r"^## ", text, flags=re.MULTILINE)
+    core_parts = [re.sub(r"^# .*\n", "", core.strip()).strip()]
+    snippets, faq_entries = [], []
+    for section in sections:
+        title, _, body = section.partition("\n")
+        title, body = title.strip(), body.strip()
+        if title.lower().endswith("(always)"):
+            core_parts.append(body)
+        elif title.lower() == "faq":
+            entries = _parse_faq(body)
+            faq_entries.extend(entries)
+            for entry in entries:
+                snippets.append(
+                    Snippet(
+                        entry.id,
+                        entry.question,
+                        f"Q: {entry.question}\nA: {entry.answer}",
+                        "\n".join([entry.question, *entry.paraphrases, entry.answer]),
+                    )
+                )
+        else:
+            snippets.append(Snippet(_slug(title), title, f"{title}:\n{body}"))
+    return KnowledgeBase(name, "\n\n".join(part for part in core_parts if part), snippets, faq_entries)
+
+
+def load_script(path: str) -> KnowledgeBase:
+    """
+    Loads and indexes a script file.
+
+    Args:
+        path (str): Path of a script in the module's markdown layout.
+
+    Returns:
+        KnowledgeBase: The indexed script.
+
+    Example:
+        ```python
+        knowledge = load_script(SCRIPT_FILE)
+        faq = FAQMatcher(knowledge.faq_entries)
+        ```
+    """
+    path = Path(path)
+    knowledge = parse_script(path.read_text(encoding="utf-8"), path.stem)
+    logger.debug(
+        f"Loaded script {knowledge.name!r}: {len(knowledge)} snippets, {len(knowledge.faq_entries)} FAQ entries, "
+        f"indexed in {knowledge.build_sec * 1000:.1f} ms"
+    )
+    return knowledge
+
+
+def load_scripts(directory: str) -> dict:
+    """Every `*.md` script in `directory`, by file name without the extension."""
+    return {path.stem: load_script(path) for path in sorted(Path(directory).glob("*.md"))}
@@ -1,48 +1,142 @@
-import openai
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
 import numpy as np
 from loguru import logger
 
 
 from src.constants import DEEPGRAM_API_KEY, OPENAI_API_KEY, OUTPUT_FILE_NAME
-from src.constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE
-
-
-SYSTEM_PROMPT = f"""You are a sales agent for Avoca Air Condioning company.
-You will receive an audio transcription of the question. It may not be complete. 
-Treat this as a phone call you are the sales agent. The audio you receive is the users response on the call. 
-You need to understand the question and write an answer to it based on the following script: \n
-Start with an introduction: Thank you for calling Dooley Service Pro, this is Sarah your virtual assistant how may I help you today!
-
-If the user is querying about service, frame a response to collect information on:
-Problem / issue they are facing
-Age of their system
-Name
-Address
-Callback Number
-Email
-
-Further clarifications after this could be based on when they are interested in scheduling it and appropriately responding saying its been scheduled.
-
-FAQ:
-What hours are you open?
-8-5 Monday Though Friday, 5 days a week
-When can we speak to a live agent?
-The earliest that someone will return your call is between 730 and 8:30 AM the next day.
-What time can you come out?
-We do offer open time frames. Our dispatcher will keep you updated throughout the day. 
-Is there a service fee to come out?
-It’s just $79 for the diagnostic fee unless you are looking to replace your system in which case we can offer a free quote.
-
-"""
-SHORTER_INSTRACT = "Concisely respond, limiting your answer to 70 words."
-LONGER_INSTRACT = (
-    "Before answering, take a deep breath and think one step at a time. Believe the answer in no more than 150 words."
-)
+from src.constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE, SCRIPT_FILE
+from src.accounting import CallRecord, UsageLedger, count_message_tokens, usage_ledger
+from src.knowledge import KnowledgeBase, load_script
+from src.prompts import SHORTER_INSTRACT, LONGER_INSTRACT, build_messages, cached_prompt_tokens
+from src.tracing import LLM_REQUEST, Tracer
+
+if TYPE_CHECKING:
+    from src.llm_client import LLMClient
+
+
+def batch_tokens(tokens: Iterator[str], interval_sec: float = 0.05) -> Iterator[str]:
+    """
+    Groups a token stream into text batches so UIs repaint at most once per interval.
+
+    Args:
+        tokens (Iterator[str]): Tokens as yielded by `generate_answer_stream`.
+        interval_sec (float): Minimum time between batches. The first token is passed on at once.
+
+    Yields:
+        str: Concatenated tokens received since the previous batch.
+
+    Example:
+        ```python
+        for text in batch_tokens(llm.generate_answer_stream(transcript)):
+            widget.append(text)
+        ```
+    """
+    pending = []
+    last_flush = None
+    for token in tokens:
+        pending.append(token)
+        now = time.monotonic()
+        if last_flush is None or now - last_flush >= interval_sec:
+            yield "".join(pending)
+            pending.clear()
+            last_flush = now
+    if pending:
+        yield "".join(pending)
+
+
+def stream_completion(
+    client: "LLMClient",
+    messages: list,
+    temperature: float,
+    ledger: UsageLedger,
+    mode: str,
+    estimate: Optional[int] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    tracer: Optional[Tracer] = None,
+) -> Iterator[str]:
+    """
+    Streams a chat completion's tokens and records the call, whether it completes, fails or is closed early.
+
+    Args:
+        client (LLMClient): Client that sends the request.
+        messages (list): Chat messages, as built by `prompts.build_messages`.
+        temperature (float): Sampling temperature.
+        ledger (UsageLedger): Gets one CallRecord for the call, labelled `mode`.
+        mode (str): Answer mode of the call ("short", "full", "both" or "draft").
+        estimate (Optional[int]): Prompt tokens of `messages` if the caller already counted them.
+        on_usage (Optional[Callable[[dict], None]]): Called with the usage the API reports.
+        tracer (Optional[Tracer]): Gets an LLM_REQUEST span for the call.
+
+    Yields:
+        str: Pieces of the answer as the model produces them.
+
+    Raises:
+        LLMError: If the LLM fails to generate an answer.
+    """
+    model = client.model
+    if estimate is None:
+        estimate = count_message_tokens(messages, model)
+    start = time.monotonic()
+    first_token_sec = None
+    usage = {}
+    error = "cancelled"
+    try:
+        for chunk in client.stream_chat(messages, temperature, stream_options={"include_usage": True}):
+            model = chunk.get("model") or model
+            # The usage arrives in a last chunk without choices
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+                if on_usage is not None:
+                    on_usage(usage)
+            if not chunk["choices"]:
+                continue
+            token = chunk["choices"][0]["delta"].get("content")
+            if token:
+                if first_token_sec is None:
+                    first_token_sec = time.monotonic() - start
+                yield token
+        error = None
+    except Exception as exception:
+        error = str(exception) or type(exception).__name__
+        raise
+    finally:
+        total_sec = time.monotonic() - start
+        if tracer is not None:
+            tracer.span(LLM_REQUEST, start, mode=mode, error=error)
+        ledger.record(
+            CallRecord(
+                mode,
+                model,
+                estimate,
+                usage.get("prompt_tokens"),
+                cached_prompt_tokens(usage),
+                usage.get("completion_tokens", 0),
+                total_sec,
+                first_token_sec,
+                error,
+            )
+        )
+        logger.debug(
+            f"{mode} completion: first token after {(first_token_sec or total_sec) * 1000:.0f} ms, "
+            f"done after {total_sec * 1000:.0f} ms"
+        )
 
 
 class LLMInference:
-    def __init__(self):
+    def __init__(self, client: Optional["LLMClient"] = None, knowledge: Optional[KnowledgeBase] = None):
+        # The SDK and aiohttp take a while to import; `batch_tokens` users don't need them
+        import openai
+        from src.llm_client import create_llm_client
+
         openai.api_key = OPENAI_API_KEY
+        # Pooled connections, deadlines, retries and optional hedging; see src/llm_client.py
+        self.client = client or create_llm_client()
+        # The call script; each prompt carries its core and the parts relevant to the question
+        self.knowledge = knowledge or load_script(SCRIPT_FILE)
+        # Tokens, latency and cost of every call by mode, also counted in the process-wide `usage_ledger`
+        self.usage = UsageLedger("llm", parent=usage_ledger)
 
     def generate_answer(self, transcript: str, short_answer: bool = True, temperature: float = 0.4) -> str:
         """
@@ -64,26 +158,67 @@ class LLMInference:
             ```
 
         Raises:
-            Exception: If the LLM fails to generate an answer.
+            LLMError: If the LLM fails to generate an answer.
         """
-        if short_answer:
-            system_prompt = SYSTEM_PROMPT + SHORTER_INSTRACT
-        else:
-            system_prompt = SYSTEM_PROMPT + LONGER_INSTRACT
+        messages = self._build_messages(transcript, short_answer)
+        mode = "short" if short_answer else "full"
+        estimate = count_message_tokens(messages, self.client.model)
+        start = time.monotonic()
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4o-mini",
-                temperature=temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": transcript},
-                ],
-            )
+            response = self.client.chat(messages, temperature)
         except Exception as error:
             logger.error(f"Can't generate answer: {error}")
+            self.usage.record(
+                CallRecord(mode, self.client.model, estimate, latency_sec=time.monotonic() - start, error=str(error))
+            )
             raise error
+        usage = response["usage"]
+        self._log_usage(usage)
+        self.usage.record(
+            CallRecord(
+                mode,
+                response.get("model") or self.client.model,
+                estimate,
+                usage["prompt_tokens"],
+                cached_prompt_tokens(usage),
+                usage["completion_tokens"],
+                time.monotonic() - start,
+            )
+        )
         return response["choices"][0]["message"]["content"]
 
+    def generate_answer_stream(
+        self, transcript: str, short_answer: bool = True, temperature: float = 0.4
+    ) -> Iterator[str]:
+        """
+        Streaming variant of `generate_answer` that yields the answer token by token.
+
+        Args:
+            transcript (str): The transcript to generate an answer from.
+            short_answer (bool): Whether to generate a short answer or not. Defaults to True.
+            temperature (float): The temperature parameter for controlling the randomness of the generated answer.
+
+        Yields:
+            str: Pieces of the answer as the model produces them.
+
+        Raises:
+            LLMError: If the LLM fails to generate an answer.
+        """
+        messages = self._build_messages(transcript, short_answer)
+        mode = "short" if short_answer else "full"
+        try:
+            yield from stream_completion(self.client, messages, temperature, self.usage, mode, on_usage=self._log_usage)
+        except Exception as error:
+            logger.error(f"Can't generate answer: {error}")
+            raise error
+
+    def _build_messages(self, transcript: str, short_answer: bool) -> list:
+        return build_messages(transcript, "short" if short_answer else "full", knowledge=self.knowledge)
+
+    def _log_usage(self, usage: dict) -> None:
+        logger.debug(f"Prompt: {usage['prompt_tokens']} tokens, {cached_prompt_tokens(usage)} cached")
+
+
 # llm = LLMInference()
 
-# test = 
\ No newline at end of file
+# test =
@@ -0,0 +1,406 @@
+"""Asyncio client for OpenAI-compatible chat completions."""
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import aiohttp
+import numpy as np
+import openai
+from loguru import logger
+
+from .constants import LLM_HEDGE, LLM_HEDGE_QUANTILE, LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES
+from .constants import LLM_MODEL, LLM_RETRY_BACKOFF_SEC, LLM_TIMEOUT_SEC
+
+# Status codes worth another attempt: rate limiting and server-side failures
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """An answer request failed for good: a non-retryable error, or retries and deadline used up."""
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class _Stream:
+    """An open streaming response whose first chunk has already been read."""
+
+    def __init__(self, response: aiohttp.ClientResponse, first: dict, release: Callable[[], None]) -> None:
+        self.response = response
+        self.first = first
+        self._release = release
+        self._closed = False
+
+    async def chunks(self) -> AsyncIterator[dict]:
+        try:
+            yield self.first
+            async for line in self.response.content:
+                chunk = _parse_event(line)
+                if chunk is None:
+                    continue
+                if chunk == "[DONE]":
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        # Releasing an unfinished response closes its connection instead of reusing it
+        if not self._closed:
+            self._closed = True
+            self.response.release()
+            self._release()
+
+
+def _parse_event(line: bytes):
+    line = line.strip()
+    if not line.startswith(b"data:"):
+        return None
+    data = line[5:].strip()
+    if data == b"[DONE]":
+        return "[DONE]"
+    return json.loads(data)
+
+
+class AsyncLLMClient:
+    """
+    Chat completions over a pooled aiohttp session, with a concurrency limit, deadlines, jittered
+    retries and optional hedging.
+
+    Every request gets `timeout_sec` in total, across all its attempts. Connection errors,
+    timeouts and retryable statuses are retried up to `max_retries` times after a jittered
+    exponential backoff; other errors fail at once. For streams only the wait for the first
+    chunk is retried, since tokens already handed out can't be taken back.
+
+    With `hedge=True`, an attempt that has not produced a response (or a stream's first chunk)
+    after the `hedge_quantile` latency of recent requests gets a duplicate; whichever answers
+    first wins and the other is cancelled. Until `hedge_min_samples` latencies are known the
+    delay is `hedge_after_sec`.
+
+    The API base and key default to `openai.api_base` / `openai.api_key` at request time.
+
+    Example:
+        ```python
+        async with AsyncLLMClient(hedge=True) as client:
+            response = await client.chat(messages, temperature=0.2)
+            async for chunk in client.stream_chat(messages, temperature=0.2):
+                print(chunk["choices"][0]["delta"].get("content", ""), end="")
+        ```
+    """
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        max_concurrency: int = 8,
+        timeout_sec: float = 20.0,
+        max_retries: int = 2,
+        backoff_sec: float = 0.25,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_after_sec: float = 1.0,
+        hedge_min_samples: int = 20,
+    ) -> None:
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout_sec = timeout_sec
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_after_sec = hedge_after_sec
+        self.hedge_min_samples = hedge_min_samples
+
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        # Time to response (or to a stream's first chunk) of recent successful attempts
+        self._latencies = deque(maxlen=200)
+
+        self._session = None
+        self._semaphore = None
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session and semaphore belong to the loop that uses them
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency * 2, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        """Closes the pooled connections; a later request opens a new session."""
+        if self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off."""
+        if not self.hedge:
+            return None
+        if len(self._latencies) < self.hedge_min_samples:
+            return self.hedge_after_sec
+        return float(np.quantile(self._latencies, self.hedge_quantile))
+
+    def _request_args(self, messages: list, temperature: float, stream: bool, **params) -> dict:
+        api_base = (self.api_base or openai.api_base).rstrip("/")
+        payload = {"model": self.model, "messages": messages, "temperature": temperature, **params}
+        if stream:
+            payload["stream"] = True
+        return {
+            "url": f"{api_base}/chat/completions",
+            "json": payload,
+            "headers": {"Authorization": f"Bearer {self.api_key or openai.api_key}"},
+        }
+
+    async def _post(self, request_args: dict) -> aiohttp.ClientResponse:
+        session = self._ensure_session()
+        self.attempts += 1
+        response = await session.post(
+            **request_args, timeout=aiohttp.ClientTimeout(total=None, sock_read=self.timeout_sec)
+        )
+        if response.status in RETRYABLE_STATUSES:
+            body = await response.text()
+            response.release()
+            raise _RetryableError(f"HTTP {response.status}: {body[:200]}")
+        if response.status >= 400:
+            body = await response.text()
+            response.release()
+            raise LLMError(f"HTTP {response.status}: {body[:200]}")
+        return response
+
+    async def _complete_once(self, request_args: dict) -> dict:
+        start = time.monotonic()
+        async with self._semaphore:
+            response = await self._post(request_args)
+            try:
+                result = await response.json()
+            finally:
+                response.release()
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    async def _open_stream_once(self, request_args: dict) -> _Stream:
+        start = time.monotonic()
+        await self._semaphore.acquire()
+        try:
+            response = await self._post(request_args)
+            try:
+                async for line in response.content:
+                    first = _parse_event(line)
+                    if first is not None and first != "[DONE]":
+                        break
+                else:
+                    raise _RetryableError("Stream ended before its first chunk")
+            except BaseException:
+                response.release()
+                raise
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._latencies.append(time.monotonic() - start)
+        # The stream keeps its concurrency slot until it is read to the end or closed
+        return _Stream(response, first, self._semaphore.release)
+
+    async def _hedged(self, attempt: Callable[[], Awaitable], discard: Callable[[object], None]):
+        tasks = {asyncio.ensure_future(attempt())}
+        primary = next(iter(tasks))
+        delay = self.hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(attempt()))
+
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                    else:
+                        discard(task.result())
+                if winner is not None:
+                    if winner is not primary:
+                        self.hedge_wins += 1
+                    return winner.result()
+            raise error
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    # Finished while we were being cancelled; don't leak its connection
+                    discard(task.result())
+                else:
+                    task.cancel()
+
+    async def _with_retries(self, attempt: Callable[[], Awaitable], discard: Callable[[object], None]):
+        self.requests += 1
+        deadline = time.monotonic() + self.timeout_sec
+        for retry in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            try:
+                return await asyncio.wait_for(self._hedged(attempt, discard), remaining)
+            except LLMError:
+                self.failures += 1
+                raise
+            except (_RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as error:
+                backoff = self.backoff_sec * 2**retry * random.uniform(0.5, 1.5)
+                if retry == self.max_retries or time.monotonic() + backoff >= deadline:
+                    self.failures += 1
+                    raise LLMError(f"Chat completion failed after {retry + 1} attempt(s): {error!r}") from error
+                self.retries += 1
+                logger.warning(f"Chat completion attempt failed ({error!r}), retrying in {backoff:.2f} s")
+                await asyncio.sleep(backoff)
+
+    async def chat(self, messages: list, temperature: float = 0.4, **params) -> dict:
+        """
+        Requests a completion.
+
+        Args:
+            messages (list): Chat messages.
+            temperature (float): Sampling temperature.
+            **params: Further request fields, passed through.
+
+        Returns:
+            dict: The response JSON, shaped like `openai.ChatCompletion.create`'s.
+
+        Raises:
+            LLMError: If the request failed for good.
+        """
+        self._ensure_session()
+        request_args = self._request_args(messages, temperature, False, **params)
+        return await self._with_retries(lambda: self._complete_once(request_args), lambda _: None)
+
+    async def stream_chat(self, messages: list, temperature: float = 0.4, **params) -> AsyncIterator[dict]:
+        """
+        Streams a completion.
+
+        Yields:
+            dict: `chat.completion.chunk` objects, as `openai.ChatCompletion.create(stream=True)` yields them.
+
+        Raises:
+            LLMError: If no attempt produced a first chunk in time.
+        """
+        self._ensure_session()
+        request_args = self._request_args(messages, temperature, True, **params)
+        stream = await self._with_retries(lambda: self._open_stream_once(request_args), lambda extra: extra.close())
+        async for chunk in stream.chunks():
+            yield chunk
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failures": self.failures,
+            "hedge_delay_sec": self.hedge_delay(),
+        }
+
+
+class LLMClient:
+    """
+    Blocking facade over `AsyncLLMClient` for the threaded frontends.
+
+    All requests run on one private event loop thread sharing one connection pool, so a
+    waiting request holds no thread of its own beyond its caller.
+
+    Example:
+        ```python
+        with LLMClient(AsyncLLMClient(timeout_sec=10)) as client:
+            for chunk in client.stream_chat(messages, temperature=0.2):
+                ...
+        ```
+    """
+
+    def __init__(self, client: Optional[AsyncLLMClient] = None) -> None:
+        self.client = client or AsyncLLMClient()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True).start()
+
+    def chat(self, messages: list, temperature: float = 0.4, **params) -> dict:
+        """Blocking `AsyncLLMClient.chat`."""
+        return asyncio.run_coroutine_threadsafe(self.client.chat(messages, temperature, **params), self._loop).result()
+
+    def stream_chat(self, messages: list, temperature: float = 0.4, **params) -> Iterator[dict]:
+        """Blocking `AsyncLLMClient.stream_chat`; closing the iterator early cancels the request."""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump() -> None:
+            try:
+                async for chunk in self.client.stream_chat(messages, temperature, **params):
+                    chunks.put(chunk)
+            except Exception as error:
+                chunks.put(error)
+            finally:
+                chunks.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    @property
+    def model(self) -> str:
+        return self.client.model
+
+    def stats(self) -> dict:
+        return self.client.stats()
+
+    def close(self) -> None:
+        """Closes the connections and stops the event loop thread."""
+        if self._loop.is_closed() or not self._loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self) -> "LLMClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def create_llm_client() -> LLMClient:
+    """A blocking client configured from the LLM_* constants."""
+    return LLMClient(
+        AsyncLLMClient(
+            model=LLM_MODEL,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            timeout_sec=LLM_TIMEOUT_SEC,
+            max_retries=LLM_MAX_RETRIES,
+            backoff_sec=LLM_RETRY_BACKOFF_SEC,
+            hedge=LLM_HEDGE,
+            hedge_quantile=LLM_HEDGE_QUANTILE,
+        )
+    )
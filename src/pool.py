@@ -0,0 +1,138 @@
+"""Pool of pre-opened Deepgram live connections."""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from loguru import logger
+
+
+class DeepgramConnectionPool:
+    """
+    Keeps `size` started Deepgram live connections ready for `checkout`.
+
+    Pooled connections are opened with fixed LiveOptions and kept alive by the client's
+    keepalive option while idle; connections idle for longer than `max_idle_sec` are closed
+    and replaced. A checked-out connection belongs to the caller and is never returned to
+    the pool: the caller finishes it when the call ends and a background thread opens a
+    replacement.
+
+    Example:
+        ```python
+        pool = DeepgramConnectionPool(deepgram_client, options, size=2, prepare=register_handlers)
+        pool.start()
+        connection = pool.checkout() or open_connection_the_slow_way()
+        ```
+    """
+
+    def __init__(
+        self,
+        client,
+        options,
+        size: int = 2,
+        max_idle_sec: float = 60.0,
+        prepare: Optional[Callable[[object], None]] = None,
+    ) -> None:
+        self.client = client
+        self.options = options
+        self.size = size
+        self.max_idle_sec = max_idle_sec
+        # Registers handlers that do not depend on which session checks the connection out
+        self._prepare = prepare
+
+        self.hits = 0
+        self.misses = 0
+
+        self._ready = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._filler = threading.Thread(target=self._fill, name="deepgram-pool", daemon=True)
+
+    def start(self) -> "DeepgramConnectionPool":
+        if not self._filler.is_alive():
+            self._filler.start()
+        return self
+
+    def _open(self):
+        connection = self.client.listen.websocket.v("1")
+        if self._prepare is not None:
+            self._prepare(connection)
+        if not connection.start(self.options):
+            return None
+        return connection
+
+    def _expire_idle(self) -> None:
+        now = time.monotonic()
+        while self._ready and now - self._ready[0][1] > self.max_idle_sec:
+            connection, _ = self._ready.popleft()
+            threading.Thread(target=connection.finish, daemon=True).start()
+
+    def _fill(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._ready) < self.size, timeout=1.0)
+                if self._closed:
+                    return
+                self._expire_idle()
+                if len(self._ready) >= self.size:
+                    continue
+            try:
+                connection = self._open()
+            except Exception as error:
+                connection = None
+                logger.error(f"Can't open pooled Deepgram connection: {error}")
+            if connection is None:
+                time.sleep(1.0)
+                continue
+            with self._cond:
+                if self._closed:
+                    connection.finish()
+                    return
+                self._ready.append((connection, time.monotonic()))
+
+    def checkout(self, options=None):
+        """
+        Takes a ready connection, if there is one.
+
+        Args:
+            options: The LiveOptions the caller needs. A pool opened with different options
+                can't serve the call and returns None.
+
+        Returns:
+            A started connection, or None on a pool miss.
+        """
+        with self._cond:
+            connection = None
+            if options is None or options == self.options:
+                self._expire_idle()
+                while self._ready and connection is None:
+                    candidate, _ = self._ready.popleft()
+                    if candidate.is_connected():
+                        connection = candidate
+                    else:
+                        # Stops its keepalive and listen threads, like an expired connection
+                        threading.Thread(target=candidate.finish, daemon=True).start()
+            if connection is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._cond.notify_all()
+            return connection
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            ready, self._ready = list(self._ready), deque()
+            self._cond.notify_all()
+        for connection, _ in ready:
+            connection.finish()
+
+    def stats(self) -> dict:
+        with self._cond:
+            total = self.hits + self.misses
+            return {
+                "ready": len(self._ready),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,96 @@
+"""
+Prompt layout shared by the answer generators.
+
+Provider-side prompt caching only reuses the longest prefix a request shares with earlier ones,
+so requests are laid out from the most to the least stable part:
+    1. the instructions and the core of the call script, identical in every request of every call and mode;
+    2. the conversation history as chat messages, which only grows until older turns are folded;
+    3. the caller details collected so far (see src/slots.py);
+    4. the script sections and FAQ entries retrieved for this turn (see src/knowledge.py);
+    5. the caller's transcript;
+    6. the short/full answer instruction.
+"""
+from typing import List, Optional
+
+from .constants import KNOWLEDGE_TOP_K
+from .knowledge import KnowledgeBase, Snippet
+from .scheduler import FULL_MARKER, SHORT_MARKER
+
+SYSTEM_PROMPT = """You will receive an audio transcription of the question. It may not be complete.
+Treat this as a phone call you are the sales agent. The audio you receive is the users response on the call.
+You need to understand the question and write an answer to it based on the following script.
+With each question you also get the parts of the script and FAQ that are relevant to it.
+
+The conversation so far follows as chat messages, starting with a summary of earlier turns once the call gets long.
+Don't ask for the same information multiple times and/or request redundant information if the info is in the message history
+or among the known facts about the caller.
+
+Script:
+"""
+KNOWLEDGE_HEADER = "Relevant parts of the script and FAQ:\n"
+
+SHORTER_INSTRACT = "Concisely respond, limiting your answer to 70 words."
+LONGER_INSTRACT = (
+    "Before answering, take a deep breath and think one step at a time. Believe the answer in no more than 150 words."
+)
+COMBINED_INSTRACT = (
+    f"Write two answers. First a line with only {SHORT_MARKER}, then a concise answer limited to 70 words. "
+    f"Then a line with only {FULL_MARKER}, then the full answer: take a deep breath and think one step at a time, "
+    "in no more than 150 words."
+)
+ANSWER_INSTRACTS = {"short": SHORTER_INSTRACT, "full": LONGER_INSTRACT, "both": COMBINED_INSTRACT}
+
+
+def system_prompt(knowledge: Optional[KnowledgeBase] = None) -> str:
+    """The static system message: the agent instructions and the always-sent core of the script."""
+    return SYSTEM_PROMPT + (knowledge.core if knowledge is not None else "")
+
+
+def build_messages(
+    transcript: str,
+    mode: str,
+    history_messages: Optional[list] = None,
+    knowledge: Optional[KnowledgeBase] = None,
+    snippets: Optional[List[Snippet]] = None,
+    facts: str = "",
+) -> list:
+    """
+    Lays out an answer request.
+
+    Args:
+        transcript (str): The caller's query.
+        mode (str): "short", "full" or "both", see `ANSWER_INSTRACTS`.
+        history_messages (Optional[list]): Earlier turns as chat messages, oldest first.
+        knowledge (Optional[KnowledgeBase]): The call script whose core goes into the system message.
+        snippets (Optional[List[Snippet]]): Script parts retrieved for this turn. Defaults to the
+            `KNOWLEDGE_TOP_K` best matches of `transcript` in `knowledge`.
+        facts (str): Caller details collected so far, as rendered by `SlotState.render`.
+
+    Returns:
+        list: Chat messages with the static script first and the instruction last.
+
+    Example:
+        ```python
+        messages = build_messages(transcript, "short", history.messages(), knowledge)
+        ```
+    """
+    if snippets is None and knowledge is not None:
+        snippets = knowledge.search(transcript, KNOWLEDGE_TOP_K)
+    retrieved = []
+    if snippets:
+        text = KNOWLEDGE_HEADER + "\n\n".join(snippet.render() for snippet in snippets)
+        retrieved.append({"role": "system", "content": text})
+    return [
+        {"role": "system", "content": system_prompt(knowledge)},
+        *(history_messages or []),
+        *([{"role": "system", "content": facts}] if facts else []),
+        *retrieved,
+        {"role": "user", "content": transcript},
+        {"role": "system", "content": ANSWER_INSTRACTS[mode]},
+    ]
+
+
+def cached_prompt_tokens(usage: dict) -> int:
+    """Prompt tokens the provider served from its prompt cache, 0 if it does not say."""
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or 0
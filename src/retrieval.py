@@ -0,0 +1,71 @@
+"""Lexical BM25 index over short texts."""
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+STOPWORDS = frozenset(
+    """a about am an and are as at be been but by can could do does for from had has have hi hello how i i'm
+    if in is it it's me my of on or our so that the their them then there this to us was we what when where
+    which who will with would you your yes yeah ok okay um uh like just please hey guys""".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words with a crude plural strip, so "fees" matches "fee"."""
+    tokens = []
+    for word in re.findall(r"[a-z0-9$]+(?:'[a-z]+)?", text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents.
+
+    Per-term weights are computed once at build time, so a query costs one dictionary lookup
+    per query term plus a small sum, i.e. microseconds for FAQ-sized corpora.
+
+    Example:
+        ```python
+        index = BM25Index(["What hours are you open?", "Is there a service fee?"])
+        index.search("when are you open", k=1)  # [(0, 1.23)]
+        ```
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.documents = documents
+        tokenized = [tokenize(document) for document in documents]
+        average_length = sum(len(tokens) for tokens in tokenized) / max(len(tokenized), 1) or 1.0
+
+        document_frequency = Counter(term for tokens in tokenized for term in set(tokens))
+        count = len(documents)
+        self._postings = defaultdict(list)
+        # Score of each document against itself: the most a query can reach on that document
+        self.self_scores = [0.0] * count
+        for index, tokens in enumerate(tokenized):
+            norm = k1 * (1 - b + b * len(tokens) / average_length)
+            for term, frequency in Counter(tokens).items():
+                idf = math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                weight = idf * frequency * (k1 + 1) / (frequency + norm)
+                self._postings[term].append((index, weight))
+                self.self_scores[index] += weight
+
+    def score_tokens(self, tokens: List[str]) -> dict:
+        scores = defaultdict(float)
+        for term in set(tokens):
+            for index, weight in self._postings.get(term, ()):
+                scores[index] += weight
+        return scores
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """The `k` best matching documents as (index, score), best first; unmatched ones are left out."""
+        scores = self.score_tokens(tokenize(query))
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._postings
@@ -0,0 +1,172 @@
+"""Single-flight scheduling of answer completions."""
+import threading
+from typing import Callable, Hashable, Iterator, Optional
+
+from loguru import logger
+
+# Section markers of a combined completion that carries the short and the full answer
+SHORT_MARKER = "[SHORT]"
+FULL_MARKER = "[FULL]"
+
+
+class TokenStream:
+    """
+    Drains a token iterator on a background thread into a buffer any number of readers follow.
+
+    Example:
+        ```python
+        stream = TokenStream(completion_tokens())
+        first = "".join(stream.follow())
+        second = "".join(stream.follow())  # same tokens, no second request
+        ```
+    """
+
+    def __init__(self, tokens: Iterator[str], on_done: Optional[Callable[[], None]] = None) -> None:
+        self.tokens = []
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self._source = tokens
+        self._on_done = on_done
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="token-stream", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            for token in self._source:
+                with self._cond:
+                    if self.cancelled:
+                        break
+                    self.tokens.append(token)
+                    self._cond.notify_all()
+        except Exception as error:
+            self.error = error
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+            if self._on_done is not None:
+                self._on_done()
+
+    def cancel(self) -> int:
+        """Stops reading the source and returns how many tokens it had produced."""
+        with self._cond:
+            self.cancelled = True
+            return len(self.tokens)
+
+    def follow(self) -> Iterator[str]:
+        """Yields the tokens produced so far, then the rest as they arrive."""
+        sent = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.done or len(self.tokens) > sent)
+                pending = self.tokens[sent:]
+                finished = self.done
+            yield from pending
+            sent += len(pending)
+            if finished and sent == len(self.tokens):
+                break
+        if self.error is not None:
+            raise self.error
+
+
+class AnswerScheduler:
+    """
+    Coalesces identical in-flight answer requests into one completion.
+
+    Requests are identified by a key the caller builds from everything that determines the
+    answer (transcript, history version, mode, temperature). A request whose key is already in
+    flight follows the running completion instead of starting another one; once a completion
+    ends its key is forgotten.
+
+    Example:
+        ```python
+        scheduler = AnswerScheduler()
+        key = (transcript, history.version, "short", 0.2)
+        tokens = scheduler.submit(key, lambda: completion_tokens(transcript)).follow()
+        ```
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, start: Callable[[], Iterator[str]]) -> TokenStream:
+        """
+        Returns the completion in flight for `key`, starting it with `start()` if there is none.
+
+        Returns:
+            TokenStream: The completion; each `follow()` replays its tokens from the first one on.
+        """
+        with self._lock:
+            self.requests += 1
+            stream = self._in_flight.get(key)
+            if stream is None:
+                stream = TokenStream(start(), on_done=lambda: self._forget(key))
+                self._in_flight[key] = stream
+            else:
+                self.coalesced += 1
+                logger.debug(f"Coalesced answer request into the one in flight: {self.stats()}")
+        return stream
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+def split_section(tokens: Iterator[str], start_marker: str, end_marker: Optional[str] = None) -> Iterator[str]:
+    """
+    Yields the part of a token stream between two markers, as the tokens arrive.
+
+    Markers may be split across tokens, so up to one marker length of text is held back until
+    it is known not to start the end marker. Whitespace around the section is dropped. If the start marker never shows up, the whole
+    stream is yielded at the end rather than nothing.
+
+    Args:
+        tokens (Iterator[str]): The raw completion tokens.
+        start_marker (str): Text that opens the section.
+        end_marker (Optional[str]): Text that closes it; None reads to the end of the stream.
+
+    Example:
+        ```python
+        stream = TokenStream(completion_tokens())
+        short = split_section(stream.follow(), SHORT_MARKER, FULL_MARKER)
+        full = split_section(stream.follow(), FULL_MARKER)
+        ```
+    """
+    buffer = ""
+    started = False
+    emitted = False
+    for token in tokens:
+        buffer += token
+        if not started:
+            index = buffer.find(start_marker)
+            if index < 0:
+                continue
+            buffer = buffer[index + len(start_marker) :]
+            started = True
+        if not emitted:
+            buffer = buffer.lstrip()
+        if end_marker is not None:
+            index = buffer.find(end_marker)
+            if index >= 0:
+                if buffer[:index].rstrip():
+                    yield buffer[:index].rstrip()
+                return
+            # Trailing whitespace is held back too, it may be all that precedes the end marker
+            cut = len(buffer[: max(len(buffer) - len(end_marker) + 1, 0)].rstrip())
+            ready, buffer = buffer[:cut], buffer[cut:]
+        else:
+            ready, buffer = buffer, ""
+        if ready:
+            emitted = True
+            yield ready
+    if not started:
+        buffer = buffer.strip()
+    if buffer.rstrip():
+        yield buffer.rstrip()
@@ -0,0 +1,275 @@
+"""
+Headless multi-call server.
+
+Each TCP connection is one call. The client streams int16 PCM and gets transcript segments and
+answers back on the same socket. Every frame is a 1-byte kind, a 4-byte big-endian payload
+length and the payload:
+    - b"A": interleaved int16 PCM audio (client -> server).
+    - b"J": a UTF-8 JSON message (both directions).
+
+Client messages: {"type": "start", "sample_rate": 16000, "channels": 1},
+{"type": "stop", "short_answer": true, "temperature": 0.3}, {"type": "usage"}, {"type": "trace"} and
+{"type": "close"}. A stop message with "both": true gets the short answer in "text" and the full one in
+"full", from one completion.
+Server messages: "started", "segment", "slots", "transcript", "answer", "usage", "trace" and "error".
+A malformed or out-of-turn message, e.g. a second "start" before "stop", gets an "error" and the
+call stays open; so does a "stop" whose answer fails, e.g. on an LLM timeout.
+"usage" has the LLM token, latency and cost totals by answer mode of the call ("session") and of the
+server ("process"). "trace" has the call's stage spans per turn with their p50/p95/p99 ("session") and
+the server's percentiles ("process"). "slots" carries the caller details parsed so far, e.g.
+{"type": "slots", "slots": {"name": "Dana Whitfield", "email": null, ...}}, as soon as a segment fills
+one, well before the answer.
+
+Usage:
+    python -m src.server --host 127.0.0.1 --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+from .constants import IO_WORKERS_PER_CORE, SERVER_HOST, SERVER_PORT
+from .accounting import usage_ledger
+from .tracing import tracer
+from .threads import TranscriptionSession
+
+FRAME_HEADER = struct.Struct("!cI")
+AUDIO_FRAME = b"A"
+JSON_FRAME = b"J"
+MAX_FRAME_BYTES = 1 << 20
+
+
+def encode_frame(kind: bytes, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_json(message: dict) -> bytes:
+    return encode_frame(JSON_FRAME, json.dumps(message).encode())
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple:
+    """
+    Reads one frame.
+
+    Returns:
+        tuple: (kind, payload).
+
+    Raises:
+        asyncio.IncompleteReadError: If the peer closed the connection.
+        ValueError: If the frame is larger than MAX_FRAME_BYTES.
+    """
+    kind, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return kind, await reader.readexactly(length)
+
+
+class TranscriptionServer:
+    """
+    Runs one TranscriptionSession per connection on shared, per-core sized worker pools.
+
+    CPU-bound audio stages run on `dsp_pool` (one worker per core). Blocking network calls,
+    i.e. the Deepgram handshake, finalize and the LLM request, run on `io_pool`
+    (`io_workers_per_core` workers per core).
+
+    Example:
+        ```python
+        server = TranscriptionServer(port=8765)
+        asyncio.run(server.serve_forever())
+        ```
+    """
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        deepgram_client=None,
+        io_workers_per_core: int = IO_WORKERS_PER_CORE,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.deepgram_client = deepgram_client
+        self.cores = os.cpu_count() or 1
+        self.dsp_pool = ThreadPoolExecutor(self.cores, thread_name_prefix="dsp")
+        self.io_pool = ThreadPoolExecutor(self.cores * io_workers_per_core, thread_name_prefix="io")
+
+        self.active_calls = 0
+        self.completed_turns = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> int:
+        """Starts listening and returns the bound port (useful with port=0)."""
+        self._server = await asyncio.start_server(self._handle_call, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving on {self.host}:{self.port} with {self.cores} core(s)")
+        return self.port
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.dsp_pool.shutdown(wait=False)
+        self.io_pool.shutdown(wait=False)
+
+    async def _handle_call(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        session = None
+        channels = 1
+        self.active_calls += 1
+
+        def send(message: dict) -> None:
+            if not writer.is_closing():
+                writer.write(encode_json(message))
+
+        def on_segment(sentence: str) -> None:
+            # Called from the Deepgram thread
+            loop.call_soon_threadsafe(send, {"type": "segment", "text": sentence})
+
+        def on_slots(slots: dict) -> None:
+            # Called from the Deepgram thread, or from an I/O worker for the transcript of a turn
+            loop.call_soon_threadsafe(send, {"type": "slots", "slots": slots})
+
+        try:
+            while True:
+                try:
+                    kind, payload = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                if kind == AUDIO_FRAME:
+                    if session is None or not session.is_running:
+                        continue
+                    if len(payload) % (2 * channels):
+                        send({"type": "error", "message": f"Audio frame is not whole {channels}-channel int16 frames"})
+                        continue
+                    chunk = np.frombuffer(payload, dtype=np.int16).reshape(-1, channels) / np.float32(32768)
+                    await loop.run_in_executor(self.dsp_pool, session.push_audio, chunk)
+                    continue
+
+                try:
+                    message = json.loads(payload)
+                    message_type = message["type"]
+                except (ValueError, KeyError, TypeError) as error:
+                    send({"type": "error", "message": f"Malformed message: {error!r}"})
+                    await writer.drain()
+                    continue
+
+                if message_type == "start":
+                    if session is not None and session.turn_active:
+                        send({"type": "error", "message": "A turn is already in progress, stop it first"})
+                        await writer.drain()
+                        continue
+                    try:
+                        sample_rate = int(message["sample_rate"])
+                        new_channels = int(message.get("channels", 1))
+                    except (KeyError, TypeError, ValueError):
+                        send({"type": "error", "message": "start needs an integer sample_rate and channels"})
+                        await writer.drain()
+                        continue
+                    if new_channels < 1:
+                        send({"type": "error", "message": f"Invalid channel count {new_channels}"})
+                        await writer.drain()
+                        continue
+                    channels = new_channels
+                    if session is None or session.sample_rate != sample_rate:
+                        session = TranscriptionSession(
+                            self.deepgram_client, sample_rate=sample_rate, on_segment=on_segment, on_slots=on_slots
+                        )
+                    try:
+                        started = await loop.run_in_executor(self.io_pool, session.start_transcription)
+                    except ValueError as error:
+                        # e.g. a sample rate the resampler can't bring down to the Deepgram rate
+                        send({"type": "error", "message": str(error)})
+                        await writer.drain()
+                        continue
+                    if started:
+                        send({"type": "started"})
+                    else:
+                        send({"type": "error", "message": "Failed to connect to Deepgram"})
+                elif message_type == "stop":
+                    if session is None or not session.turn_active:
+                        send({"type": "error", "message": "No call in progress"})
+                        continue
+                    transcript = await loop.run_in_executor(self.io_pool, session.stop_transcription)
+                    send({"type": "transcript", "text": transcript})
+                    if transcript.strip():
+                        start = time.monotonic()
+                        try:
+                            if message.get("both", False):
+                                answer, full = await loop.run_in_executor(
+                                    self.io_pool, session.generate_answers, transcript, message.get("temperature", 0.3)
+                                )
+                                reply = {"type": "answer", "text": answer, "full": full}
+                            else:
+                                answer = await loop.run_in_executor(
+                                    self.io_pool,
+                                    session.generate_answer,
+                                    transcript,
+                                    message.get("short_answer", True),
+                                    message.get("temperature", 0.3),
+                                )
+                                reply = {"type": "answer", "text": answer}
+                        except Exception as error:
+                            # An LLM timeout or error fails this answer, not the call
+                            logger.error(f"Answer failed: {error}")
+                            send({"type": "error", "message": f"Answer failed: {error}"})
+                            await writer.drain()
+                            continue
+                        send({**reply, "llm_sec": time.monotonic() - start})
+                    self.completed_turns += 1
+                elif message_type == "usage":
+                    send(
+                        {
+                            "type": "usage",
+                            "session": session.usage.summary() if session is not None else {},
+                            "process": usage_ledger.summary(),
+                        }
+                    )
+                elif message_type == "trace":
+                    send(
+                        {
+                            "type": "trace",
+                            "session": session.tracer.as_dict() if session is not None else {},
+                            "process": tracer.summary(),
+                        }
+                    )
+                elif message_type == "close":
+                    break
+                await writer.drain()
+        except Exception as error:
+            logger.error(f"Call failed: {error}")
+            send({"type": "error", "message": str(error)})
+        finally:
+            self.active_calls -= 1
+            if session is not None and session.turn_active:
+                # Closes the turn even if a Deepgram error already stopped its capture
+                await loop.run_in_executor(self.io_pool, session.stop_transcription)
+            if session is not None:
+                # Hands the last turn to the process-wide tracer
+                session.tracer.end_turn()
+            writer.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    asyncio.run(TranscriptionServer(args.host, args.port).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
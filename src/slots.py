@@ -0,0 +1,285 @@
+"""Local slot filling: the caller details the script collects, extracted from transcript segments."""
+import datetime
+import re
+from typing import Callable, Dict, List, Optional
+
+# The details the script asks for, in the order it asks for them
+SLOTS = ("problem", "system_age", "name", "address", "callback_number", "email")
+SLOT_LABELS = {
+    "problem": "Problem",
+    "system_age": "System age",
+    "name": "Name",
+    "address": "Address",
+    "callback_number": "Callback number",
+    "email": "Email",
+}
+
+NUMBER_WORDS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+    "twenty": 20,
+    "twenty five": 25,
+    "thirty": 30,
+}
+DIGIT_WORDS = {
+    "zero": "0",
+    "oh": "0",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+}
+
+PROBLEM_CUES = re.compile(
+    r"\b(?:not (?:cooling|heating|working|turning on|blowing)|stopped (?:cooling|heating|working)|"
+    r"(?:won't|doesn't|does not|will not|isn't|is not) (?:turn on|work|working|cool|cooling|heat|heating|start)|"
+    r"broken|broke|leak(?:ing|s)?|noise|noisy|rattl\w+|smell\w*|frozen|freezing up|iced? up|"
+    r"blowing (?:warm|hot|cold)|(?:warm|hot) air|short cycling|keeps (?:turning off|shutting off|tripping)|"
+    r"tripp\w+ the breaker|no air|weak airflow|making a \w+ sound)\b",
+    re.IGNORECASE,
+)
+EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+SPOKEN_DOT = re.compile(r"\s+dot\s+", re.IGNORECASE)
+SPOKEN_EMAIL = re.compile(
+    r"\b([a-z0-9][\w.+-]*(?:\s+dot\s+[a-z0-9][\w-]*)*)\s+at\s+([a-z0-9-]+(?:\s+dot\s+[a-z0-9-]+)*)"
+    r"\s+dot\s+(com|net|org|edu|gov|io|us|co)\b",
+    re.IGNORECASE,
+)
+PHONE = re.compile(r"(?<![\d$])(?:\+?1[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)?\d{3}[\s.-]?\d{4}(?!\d)")
+# A bare run of digits only counts as a phone number shortly after one of these
+PHONE_CUE = re.compile(
+    r"\b(?:(?:phone|cell|mobile|callback|contact|home|work|best|my) number|call me|reach me|text me|call back)\b"
+    r"\D{0,20}$",
+    re.IGNORECASE,
+)
+DIGIT_WORD = r"(?:zero|oh|one|two|three|four|five|six|seven|eight|nine)"
+SPOKEN_DIGITS = re.compile(rf"\b(?:{DIGIT_WORD}[\s,-]+){{6,}}{DIGIT_WORD}\b", re.IGNORECASE)
+NAME_WORD = r"[A-Z][a-z'-]+"
+NAME = re.compile(
+    # ASR output may be lowercase after an explicit "my name is"
+    r"\b(?:[Mm]y name is|[Mm]y name's|[Nn]ame is)\s+([A-Za-z][a-z'-]+(?:\s+[A-Za-z][a-z'-]+)?)"
+    # Elsewhere only a name that ends the clause: "I'm Dana." or "this is Dana calling", not "I'm Going to"
+    rf"|\b(?:[Tt]his is|I'm|I am|[Ii]t's)\s+({NAME_WORD}(?:\s+{NAME_WORD})?)"
+    r"(?=\s*(?:[,.!?]|$)|\s+(?:and|calling|from|here|speaking|with)\b)"
+)
+STREET = (
+    r"Street|St|Avenue|Ave|Road|Rd|Lane|Ln|Drive|Dr|Court|Ct|Boulevard|Blvd|Way|Place|Pl|Circle|Cir|"
+    r"Terrace|Parkway|Pkwy|Highway|Hwy|Trail|Loop"
+)
+ADDRESS = re.compile(
+    rf"\b\d{{1,6}}(?:\s+[A-Za-z0-9][\w'-]*){{1,4}}?\s+(?i:{STREET})\b\.?"
+    r"(?:,?\s+(?i:apt|apartment|unit|suite|#)\.?\s*\w+)?(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)?"
+)
+SPOKEN_ADDRESS = re.compile(r"\b(?:I live at|my address is|address is|located at)\s+([^.?!]+)", re.IGNORECASE)
+NUMBER_WORD = "|".join(word.replace(" ", r"[\s-]") for word in sorted(NUMBER_WORDS, key=len, reverse=True))
+AGE_YEARS = re.compile(
+    rf"\b(\d{{1,2}}|{NUMBER_WORD})[\s-]+(?:years?|yrs?)[\s-]+old\b",
+    re.IGNORECASE,
+)
+AGE_INSTALLED = re.compile(
+    r"\b(?:(?:installed|bought|got|replaced)(?:\s+it)?\s+(?:back\s+)?in|put(?:\s+it)?\s+in(?:\s+in)?)"
+    r"\s+((?:19|20)\d\d)\b",
+    re.IGNORECASE,
+)
+# Words that follow "this is", "I'm" or "my name is" without being a name, compared capitalised
+NOT_NAMES = frozenset(
+    "The A An My Our Your It Is Just Not Calling Really Very So About And But Or From With Here There Speaking "
+    "Sorry Going Trying Looking Wondering Having Getting Still Also Sure Fine Good Great Okay Ok Yes No Yeah "
+    "Afraid Glad Happy Home Back Out Ready Done Available Interested Worried Concerned Hot Cold Broken Late "
+    "Early Busy Confused Correct Right Wrong Actually Probably Hoping Asking Thinking "
+    "Monday Tuesday Wednesday Thursday Friday Saturday Sunday Carrier Trane Lennox Rheem Goodman".split()
+)
+
+
+def _last(matches: list) -> Optional[re.Match]:
+    return matches[-1] if matches else None
+
+
+def extract_email(text: str) -> Optional[str]:
+    match = _last(list(EMAIL.finditer(text)))
+    if match:
+        return match.group(0).lower()
+    match = _last(list(SPOKEN_EMAIL.finditer(text)))
+    if match:
+        user, domain, tld = (SPOKEN_DOT.sub(".", group) for group in match.groups())
+        return f"{user}@{domain}.{tld}".lower()
+    return None
+
+
+def extract_callback_number(text: str) -> Optional[str]:
+    # "five five five, zero one three four" -> "5550134"
+    text = SPOKEN_DIGITS.sub(
+        lambda match: "".join(DIGIT_WORDS[word.lower()] for word in re.findall(r"[a-z]+", match.group(0), re.I)), text
+    )
+    for match in reversed(list(PHONE.finditer(text))):
+        digits = re.sub(r"\D", "", match.group(0))
+        if len(digits) == 11 and digits[0] == "1":
+            digits = digits[1:]
+        if len(digits) not in (7, 10):
+            continue
+        # "555-0134" is grouped like a phone number; a bare "5550134" needs a cue such as "call me at"
+        if not re.search(r"[\s.()-]", match.group(0)) and not PHONE_CUE.search(text, 0, match.start()):
+            continue
+        if len(digits) == 10:
+            return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+        return f"{digits[:3]}-{digits[3:]}"
+    return None
+
+
+def extract_name(text: str) -> Optional[str]:
+    for match in reversed(list(NAME.finditer(text))):
+        name = match.group(1) or match.group(2)
+        words = []
+        for word in name.split():
+            if word.capitalize() in NOT_NAMES:
+                break
+            words.append(word)
+        if words:
+            return " ".join(word.capitalize() for word in words)
+    return None
+
+
+def extract_address(text: str) -> Optional[str]:
+    match = _last(list(ADDRESS.finditer(text)))
+    if match:
+        return match.group(0).rstrip(".").strip()
+    match = _last(list(SPOKEN_ADDRESS.finditer(text)))
+    if match and re.search(r"\d", match.group(1)):
+        return match.group(1).strip(" ,")
+    return None
+
+
+def extract_system_age(text: str) -> Optional[str]:
+    match = _last(list(AGE_YEARS.finditer(text)))
+    if match:
+        years = match.group(1).lower()
+        years = int(years) if years.isdigit() else NUMBER_WORDS[re.sub(r"[\s-]+", " ", years)]
+        return f"{years} years"
+    match = _last(list(AGE_INSTALLED.finditer(text)))
+    if match:
+        year = int(match.group(1))
+        return f"installed {year}, about {max(datetime.date.today().year - year, 0)} years"
+    return None
+
+
+def extract_problem(text: str) -> Optional[str]:
+    """Every sentence of `text` that describes a fault, in order."""
+    sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", text) if PROBLEM_CUES.search(sentence)]
+    return " ".join(sentences) or None
+
+
+EXTRACTORS: Dict[str, Callable[[str], Optional[str]]] = {
+    "problem": extract_problem,
+    "system_age": extract_system_age,
+    "name": extract_name,
+    "address": extract_address,
+    "callback_number": extract_callback_number,
+    "email": extract_email,
+}
+
+
+def format_slots(slots: Dict[str, Optional[str]]) -> str:
+    """Every slot on its own line, "-" where not yet known; what the desktop UIs show."""
+    return "\n".join(f"{SLOT_LABELS.get(slot, slot)}: {value or '-'}" for slot, value in slots.items())
+
+
+class SlotState:
+    """
+    The caller details collected so far, updated from each final transcript segment.
+
+    Each segment is parsed together with the previous one, so a detail Deepgram splits across
+    two segments is still found. A later value replaces an earlier one, which is how callers
+    correct themselves ("actually, my number is ..."); problem descriptions accumulate instead.
+    Feeding text again changes nothing, so a whole transcript can follow its own segments.
+
+    Example:
+        ```python
+        slots = SlotState()
+        slots.update("My name is Dana Whitfield and I live at 42 Orchard Lane.")
+        # {"name": "Dana Whitfield", "address": "42 Orchard Lane"}
+        slots.render()  # "Known facts about the caller:\n- Name: Dana Whitfield\n..."
+        ```
+    """
+
+    def __init__(
+        self, extractors: Dict[str, Callable[[str], Optional[str]]] = EXTRACTORS, max_problem_words: int = 60
+    ) -> None:
+        self.extractors = extractors
+        self.max_problem_words = max_problem_words
+        self.values: Dict[str, str] = {}
+        self._problems = []  # fault descriptions kept, oldest first
+        self._seen_problems = set()
+        self._previous_segment = ""
+        # Bumped on every change; prompts built for an older version are stale
+        self.version = 0
+
+    def update(self, segment: str) -> Dict[str, str]:
+        """
+        Extracts slots from `segment` and the segment before it.
+
+        Args:
+            segment (str): A final transcript segment, or a whole transcript.
+
+        Returns:
+            Dict[str, str]: The slots that got a new value, empty if nothing changed.
+        """
+        text = f"{self._previous_segment} {segment}".strip()
+        self._previous_segment = segment
+        changed = {}
+        for slot, extract in self.extractors.items():
+            value = extract(text)
+            if value is None:
+                continue
+            if slot == "problem":
+                value = self._merge_problem(value)
+            if value != self.values.get(slot):
+                self.values[slot] = changed[slot] = value
+        if changed:
+            self.version += 1
+        return changed
+
+    def _merge_problem(self, value: str) -> str:
+        for sentence in re.split(r"(?<=[.!?])\s+", value):
+            if sentence not in self._seen_problems:
+                self._seen_problems.add(sentence)
+                self._problems.append(sentence)
+        while len(self._problems) > 1 and len(" ".join(self._problems).split()) > self.max_problem_words:
+            self._problems.pop(0)
+        return " ".join(self._problems)
+
+    def missing(self) -> List[str]:
+        return [slot for slot in SLOTS if slot not in self.values]
+
+    def render(self) -> str:
+        """The known slots as a compact prompt block, or "" while none is known."""
+        lines = [f"- {SLOT_LABELS.get(slot, slot)}: {self.values[slot]}" for slot in SLOTS if slot in self.values]
+        return "Known facts about the caller:\n" + "\n".join(lines) if lines else ""
+
+    def display(self) -> str:
+        return format_slots(self.as_dict())
+
+    def as_dict(self) -> Dict[str, Optional[str]]:
+        """Every slot, None where not yet known; what UIs display."""
+        return {slot: self.values.get(slot) for slot in SLOTS}
@@ -0,0 +1,151 @@
+"""Speculative answer drafting from interim transcripts."""
+import re
+import threading
+from difflib import SequenceMatcher
+from typing import Callable, Iterator, Optional
+
+from loguru import logger
+
+from .scheduler import TokenStream
+
+
+def normalize_words(text: str) -> list:
+    """Lowercased words without punctuation, so smart-formatting changes don't count as divergence."""
+    return re.findall(r"[\w']+", text.lower())
+
+
+def divergence(a: list, b: list) -> float:
+    """Word-level distance between two transcripts: 0.0 when identical, 1.0 when nothing matches."""
+    if not a and not b:
+        return 0.0
+    return 1.0 - SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+class _Draft(TokenStream):
+    """An answer being generated on a background thread for one transcript hypothesis."""
+
+    def __init__(self, words: list, tokens: Iterator[str]) -> None:
+        self.words = words
+        super().__init__(tokens)
+
+
+class SpeculativeAnswerer:
+    """
+    Drafts an answer while the caller is still speaking.
+
+    `update` receives every transcript hypothesis (finals plus the current interim result).
+    Once the words that two consecutive hypotheses agree on reach `min_words`, a draft is
+    generated for them in the background. The draft is cancelled and restarted when the words
+    it was started for are rewritten by more than `max_divergence`. A transcript that merely
+    grows restarts it only once the growth settles, at a final segment, so a caller who keeps
+    talking does not start a billed completion with every interim result. When the call stops,
+    `take` hands out the draft if it still matches the final transcript, so the answer is ready
+    (or already streaming) the moment the caller stops.
+
+    Example:
+        ```python
+        speculator = SpeculativeAnswerer(lambda transcript: stream_tokens(transcript))
+        speculator.update("my air conditioner")          # interim
+        speculator.update("my air conditioner stopped")  # interim, draft starts
+        tokens = speculator.take(final_transcript) or stream_tokens(final_transcript)
+        ```
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Iterator[str]],
+        min_words: int = 4,
+        max_divergence: float = 0.2,
+    ) -> None:
+        self._generate = generate
+        self.min_words = min_words
+        self.max_divergence = max_divergence
+
+        self.drafts = 0
+        self.restarts = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_tokens = 0
+
+        self._draft = None
+        self._previous = []
+        self._lock = threading.Lock()
+
+    def update(self, transcript: str, final: bool = False) -> None:
+        """
+        Feeds the latest transcript hypothesis.
+
+        Args:
+            transcript (str): Everything heard so far, including the current interim result.
+            final (bool): Whether the whole transcript is final, i.e. no part of it can change.
+        """
+        words = normalize_words(transcript)
+        with self._lock:
+            if final:
+                stable = words
+            else:
+                # Deepgram rewrites the tail of interim results; trust only what two in a row agree on
+                stable = []
+                for previous, current in zip(self._previous, words):
+                    if previous != current:
+                        break
+                    stable.append(current)
+            self._previous = words
+
+            if len(stable) < self.min_words:
+                return
+            if self._draft is not None:
+                if self._draft.error is None and not self._outdated(self._draft, stable, final):
+                    return
+                self.wasted_tokens += self._draft.cancel()
+                self.restarts += 1
+            self.drafts += 1
+            self._draft = _Draft(stable, self._generate(" ".join(stable)))
+
+    def _outdated(self, draft: _Draft, stable: list, final: bool) -> bool:
+        # Measured on the shared prefix, growth alone is no divergence
+        if divergence(draft.words, stable[: len(draft.words)]) > self.max_divergence:
+            return True
+        return final and divergence(draft.words, stable) > self.max_divergence
+
+    def take(self, transcript: str) -> Optional[Iterator[str]]:
+        """
+        Claims the draft for the final transcript.
+
+        Returns:
+            The draft's tokens (already produced ones first) on a hit, or None on a miss, in
+            which case the caller generates the answer itself.
+        """
+        words = normalize_words(transcript)
+        with self._lock:
+            draft, self._draft = self._draft, None
+            self._previous = []
+            if draft is None:
+                return None
+            if draft.error is None and divergence(draft.words, words) <= self.max_divergence:
+                self.hits += 1
+                logger.debug(f"Speculative answer hit ({len(draft.tokens)} tokens ready): {self.stats()}")
+                return draft.follow()
+            self.misses += 1
+            self.wasted_tokens += draft.cancel()
+        logger.debug(f"Speculative answer miss: {self.stats()}")
+        return None
+
+    def cancel(self) -> None:
+        """Drops the current draft, e.g. because the context it was generated with changed."""
+        with self._lock:
+            draft, self._draft = self._draft, None
+            self._previous = []
+            if draft is not None:
+                self.wasted_tokens += draft.cancel()
+
+    def stats(self) -> dict:
+        resolved = self.hits + self.misses
+        return {
+            "drafts": self.drafts,
+            "restarts": self.restarts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / resolved if resolved else 0.0,
+            "wasted_tokens": self.wasted_tokens,
+        }
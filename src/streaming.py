@@ -0,0 +1,157 @@
+"""Bounded hand-off between the capture loop and the Deepgram socket."""
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Union
+
+from loguru import logger
+
+OVERFLOW_POLICIES = ("block", "drop-oldest", "coalesce")
+# Anything else put on a ChunkQueue is a control message
+AUDIO_TYPES = (bytes, bytearray, memoryview)
+
+
+class ChunkQueue:
+    """
+    Bounded FIFO of outgoing audio chunks and control messages.
+
+    When the queue is full, `put` follows the overflow policy:
+        - "block": wait until the sender frees a slot.
+        - "drop-oldest": discard the oldest queued audio chunk.
+        - "coalesce": append the audio bytes to the newest queued item if it is audio, so
+          nothing is lost and the socket sees fewer, larger sends. Falls back to "drop-oldest"
+          when the newest item is a control message.
+
+    Control messages (str) are never dropped or merged and may exceed the capacity, so a
+    Finalize queued behind a backlog always goes out after the audio it refers to.
+
+    Example:
+        ```python
+        queue = ChunkQueue(capacity=50, policy="coalesce")
+        queue.put(audio_bytes)
+        item, enqueued_at = queue.get()
+        ```
+    """
+
+    def __init__(self, capacity: int, policy: str = "coalesce") -> None:
+        if capacity < 1:
+            raise ValueError("ChunkQueue capacity must be at least 1")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+        self.capacity = capacity
+        self.policy = policy
+
+        self.max_depth = 0
+        self.max_lag = 0.0
+        self.dropped = 0
+        self.coalesced = 0
+
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def put(self, data: Union[bytes, bytearray, memoryview, str]) -> None:
+        """
+        Enqueues a chunk, applying the overflow policy if the queue is full.
+
+        Args:
+            data (Union[bytes, bytearray, memoryview, str]): Audio bytes or a JSON control
+                message. Audio must not alias a buffer the caller will reuse.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ChunkQueue is closed")
+            if len(self._items) >= self.capacity and isinstance(data, AUDIO_TYPES):
+                if self.policy == "block":
+                    self._cond.wait_for(lambda: len(self._items) < self.capacity or self._closed)
+                    if self._closed:
+                        raise RuntimeError("ChunkQueue is closed")
+                elif self.policy == "coalesce" and isinstance(self._items[-1][0], AUDIO_TYPES):
+                    tail, enqueued_at = self._items[-1]
+                    self._items[-1] = (b"".join((tail, data)), enqueued_at)
+                    self.coalesced += 1
+                    return
+                else:
+                    self._drop_oldest_audio()
+            self._items.append((data, time.monotonic()))
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+
+    def _drop_oldest_audio(self) -> None:
+        # Control messages stay queued; with nothing but control messages queued, nothing is dropped
+        for index, (item, _) in enumerate(self._items):
+            if isinstance(item, AUDIO_TYPES):
+                del self._items[index]
+                self.dropped += 1
+                return
+
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple]:
+        """
+        Dequeues the oldest item.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for an item. Waits forever if None.
+
+        Returns:
+            Optional[tuple]: (data, enqueue monotonic time), or None if the queue is closed and
+            drained or the timeout expired.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                return None
+            if not self._items:
+                return None
+            data, enqueued_at = self._items.popleft()
+            self.max_lag = max(self.max_lag, time.monotonic() - enqueued_at)
+            self._cond.notify_all()
+            return data, enqueued_at
+
+    def close(self) -> None:
+        """Stops accepting items. Queued items can still be drained with `get`."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Returns the current depth and the high-water marks and overflow counters."""
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "max_depth": self.max_depth,
+                "max_lag_sec": self.max_lag,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+            }
+
+
+class AudioSender(threading.Thread):
+    """
+    Drains a ChunkQueue into a send callable on its own thread.
+
+    Keeps websocket stalls away from the capture loop: a slow `send` only grows the queue,
+    it never delays the next `recorder.record` call. The thread exits once the queue is closed
+    and drained.
+    """
+
+    def __init__(self, queue: ChunkQueue, send: Callable[[Union[bytes, str]], object]) -> None:
+        super().__init__(name="audio-sender", daemon=True)
+        self.queue = queue
+        self._send = send
+        # Monotonic time the first audio chunk went out, for start-up latency metrics
+        self.first_sent_at = None
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self._send(item[0])
+                if self.first_sent_at is None and isinstance(item[0], AUDIO_TYPES):
+                    self.first_sent_at = time.monotonic()
+            except Exception as error:
+                logger.error(f"Can't send audio chunk: {error}")
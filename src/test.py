@@ -10,8 +10,7 @@ from deepgram import (
     LiveOptions,
 )
 
-# from constants import DEEPGRAM_API_KEY
-DEEPGRAM_API_KEY = "e7c8746b1d34c6d239d393a9e7e18cabbb2f2958"
+from constants import DEEPGRAM_API_KEY
 from constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE
 
 SPEAKER_ID = str(sc.default_speaker().name)
@@ -19,6 +18,7 @@ SPEAKER_ID = str(sc.default_speaker().name)
 # We will collect the is_final=true messages here so we can use them when the person finishes speaking
 is_finals = []
 
+
 def main():
     try:
         # Initialize the Deepgram client with default options
@@ -156,4 +156,4 @@ if __name__ == "__main__":
 #         print(f"Exception: {e}")
 
 # if __name__ == "__main__":
-#     main()
\ No newline at end of file
+#     main()
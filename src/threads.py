@@ -1,241 +1,776 @@
-from PyQt5.QtCore import QThread, pyqtSignal
 import numpy as np
 from loguru import logger
-import asyncio
-import soundcard as sc
 import time
-from deepgram import (
-    DeepgramClient,
-    PrerecordedOptions,
-    FileSource,
-    LiveTranscriptionEvents,
-    LiveOptions,
-    DeepgramClientOptions
-)
-import numpy as np
 import json
-import sys
-import openai
+import threading
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Tuple
 
 from .constants import DEEPGRAM_API_KEY, OPENAI_API_KEY
-from .constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE
-
-
-SYSTEM_PROMPT = f"""You are a sales agent for Avoca Air Condioning company.
-You will receive an audio transcription of the question. It may not be complete. 
-Treat this as a phone call you are the sales agent. The audio you receive is the users response on the call. 
-You need to understand the question and write an answer to it based on the following script: \n
-Start with an introduction: Thank you for calling Dooley Service Pro, this is Sarah your virtual assistant how may I help you today!
-
-If you have already greeted/introduced yourself to the user, there is no need to do it again. 
-
-If the user is querying about service, frame a response to collect information on:
-Problem / issue they are facing
-Age of their system
-Name
-Address
-Callback Number
-Email
-
-Further clarifications after this could be based on when they are interested in scheduling it and appropriately responding saying its been scheduled.
+from .constants import OUTPUT_FILE_NAME, RECORD_SEC, SAMPLE_RATE, TARGET_SAMPLE_RATE
+from .constants import KEEPALIVE_EVERY_SILENT_CHUNKS, SEND_QUEUE_CHUNKS, SEND_QUEUE_POLICY
+from .constants import FINALIZE_TIMEOUT_SEC, UPSTREAM_ENCODING, RECORD_CALLS
+from .constants import DEEPGRAM_POOL_SIZE, DEEPGRAM_POOL_MAX_IDLE_SEC
+from .constants import SPECULATIVE_ANSWERS, SPECULATION_MIN_WORDS, SPECULATION_MAX_DIVERGENCE, SPECULATION_TEMPERATURE
+from .constants import HISTORY_MAX_TOKENS, HISTORY_KEEP_RECENT, HISTORY_SUMMARY_TOKENS
+from .constants import SLOT_FILLING, SLOTS_HISTORY_MAX_TOKENS, SLOTS_HISTORY_SUMMARY_TOKENS
+from .constants import FAQ_FAST_PATH, FAQ_MIN_SCORE, FAQ_MIN_COVERAGE, FAQ_MIN_TERMS, FAQ_SINGLE_TERM_MIN_SCORE
+from .constants import SCRIPT_FILE
+from .accounting import UsageLedger, count_message_tokens, usage_ledger
+from . import tracing
+from .audio import CallRecorder, loopback_microphone
+from .dsp import PCM16Converter, Resampler, VoiceActivityGate
+from .encoders import StreamEncoder
+from .faq import FAQMatcher
+from .history import ConversationHistory
+from .knowledge import KnowledgeBase, load_script
+from .llm import stream_completion
+from .pool import DeepgramConnectionPool
+from .prompts import SHORTER_INSTRACT, LONGER_INSTRACT, build_messages, cached_prompt_tokens
+from .slots import SlotState
+from .scheduler import FULL_MARKER, SHORT_MARKER, AnswerScheduler, TokenStream, split_section
+from .speculation import SpeculativeAnswerer
+from .streaming import AudioSender, ChunkQueue
+
+if TYPE_CHECKING:
+    from deepgram import DeepgramClient, LiveOptions
+    from .llm_client import LLMClient
+
+
+# Shared by all sessions and created on first use, so importing this module loads no
+# Deepgram/OpenAI SDK, opens no connection or audio device and reads no file.
+deepgram_client = None
+# One connection pool and event loop for every session's LLM requests
+llm_client = None
+# The call script, indexed once; each prompt only carries the parts relevant to the question
+knowledge_base = None
+# Answers scripted FAQ questions in microseconds
+faq_matcher = None
+default_session = None
+connection_pool = None
+_init_lock = threading.RLock()
+
+
+def get_deepgram_client() -> "DeepgramClient":
+    global deepgram_client
+
+    if deepgram_client is None:
+        with _init_lock:
+            if deepgram_client is None:
+                from deepgram import DeepgramClient, DeepgramClientOptions
+
+                config = DeepgramClientOptions(
+                    options={"keepalive": "true"}  # Comment this out to see the effect of not using keepalive
+                )
+                deepgram_client = DeepgramClient(DEEPGRAM_API_KEY, config)
+    return deepgram_client
+
+
+def get_llm_client() -> "LLMClient":
+    global llm_client
+
+    if llm_client is None:
+        with _init_lock:
+            if llm_client is None:
+                import openai
+                from .llm_client import create_llm_client
+
+                # Keep a key set before the first call, e.g. by a benchmark
+                openai.api_key = openai.api_key or OPENAI_API_KEY
+                llm_client = create_llm_client()
+    return llm_client
+
+
+def close_llm_client() -> None:
+    """Closes the shared LLM client's connections, if it was created; the next request creates a new one."""
+    global llm_client
+
+    with _init_lock:
+        client, llm_client = llm_client, None
+    if client is not None:
+        client.close()
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    global knowledge_base
+
+    if knowledge_base is None:
+        with _init_lock:
+            if knowledge_base is None:
+                knowledge_base = load_script(SCRIPT_FILE)
+    return knowledge_base
+
+
+def get_faq_matcher() -> FAQMatcher:
+    """The matcher of the shared script's FAQ entries."""
+    global faq_matcher
+
+    if faq_matcher is None:
+        entries = get_knowledge_base().faq_entries
+        with _init_lock:
+            if faq_matcher is None:
+                faq_matcher = FAQMatcher(
+                    entries,
+                    min_score=FAQ_MIN_SCORE,
+                    min_coverage=FAQ_MIN_COVERAGE,
+                    min_terms=FAQ_MIN_TERMS,
+                    single_term_min_score=FAQ_SINGLE_TERM_MIN_SCORE,
+                )
+    return faq_matcher
+
+
+def build_live_options(stream_options: dict, interim_results: bool = False) -> "LiveOptions":
+    """Builds the LiveOptions for a stream described by `StreamEncoder.live_options()`."""
+    from deepgram import LiveOptions
+
+    return LiveOptions(
+        model="nova-2",
+        language="en-US",
+        smart_format=True,
+        interim_results=interim_results,
+        endpointing=10000,
+        **stream_options,
+    )
 
-FAQ:
-What hours are you open?
-8-5 Monday Though Friday, 5 days a week
-When can we speak to a live agent?
-The earliest that someone will return your call is between 730 and 8:30 AM the next day.
-What time can you come out?
-We do offer open time frames. Our dispatcher will keep you updated throughout the day. 
-Is there a service fee to come out?
-It’s just $79 for the diagnostic fee unless you are looking to replace your system in which case we can offer a free quote.
 
-Below consists the history of conversation between you and the user. 
-The format is User query: <transcript of users query> GPT Response: <response you gave the user in the past>
-Don't ask for the same information multiple times and/or request redundant information if the info is in the message history.
+def prepare_connection(connection) -> None:
+    """Registers the session-independent event listeners on a new connection."""
+    from deepgram import LiveTranscriptionEvents
 
-"""
+    connection.on(LiveTranscriptionEvents.Close, on_close)
+    connection.on(LiveTranscriptionEvents.Open, on_open)
+    connection.on(LiveTranscriptionEvents.Metadata, on_metadata)
 
-SHORTER_INSTRACT = "Concisely respond, limiting your answer to 70 words."
-LONGER_INSTRACT = (
-    "Before answering, take a deep breath and think one step at a time. Believe the answer in no more than 150 words."
-)
 
-config = DeepgramClientOptions(
-    options={"keepalive": "true"} # Comment this out to see the effect of not using keepalive
-)
+class TranscriptionSession:
+    """
+    One call: its Deepgram connection, capture pipeline, transcript and chat history.
 
-deepgram_client = DeepgramClient(DEEPGRAM_API_KEY, config)
-openai.api_key = OPENAI_API_KEY
+    Sessions share no mutable state, so several can run side by side in one process, each
+    driven from its own threads. Audio comes either from `microphone` (by default the loopback
+    device) via `process_audio`, or from any other source via `push_audio`. The module-level functions
+    below operate on `get_default_session()` for the single-call frontends.
 
+    Example:
+        ```python
+        session = TranscriptionSession()
+        session.start_transcription()
+        threading.Thread(target=session.process_audio).start()
+        ...
+        transcript = session.stop_transcription()
+        answer = session.generate_answer(transcript)
+        ```
+    """
 
-SPEAKER_ID = str(sc.default_speaker().name)
+    def __init__(
+        self,
+        client: Optional["DeepgramClient"] = None,
+        speaker_id: Optional[str] = None,
+        sample_rate: int = SAMPLE_RATE,
+        on_segment: Optional[Callable[[str], None]] = None,
+        encoding: str = UPSTREAM_ENCODING,
+        recording_file_name: Optional[str] = OUTPUT_FILE_NAME if RECORD_CALLS else None,
+        connection_pool: Optional[DeepgramConnectionPool] = None,
+        speculative: bool = SPECULATIVE_ANSWERS,
+        llm: Optional["LLMClient"] = None,
+        faq: Optional[FAQMatcher] = None,
+        knowledge: Optional[KnowledgeBase] = None,
+        faq_fast_path: bool = FAQ_FAST_PATH,
+        slot_filling: bool = SLOT_FILLING,
+        on_slots: Optional[Callable[[dict], None]] = None,
+        on_audio_level: Optional[Callable[[float, bool], None]] = None,
+        microphone=None,
+    ) -> None:
+        # None uses the shared clients, created when the first connection or request needs them
+        self._deepgram_client = client
+        self._llm_client = llm
+        # The call script; pass a `faq` built from the same script's FAQ entries
+        self.knowledge = knowledge or get_knowledge_base()
+        # Scripted answers for confidently recognised FAQ questions; None sends everything to the LLM
+        self.faq = (faq or get_faq_matcher()) if faq_fast_path else None
+        # Pre-opened connections; start_transcription falls back to a fresh handshake on a miss
+        self.connection_pool = connection_pool
+        # Loopback device captured by `process_audio`; None is the default speaker
+        self.speaker_id = speaker_id
+        # Anything with a soundcard-style `recorder(samplerate=...)`, e.g. an `audio.FileMicrophone`;
+        # None captures the loopback of `speaker_id`
+        self.microphone = microphone
+        self.sample_rate = sample_rate
+        self.encoding = encoding
+        # Each call is streamed to its own files derived from this name; None disables recording
+        self.recording_file_name = recording_file_name
+        # Called from the Deepgram thread with each non-empty final transcript segment
+        self.on_segment = on_segment
+        # Called from the capture thread with the level in dB and the gate's speech flag of every chunk
+        self.on_audio_level = on_audio_level
+        # Drafts the quick answer from interim results; its stats() report hits and wasted tokens
+        self.speculator = None
+        if speculative:
+            self.speculator = SpeculativeAnswerer(
+                lambda transcript: self._completion_tokens(
+                    self._build_messages(transcript, "short"), "draft", SPECULATION_TEMPERATURE
+                ),
+                SPECULATION_MIN_WORDS,
+                SPECULATION_MAX_DIVERGENCE,
+            )
+
+        self.dg_connection = None
+        self.is_running = False
+        # Whether a turn holds a connection, sender thread and recording that stop_transcription must close
+        self._turn_active = False
+        self._turn_lock = threading.RLock()
+        self.is_finals = []
+        self.is_done = False
+        self.transcribed_data = ""
+        # Caller details parsed from final segments; the prompt carries them as known facts
+        self.slots = SlotState() if slot_filling else None
+        # Called with every slot (None where unknown) whenever one changes, from the thread that parsed it
+        self.on_slots = on_slots
+        # Recent turns verbatim plus a running summary of older ones, within a token budget
+        if self.slots is not None:
+            # The known facts keep the details older turns gave, so fewer turns are kept
+            self.history = ConversationHistory(
+                SLOTS_HISTORY_MAX_TOKENS, HISTORY_KEEP_RECENT, SLOTS_HISTORY_SUMMARY_TOKENS
+            )
+        else:
+            self.history = ConversationHistory(HISTORY_MAX_TOKENS, HISTORY_KEEP_RECENT, HISTORY_SUMMARY_TOKENS)
+        self.last_prompt_tokens = None
+        # Usage the API reports; cached tokens are prompt prefix tokens served from the provider's cache
+        self.last_usage = None
+        self.prompt_tokens_total = 0
+        self.cached_tokens_total = 0
+        # Tokens, latency and cost of every LLM call by mode ("short", "full", "both", "draft"),
+        # also counted in the process-wide `usage_ledger`
+        self.usage = UsageLedger("session", parent=usage_ledger)
+        # Stage spans of each turn (a recording and its answers), also kept by the process-wide `tracer`
+        self.tracer = tracing.Tracer("session", parent=tracing.tracer)
+        self.answer_scheduler = AnswerScheduler()
+
+        self.voice_gate = VoiceActivityGate()
+        self.send_queue = None
+        self.audio_sender = None
+        self._resampler = None
+        self._converter = None
+        self._encoder = None
+        self.call_recorder = None
+        self._silent_chunks = 0
+        self.capture_done = threading.Event()
+        self.capture_done.set()
+        self.finalize_done = threading.Event()
+        self.last_finalize_sec = None
+        self.start_pressed_at = None
+        self.connected_at = None
+        self.last_connect_sec = None
+        self.last_first_byte_sec = None
+        self.last_first_token_sec = None
+        self.last_answer_sec = None
+
+    # 1. Start Transcription
+    @property
+    def deepgram_client(self) -> "DeepgramClient":
+        return self._deepgram_client or get_deepgram_client()
+
+    @property
+    def llm_client(self) -> "LLMClient":
+        return self._llm_client or get_llm_client()
+
+    def start_transcription(self) -> bool:
+        """
+        Connects to Deepgram and opens a turn; `process_audio` or `push_audio` feed it once this returns True.
+
+        A turn left open, e.g. by a Deepgram error that stopped the capture, is stopped first. If the
+        connection fails, nothing of the turn is left behind and `stop_transcription` is a no-op.
+        """
+        from deepgram import LiveTranscriptionEvents
+
+        with self._turn_lock:
+            if self._turn_active:
+                logger.warning("Previous turn still open, stopping it first")
+                self.stop_transcription()
+
+            logger.debug("Starting transcription...")
+
+            # Packs outgoing PCM as linear16, FLAC or Ogg/Opus; it also describes the stream to Deepgram
+            self._encoder = StreamEncoder(self.encoding, TARGET_SAMPLE_RATE)
+            # Downmix to mono and decimate to the rate announced in LiveOptions
+            self._resampler = Resampler(self.sample_rate, TARGET_SAMPLE_RATE)
+            # Reuses its float/int16 buffers across chunks so the loop does not allocate
+            self._converter = PCM16Converter()
+
+            # Initialize Deepgram connection with LiveOptions
+            options = build_live_options(self._encoder.live_options(), interim_results=self.speculator is not None)
+
+            # Take a pre-opened connection if the pool has one, else establish a new WebSocket connection
+            self.start_pressed_at = time.monotonic()
+            self.tracer.begin_turn(self.start_pressed_at)
+            self.dg_connection = self.connection_pool.checkout(options) if self.connection_pool else None
+            pooled = self.dg_connection is not None
+            if not pooled:
+                self.dg_connection = self.deepgram_client.listen.websocket.v("1")
+                prepare_connection(self.dg_connection)
+
+            # Define event listeners
+            self.dg_connection.on(LiveTranscriptionEvents.Transcript, self.handle_transcription)
+            self.dg_connection.on(LiveTranscriptionEvents.Error, self.on_error)
+
+            # Start the connection
+            if not pooled and not self.dg_connection.start(options):
+                logger.error("Failed to connect to Deepgram")
+                self.dg_connection = None
+                return False
+            self.connected_at = time.monotonic()
+            self.last_connect_sec = self.connected_at - self.start_pressed_at
+            self.tracer.span(tracing.CONNECT, self.start_pressed_at, self.connected_at, pooled=pooled)
+            logger.debug(f"Deepgram connection ready in {self.last_connect_sec * 1000:.0f} ms (pooled: {pooled})")
+
+            self.is_finals = []
+            self.is_done = False
+            self.finalize_done.clear()
+            self.transcribed_data = ""
+            if self.speculator is not None:
+                self.speculator.cancel()
+            # Holds back silence; its frames_sent / frames_suppressed counters outlive the call
+            self.voice_gate = VoiceActivityGate()
+            self._silent_chunks = 0
+            if self.recording_file_name:
+                base = Path(self.recording_file_name)
+                call_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+                self.call_recorder = CallRecorder(
+                    base.with_name(f"{base.stem}_{call_id}{base.suffix}"), samplerate=TARGET_SAMPLE_RATE
+                )
+
+            # The capture loop only enqueues; this thread owns dg_connection.send
+            policy = SEND_QUEUE_POLICY
+            if self._encoder.is_compressed and policy == "drop-oldest":
+                logger.warning("Dropping chunks would corrupt a compressed stream, coalescing instead")
+                policy = "coalesce"
+            self.send_queue = ChunkQueue(SEND_QUEUE_CHUNKS, policy)
+            self.audio_sender = AudioSender(self.send_queue, self.dg_connection.send)
+            self.audio_sender.start()
+
+            self._turn_active = True
+            self.is_running = True
+            return True
+
+    @property
+    def turn_active(self) -> bool:
+        """True from a successful `start_transcription` to `stop_transcription`, even once an error stopped capture."""
+        return self._turn_active
+
+    def push_audio(self, audio_chunk: np.ndarray) -> None:
+        """
+        Runs one chunk through the resample -> voice gate -> int16 stages and queues it for sending.
+
+        Args:
+            audio_chunk (np.ndarray): Float samples at `sample_rate`, shaped (frames,) or (frames, channels).
+        """
+        mono = self._resampler.process(audio_chunk)
+        if self.call_recorder is not None:
+            # Record everything, including the silence the gate holds back
+            self.call_recorder.write(mono)
+        frames = self.voice_gate.process(mono)
+        if self.on_audio_level is not None and self.voice_gate.level_db is not None:
+            self.on_audio_level(float(self.voice_gate.level_db), self.voice_gate.is_speech)
+
+        # Hand the bytes to the sender thread; encoding copies out of the reused int16 buffer
+        for frame in frames:
+            data = self._encoder.encode(self._converter.convert_array(frame))
+            if data:
+                self.send_queue.put(data)
+
+        # Nothing reaches Deepgram while the gate is closed, so keep the socket alive
+        if frames:
+            self._silent_chunks = 0
+        else:
+            self._silent_chunks += 1
+            if self._silent_chunks % KEEPALIVE_EVERY_SILENT_CHUNKS == 0:
+                keep_alive_msg = json.dumps({"type": "KeepAlive"})
+                self.send_queue.put(keep_alive_msg)
+
+    # 2. Process Audio (Recording)
+    def process_audio(self) -> None:
+        mic = self.microphone or loopback_microphone(self.speaker_id)
+        self.capture_done.clear()
+
+        try:
+            with mic.recorder(samplerate=self.sample_rate) as recorder:
+                logger.info("Started recording system audio...")
+                cnt = 0
+                assert self.is_running
+                while self.is_running:
+                    # Record a small chunk of audio data
+                    audio_chunk = recorder.record(numframes=self.sample_rate // 10)  # 0.1 second chunks
+                    self.push_audio(audio_chunk)
+                    cnt += 1
+                logger.info(
+                    f"Recording done: {cnt} chunks, {self.voice_gate.frames_sent} sent, "
+                    f"{self.voice_gate.frames_suppressed} suppressed as silence"
+                )
+
+        except KeyboardInterrupt as e:
+            logger.error(f"Error while recording or streaming audio: {e}")
+        finally:
+            self.capture_done.set()
+
+    def stop_transcription(self, finalize_timeout: float = FINALIZE_TIMEOUT_SEC) -> str:
+        """Finalizes and closes the open turn and returns its transcript; "" without an open turn."""
+        with self._turn_lock:
+            self.is_running = False
+            if not self._turn_active:
+                logger.debug("No turn in progress")
+                return ""
+            self._turn_active = False
+            self.tracer.span(tracing.CAPTURE, self.connected_at)
+
+            # Let the capture loop finish its last chunk so Finalize goes out after it
+            if not self.capture_done.wait(timeout=1.0):
+                logger.warning("Capture loop did not stop in time")
+
+            if self.call_recorder is not None:
+                self.call_recorder.close()
+                logger.debug(f"Call recorded to {[str(path) for path in self.call_recorder.paths]}")
+
+            # Queue the encoder tail and a finalize message behind any audio still waiting to be sent
+            tail = self._encoder.close()
+            if tail:
+                self.send_queue.put(tail)
+            finalize_msg = json.dumps({"type": "Finalize"})
+            finalize_start = time.monotonic()
+            self.send_queue.put(finalize_msg)
+            self.send_queue.close()
+            self.audio_sender.join()
+            logger.debug(f"Send queue: {self.send_queue.stats()}")
+            if self.audio_sender.first_sent_at is not None:
+                self.last_first_byte_sec = self.audio_sender.first_sent_at - self.start_pressed_at
+                self.tracer.span(tracing.FIRST_BYTE, self.start_pressed_at, self.audio_sender.first_sent_at)
+                logger.debug(f"Record press to first audio byte sent: {self.last_first_byte_sec * 1000:.0f} ms")
+
+            # Wait for the from_finalize result instead of guessing how long the server needs
+            if self.finalize_done.wait(timeout=finalize_timeout):
+                self.last_finalize_sec = time.monotonic() - finalize_start
+                self.tracer.span(tracing.FINALIZE, finalize_start)
+                logger.debug(f"Finalize took {self.last_finalize_sec * 1000:.0f} ms")
+            else:
+                self.last_finalize_sec = None
+                logger.warning(f"No finalize result within {finalize_timeout} s, transcript may be truncated")
+
+            # Close the connection
+            self.dg_connection.finish()
+            logger.debug("Transcription done")
+
+            self.call_recorder = None
+            return self.transcribed_data
+
+    # 3. Handle Transcription (Callback)
+    def handle_transcription(self, client, result, **kwargs) -> None:
+        sentence = result.channel.alternatives[0].transcript
+
+        if result.is_final:
+            self.transcribed_data += sentence + " "
+            logger.debug(f"Final Transcription: {sentence}")
+            self.tracer.instant(tracing.FINAL_TRANSCRIPT, words=len(sentence.split()))
+            if sentence and self.on_segment is not None:
+                self.on_segment(sentence)
+            if sentence:
+                self._update_slots(sentence)
+            if self.speculator is not None:
+                self.speculator.update(self.transcribed_data, final=True)
+        elif self.speculator is not None:
+            self.speculator.update(self.transcribed_data + sentence)
+
+        if result.from_finalize:
+            self.is_done = True
+            self.finalize_done.set()
+
+    def on_error(self, client, error, **kwargs) -> None:
+        logger.error(f"Handled Error: {error}")
+        self.is_running = False
+
+    def generate_answer(self, transcript: str, short_answer: bool = True, temperature: float = 0.4) -> str:
+        """
+        Generates an answer based on the given transcript using the OpenAI GPT-3.5-turbo model.
+
+        Args:
+            transcript (str): The transcript to generate an answer from.
+            short_answer (bool): Whether to generate a short answer or not. Defaults to True.
+            temperature (float): The temperature parameter for controlling the randomness of the generated answer.
+
+        Returns:
+            str: The generated answer.
+
+        Example:
+            ```python
+            transcript = "Can you tell me about the weather?"
+            answer = session.generate_answer(transcript, short_answer=False, temperature=0.8)
+            print(answer)
+            ```
+
+        Raises:
+            Exception: If the LLM fails to generate an answer.
+        """
+        return "".join(self.generate_answer_stream(transcript, short_answer, temperature))
+
+    def generate_answer_stream(
+        self, transcript: str, short_answer: bool = True, temperature: float = 0.4
+    ) -> Iterator[str]:
+        """
+        Streaming variant of `generate_answer` that yields the answer token by token.
+
+        Identical requests made while one is in flight (same transcript, history, mode and
+        temperature) share its completion instead of starting another. The turn is added to the
+        message history once the completion ends. Time to first token and to the full answer
+        are kept in `last_first_token_sec` / `last_answer_sec`.
+
+        Args:
+            transcript (str): The transcript to generate an answer from.
+            short_answer (bool): Whether to generate a short answer or not. Defaults to True.
+            temperature (float): The temperature parameter for controlling the randomness of the generated answer.
+
+        Yields:
+            str: Pieces of the answer as the model produces them.
+
+        Example:
+            ```python
+            for token in session.generate_answer_stream(transcript):
+                print(token, end="", flush=True)
+            ```
+
+        Raises:
+            Exception: If the LLM fails to generate an answer.
+        """
+        mode = "short" if short_answer else "full"
+        return self._schedule(transcript, mode, temperature).follow()
+
+    def generate_answers_stream(self, transcript: str, temperature: float = 0.4) -> Tuple[Iterator[str], Iterator[str]]:
+        """
+        Streams the short and the full answer out of a single completion.
+
+        The model writes the short answer first, so it streams as fast as a short-only request,
+        while the prompt is sent and paid for once. If a speculative draft already covers the
+        short answer, only the full answer is requested. Identical requests in flight share
+        the completion, as in `generate_answer_stream`.
+
+        Args:
+            transcript (str): The transcript to generate the answers from.
+            temperature (float): The temperature parameter for controlling the randomness of the generated answers.
+
+        Returns:
+            Tuple[Iterator[str], Iterator[str]]: Token iterators of the short and the full answer.
+                They can be consumed in order or from two threads.
+
+        Example:
+            ```python
+            short_tokens, full_tokens = session.generate_answers_stream(transcript)
+            quick_widget.write("".join(short_tokens))
+            full_widget.write("".join(full_tokens))
+            ```
+        """
+        both = self._schedule(transcript, "both", temperature)
+        return (
+            split_section(both.follow(), SHORT_MARKER, FULL_MARKER),
+            split_section(both.follow(), FULL_MARKER),
+        )
 
-is_running = True
-is_finals = []
-is_done = False
-transcribed_data = ""
+    def generate_answers(self, transcript: str, temperature: float = 0.4) -> Tuple[str, str]:
+        """Returns the short and the full answer from one completion. See `generate_answers_stream`."""
+        short_tokens, full_tokens = self.generate_answers_stream(transcript, temperature)
+        return "".join(short_tokens), "".join(full_tokens)
+
+    def _schedule(self, transcript: str, mode: str, temperature: float) -> TokenStream:
+        slots_version = self.slots.version if self.slots is not None else 0
+        key = (transcript, self.history.version, slots_version, mode, temperature)
+        return self.answer_scheduler.submit(key, lambda: self._answer_tokens(transcript, mode, temperature))
+
+    def _answer_tokens(self, transcript: str, mode: str, temperature: float) -> Iterator[str]:
+        start = time.monotonic()
+        self.last_first_token_sec = None
+        # Typed or replayed transcripts never went through handle_transcription
+        self._update_slots(transcript)
+        faq_entry = self.faq.match(transcript) if self.faq is not None else None
+        source = "llm"
+        if faq_entry is not None:
+            # Scripted answer, no LLM call; a speculative draft for this turn is no longer needed
+            prompt_tokens = self.last_prompt_tokens = 0
+            source = "faq"
+            tokens = self._faq_tokens(faq_entry.answer, mode)
+            if self.speculator is not None:
+                self.speculator.cancel()
+        else:
+            # Built and counted once per turn; the completion reuses both
+            messages = self._build_messages(transcript, mode)
+            prompt_tokens = self.last_prompt_tokens = count_message_tokens(messages, self.llm_client.model)
+            tokens = self._take_speculation(transcript) if mode in ("short", "both") else None
+            if tokens is not None:
+                source = "draft"
+                if mode == "both":
+                    tokens = self._with_full_answer(tokens, transcript, temperature)
+            else:
+                tokens = self._completion_tokens(messages, mode, temperature, prompt_tokens)
+        try:
+            pieces = []
+            for token in tokens:
+                if self.last_first_token_sec is None:
+                    self.last_first_token_sec = time.monotonic() - start
+                    self.tracer.span(tracing.FIRST_TOKEN, start, mode=mode, source=source)
+                pieces.append(token)
+                yield token
+        except Exception as error:
+            logger.error(f"Can't generate answer: {error}")
+            raise error
+        self.last_answer_sec = time.monotonic() - start
+        self.tracer.span(tracing.ANSWER, start, mode=mode, source=source)
+        logger.debug(
+            f"First token after {(self.last_first_token_sec or self.last_answer_sec) * 1000:.0f} ms, "
+            f"full {mode} answer after {self.last_answer_sec * 1000:.0f} ms"
+        )
+        if mode == "both":
+            # The short answer is what gets said on the call
+            pieces = split_section(iter(pieces), SHORT_MARKER, FULL_MARKER)
+        self._remember_turn(transcript, "".join(pieces), prompt_tokens)
+
+    def _completion_tokens(
+        self, messages: list, mode: str, temperature: float, estimate: Optional[int] = None
+    ) -> Iterator[str]:
+        return stream_completion(
+            self.llm_client, messages, temperature, self.usage, mode, estimate, self._record_usage, self.tracer
+        )
 
-msg_history = ""
+    def _record_usage(self, usage: dict) -> None:
+        cached = cached_prompt_tokens(usage)
+        self.last_usage = usage
+        self.prompt_tokens_total += usage["prompt_tokens"]
+        self.cached_tokens_total += cached
+        logger.debug(
+            f"Prompt: {usage['prompt_tokens']} tokens, {cached} cached "
+            f"({self.cached_tokens_total}/{self.prompt_tokens_total} cached this call)"
+        )
 
+    def _faq_tokens(self, answer: str, mode: str) -> Iterator[str]:
+        if mode == "both":
+            # The scripted answer serves as the short and the full answer
+            yield f"{SHORT_MARKER}\n{answer}\n{FULL_MARKER}\n{answer}"
+        else:
+            yield answer
+
+    def _with_full_answer(self, short_tokens: Iterator[str], transcript: str, temperature: float) -> Iterator[str]:
+        # A drafted short answer leaves only the full one to generate; lay both out like a combined completion
+        full = TokenStream(self._completion_tokens(self._build_messages(transcript, "full"), "full", temperature))
+        yield SHORT_MARKER + "\n"
+        yield from short_tokens
+        yield "\n" + FULL_MARKER + "\n"
+        yield from full.follow()
+
+    def _take_speculation(self, transcript: str) -> Optional[Iterator[str]]:
+        if self.speculator is None:
+            return None
+        return self.speculator.take(transcript)
+
+    def _build_messages(self, transcript: str, mode: str) -> list:
+        facts = self.slots.render() if self.slots is not None else ""
+        return build_messages(transcript, mode, self.history.messages(), self.knowledge, facts=facts)
+
+    def _update_slots(self, text: str) -> None:
+        if self.slots is None:
+            return
+        changed = self.slots.update(text)
+        if not changed:
+            return
+        logger.debug(f"Slots filled: {changed}")
+        if self.on_slots is not None:
+            self.on_slots(self.slots.as_dict())
+
+    @property
+    def msg_history(self) -> str:
+        """The history as it appears in the system prompt."""
+        return self.history.render()
+
+    def _remember_turn(self, transcript: str, resp: str, prompt_tokens: Optional[int] = None) -> None:
+        self.history.add(transcript, resp, prompt_tokens)
+        logger.debug(f"Turn {len(self.history)}: {prompt_tokens} prompt tokens")
+        if self.speculator is not None:
+            # A draft in flight was prompted with the old history
+            self.speculator.cancel()
 
-# 1. Start Transcription
-def start_transcription():
-    global is_finals, transcribed_data, is_done, is_running
-    global dg_connection
 
-    logger.debug("Starting transcription...")
+def on_open(self, open, **kwargs):
+    logger.debug("Connection Open")
 
-    # Initialize Deepgram connection with LiveOptions
-    options = LiveOptions(
-        model="nova-2",
-        language="en-US",
-        smart_format=True,
-        encoding="linear16",
-        interim_results=False,
-        sample_rate=SAMPLE_RATE,
-        channels=1,
-        endpointing=10000
-    )
 
-    # Establish Deepgram WebSocket connection
-    dg_connection = deepgram_client.listen.websocket.v("1")
+def on_metadata(self, metadata, **kwargs):
+    logger.debug(f"Metadata: {metadata}")
 
-    # Define event listeners
-    dg_connection.on(LiveTranscriptionEvents.Transcript, handle_transcription)
-    dg_connection.on(LiveTranscriptionEvents.Close, on_close)
-    dg_connection.on(LiveTranscriptionEvents.Error, on_error)
-    dg_connection.on(LiveTranscriptionEvents.Open, on_open)
-    dg_connection.on(LiveTranscriptionEvents.Metadata, on_metadata)
 
-    is_running = True
-    is_finals = []
-    is_done = False
-    transcribed_data = ""
+def on_close(self, close, **kwargs):
+    logger.debug("Connection Closed")
 
-    # Start the connection
-    if not dg_connection.start(options):
-        logger.error("Failed to connect to Deepgram")
-        return False
 
-    return True
+def get_default_session() -> TranscriptionSession:
+    """The session of the single-call frontends, created on first use."""
+    global default_session
 
-# 2. Process Audio (Recording)
-def process_audio():
-    global is_running
+    if default_session is None:
+        with _init_lock:
+            if default_session is None:
+                default_session = TranscriptionSession()
+    return default_session
 
-    mic = sc.get_microphone(id=SPEAKER_ID, include_loopback=True)
 
-    try:
-        with mic.recorder(samplerate=SAMPLE_RATE) as recorder:
-            logger.info("Started recording system audio...")
-            cnt = 0
-            assert(is_running)
-            while is_running:
-                # Record a small chunk of audio data
-                audio_chunk = recorder.record(numframes=SAMPLE_RATE // 10)  # 0.1 second chunks
-                audio_chunk_int16 = np.int16(audio_chunk * 32767)
-                audio_bytes = audio_chunk_int16.tobytes()
+def prewarm_connections(size: int = DEEPGRAM_POOL_SIZE) -> DeepgramConnectionPool:
+    """
+    Starts opening pooled Deepgram connections for the default session.
 
-                # Send the bytes to the WebSocket connection
-                dg_connection.send(audio_bytes)
+    Call it once at application start so the first record press does not wait for a handshake.
 
-                if cnt % 5 == 0:
-                    keep_alive_msg = json.dumps({"type": "KeepAlive"})
-                    dg_connection.send(keep_alive_msg)
+    Returns:
+        DeepgramConnectionPool: The pool; its `stats()` report the hit rate.
+    """
+    global connection_pool
 
-                cnt += 1
-            print("recording done", cnt)
+    if connection_pool is None:
+        session = get_default_session()
+        options = build_live_options(
+            StreamEncoder(session.encoding, TARGET_SAMPLE_RATE).live_options(),
+            interim_results=session.speculator is not None,
+        )
+        connection_pool = DeepgramConnectionPool(
+            session.deepgram_client, options, size, DEEPGRAM_POOL_MAX_IDLE_SEC, prepare=prepare_connection
+        ).start()
+        session.connection_pool = connection_pool
+    return connection_pool
 
-    except KeyboardInterrupt as e:
-        logger.error(f"Error while recording or streaming audio: {e}")
 
-def stop_transcription():
-    global is_running, is_done
+def start_transcription():
+    return get_default_session().start_transcription()
 
-    is_running = False
 
-    # Send a finalize message to Deepgram
-    finalize_msg = json.dumps({"type": "Finalize"})
-    dg_connection.send(finalize_msg)
+def process_audio():
+    get_default_session().process_audio()
 
-    # Wait for final transcription to be done
-    time.sleep(0.2)
 
-    # Close the connection
-    dg_connection.finish()
-    logger.debug("Transcription done")
+def stop_transcription(finalize_timeout: float = FINALIZE_TIMEOUT_SEC):
+    return get_default_session().stop_transcription(finalize_timeout)
 
-    return transcribed_data
 
-# 3. Handle Transcription (Callback)
 def handle_transcription(self, result, **kwargs):
-    global is_finals, transcribed_data, is_done
-
-    sentence = result.channel.alternatives[0].transcript
-    
-    # print(result)
-
-    if result.is_final:
-        transcribed_data += sentence + " "
-        print(f"Final Transcription: {sentence}")
-
-    if result.from_finalize:
-        is_done = True
-
-def on_open(self, open, **kwargs):
-    logger.debug("Connection Open")
+    get_default_session().handle_transcription(self, result, **kwargs)
 
-def on_metadata(self, metadata, **kwargs):
-    logger.debug(f"Metadata: {metadata}")
 
-def on_close(self, close, **kwargs):
-    logger.debug("Connection Closed")
+def generate_answer(transcript: str, short_answer: bool = True, temperature: float = 0.4) -> str:
+    """Generates an answer within the default session. See `TranscriptionSession.generate_answer`."""
+    return get_default_session().generate_answer(transcript, short_answer, temperature)
 
-def on_error(self, error, **kwargs):
-    logger.debug(f"Handled Error: {error}")
-    sys.exit(1)
 
-def generate_answer(transcript: str, short_answer: bool = True, temperature: float = 0.4) -> str:
-    """
-    Generates an answer based on the given transcript using the OpenAI GPT-3.5-turbo model.
+def generate_answer_stream(transcript: str, short_answer: bool = True, temperature: float = 0.4) -> Iterator[str]:
+    """Streams an answer within the default session. See `TranscriptionSession.generate_answer_stream`."""
+    return get_default_session().generate_answer_stream(transcript, short_answer, temperature)
 
-    Args:
-        transcript (str): The transcript to generate an answer from.
-        short_answer (bool): Whether to generate a short answer or not. Defaults to True.
-        temperature (float): The temperature parameter for controlling the randomness of the generated answer.
 
-    Returns:
-        str: The generated answer.
+def generate_answers(transcript: str, temperature: float = 0.4) -> Tuple[str, str]:
+    """Short and full answer from one completion. See `TranscriptionSession.generate_answers`."""
+    return get_default_session().generate_answers(transcript, temperature)
 
-    Example:
-        ```python
-        transcript = "Can you tell me about the weather?"
-        answer = generate_answer(transcript, short_answer=False, temperature=0.8)
-        print(answer)
-        ```
 
-    Raises:
-        Exception: If the LLM fails to generate an answer.
-    """
-    global msg_history
-
-    if short_answer:
-        system_prompt = SYSTEM_PROMPT + SHORTER_INSTRACT
-    else:
-        system_prompt = SYSTEM_PROMPT + LONGER_INSTRACT
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            temperature=temperature,
-            messages=[
-                {"role": "system", "content": system_prompt + msg_history},
-                {"role": "user", "content": transcript},
-            ],
-        )
-    except Exception as error:
-        logger.error(f"Can't generate answer: {error}")
-        raise error
-    resp = response["choices"][0]["message"]["content"]
-    msg_history += "User query:\n" + transcript + "\n"
-    msg_history += "GPT Response:\n" + resp + "\n"
-    return resp
\ No newline at end of file
+def generate_answers_stream(transcript: str, temperature: float = 0.4) -> Tuple[Iterator[str], Iterator[str]]:
+    """Streams the short and full answer of one completion. See `TranscriptionSession.generate_answers_stream`."""
+    return get_default_session().generate_answers_stream(transcript, temperature)
@@ -0,0 +1,210 @@
+"""Per-turn latency tracing: monotonic-clock spans of each pipeline stage, kept in a ring buffer."""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from .constants import TRACE_BUFFER_TURNS, TRACING
+
+# Stages recorded by TranscriptionSession and CallEngine; all but "final_transcript" are spans
+CONNECT = "connect"  # record press -> Deepgram connection ready
+FIRST_BYTE = "first_byte"  # record press -> first audio byte sent
+CAPTURE = "capture"  # connection ready -> capture stopped
+FINAL_TRANSCRIPT = "final_transcript"  # instant, one per final segment
+FINALIZE = "finalize"  # Finalize sent -> from_finalize result received
+LLM_REQUEST = "llm_request"  # chat completion request -> last chunk
+FIRST_TOKEN = "first_token"  # answer requested -> first token, from the LLM, a draft or the FAQ
+ANSWER = "answer"  # answer requested -> last token
+ANSWER_RENDERED = "answer_rendered"  # engine.answer() -> first tokens painted, suffixed with the section
+
+# Shared by all tracers, so turns of different sessions stay apart in the process-wide buffer
+_turn_ids = itertools.count(1)
+
+
+class TurnTrace:
+    """
+    The spans of one turn: a recording and the answers to it.
+
+    Times are `time.monotonic()` seconds. Spans are appended without a lock from whichever
+    thread finishes them; list appends are atomic, so capture, Deepgram and LLM threads can
+    record into the same turn.
+    """
+
+    def __init__(self, turn_id: int, start: float) -> None:
+        self.turn_id = turn_id
+        self.start = start
+        # (name, start, end, args); instants have no end
+        self.spans = []
+
+    def add(self, name: str, start: float, end: Optional[float], args: Optional[dict] = None) -> None:
+        self.spans.append((name, start, end, args))
+
+    def durations(self) -> Dict[str, List[float]]:
+        """Seconds per stage: the duration of spans, the time since the turn started for instants."""
+        durations = defaultdict(list)
+        for name, start, end, _ in self.spans:
+            durations[name].append(end - start if end is not None else start - self.start)
+        return durations
+
+    def as_dict(self) -> dict:
+        return {
+            "turn_id": self.turn_id,
+            "start": self.start,
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": (start - self.start) * 1000,
+                    "duration_ms": (end - start) * 1000 if end is not None else None,
+                    **(args or {}),
+                }
+                for name, start, end, args in self.spans
+            ],
+        }
+
+
+def _quantile(values: List[float], quantile: float) -> float:
+    values = sorted(values)
+    return values[min(int(quantile * len(values)), len(values) - 1)]
+
+
+class Tracer:
+    """
+    Records the stages of each turn into a ring buffer of the last `capacity` turns.
+
+    `begin_turn` starts a turn, the session's stages add spans to it, and the next
+    `begin_turn` retires it into the buffer. A tracer forwards retired turns to its `parent`,
+    so each session keeps its own turns while the process-wide `tracer` sees all of them.
+    Recording a span costs an append, under a microsecond; a disabled tracer records nothing.
+
+    Example:
+        ```python
+        session_tracer = Tracer("session", parent=tracer)
+        session_tracer.begin_turn()
+        start = time.monotonic()
+        ...  # the stage
+        session_tracer.span(FINALIZE, start)
+        session_tracer.summary()["finalize"]["p95_ms"]
+        session_tracer.save("trace.json", chrome=True)  # open in chrome://tracing or Perfetto
+        ```
+    """
+
+    def __init__(
+        self,
+        name: str = "process",
+        parent: Optional["Tracer"] = None,
+        capacity: int = TRACE_BUFFER_TURNS,
+        enabled: bool = TRACING,
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.enabled = enabled
+        self.turns = deque(maxlen=capacity)
+        self.current: Optional[TurnTrace] = None
+        self._lock = threading.Lock()
+
+    def begin_turn(self, start: Optional[float] = None) -> Optional[TurnTrace]:
+        """Retires the current turn and starts the next one at `start`, by default now."""
+        if not self.enabled:
+            return None
+        turn = TurnTrace(next(_turn_ids), time.monotonic() if start is None else start)
+        with self._lock:
+            previous, self.current = self.current, turn
+        if previous is not None:
+            self._retire(previous)
+        return turn
+
+    def end_turn(self) -> None:
+        with self._lock:
+            previous, self.current = self.current, None
+        if previous is not None:
+            self._retire(previous)
+
+    def _retire(self, turn: TurnTrace) -> None:
+        with self._lock:
+            self.turns.append(turn)
+        if self.parent is not None:
+            self.parent._retire(turn)
+
+    def span(self, name: str, start: float, end: Optional[float] = None, **args) -> None:
+        """Records stage `name` from `start` to `end`, by default now, into the current turn."""
+        if not self.enabled:
+            return
+        turn = self.current or self.begin_turn(start)
+        turn.add(name, start, time.monotonic() if end is None else end, args or None)
+
+    def instant(self, name: str, **args) -> None:
+        """Records that `name` happened now."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        turn = self.current or self.begin_turn(now)
+        turn.add(name, now, None, args or None)
+
+    def all_turns(self) -> List[TurnTrace]:
+        """Retired turns, oldest first, then the current one."""
+        with self._lock:
+            turns = list(self.turns)
+            if self.current is not None:
+                turns.append(self.current)
+        return turns
+
+    def summary(self) -> Dict[str, dict]:
+        """Count and p50/p95/p99/max in ms per stage, over the buffered turns."""
+        durations = defaultdict(list)
+        for turn in self.all_turns():
+            for name, values in turn.durations().items():
+                durations[name].extend(values)
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": _quantile(values, 0.5) * 1000,
+                "p95_ms": _quantile(values, 0.95) * 1000,
+                "p99_ms": _quantile(values, 0.99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+            for name, values in sorted(durations.items())
+        }
+
+    def log_summary(self) -> None:
+        for name, stats in self.summary().items():
+            logger.info(
+                f"Stage [{self.name}/{name}]: {stats['count']} samples, p50 {stats['p50_ms']:.1f} ms, "
+                f"p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms"
+            )
+
+    def as_dict(self) -> dict:
+        return {"summary": self.summary(), "turns": [turn.as_dict() for turn in self.all_turns()]}
+
+    def chrome_trace(self) -> dict:
+        """The buffered turns in Chrome's trace event format, one row per turn."""
+        turns = self.all_turns()
+        origin = min((turn.start for turn in turns), default=0.0)
+        pid = os.getpid()
+        events = []
+        for turn in turns:
+            tid = turn.turn_id
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"turn {tid}"}})
+            for name, start, end, args in turn.spans:
+                event = {"name": name, "pid": pid, "tid": tid, "ts": (start - origin) * 1e6, "args": args or {}}
+                if end is not None:
+                    event.update(ph="X", dur=(end - start) * 1e6)
+                else:
+                    event.update(ph="i", s="t")
+                events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str, chrome: bool = False) -> Path:
+        """Writes the buffered turns as JSON, or as a Chrome trace with `chrome`."""
+        path = Path(path)
+        path.write_text(json.dumps(self.chrome_trace() if chrome else self.as_dict(), indent=2))
+        return path
+
+
+# Every turn of the process; session tracers forward to it
+tracer = Tracer()